@@ -4,6 +4,7 @@ from contextlib import asynccontextmanager
 from app.db.main import init_db
 from app.auth.routes import auth_router
 from app.middlewares.middleware import register_middleware
+from app.parsers.parse_executor import shutdown_parse_executor
 from demo_front.router import router as demo_front_router
 
 
@@ -12,6 +13,7 @@ async def life_span(app: FastAPI):
     print(f"server is starting ... ")
     await init_db()
     yield
+    shutdown_parse_executor()
     print(f"server has been stopped")
 
 version = "v1"
@@ -0,0 +1,28 @@
+# app/api/routes/etl_jobs.py
+from celery.result import AsyncResult
+from fastapi import APIRouter
+
+from app.celery_tasks import celery_app
+
+router = APIRouter(prefix="/etl", tags=["etl"])
+
+@router.get("/jobs/{job_id}")
+def get_etl_job(job_id: str):
+    """
+    Статус фоновой ETL-задачи: PENDING (в очереди или неизвестный id) / STARTED / PROGRESS / SUCCESS / FAILURE.
+    progress — счётчики pages, fetched, parsed, inserted, updated, unchanged, failed.
+    Обычный def: FastAPI выполнит его в пуле потоков, запрос к result backend не блокирует event loop.
+    """
+    job = AsyncResult(job_id, app=celery_app)
+    state = job.state
+    body = {"job_id": job_id, "status": state}
+
+    if state == "PROGRESS":
+        body["progress"] = job.info
+    elif state == "SUCCESS":
+        result = job.result or {}
+        body["progress"] = result.get("progress")
+        body["result"] = result
+    elif state == "FAILURE":
+        body["error"] = {"error": type(job.result).__name__, "message": str(job.result)}
+    return body
@@ -1,47 +1,41 @@
 # app/api/routes/etl_simpler_grants.py
 from __future__ import annotations
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import JSONResponse
-from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi import APIRouter, Query, Request, status
 
-from app.db.main import get_session
-from app.parsers.grant.simpler_grants import fetch_grants_from_simpler
+from app.celery_tasks import etl_simpler_grants
+from app.parsers.watermark import DEFAULT_STOP_AFTER_KNOWN
 
 router = APIRouter(prefix="/etl", tags=["etl"])
 
-@router.post("/simpler-grants/run")
+@router.post("/simpler-grants/run", status_code=status.HTTP_202_ACCEPTED)
 async def run_simpler_grants(
+    request: Request,
     pages: int = Query(1, ge=1, le=25, description="Сколько страниц листинга обойти"),
     start_page: int = Query(1, ge=1, description="С какой страницы начинать (обычно 1)"),
     throttle_sec: float = Query(0.0, ge=0.0, le=5.0, description="Пауза между страницами (сек)"),
-    session: AsyncSession = Depends(get_session),
+    incremental: bool = Query(False, description="Пропускать уже известные URL и остановиться у «водораздела»"),
+    stop_after_known: int = Query(DEFAULT_STOP_AFTER_KNOWN, ge=1, description="Сколько известных подряд считать водоразделом"),
 ):
     """
-    ETL из Simpler.Grants.gov:
+    ETL из Simpler.Grants.gov — ставит фоновую задачу Celery и сразу возвращает её id:
     - проходит страницы выдачи,
     - ходит в карточки,
-    - сохраняет гранты через GrantService,
-    - возвращает список созданных ID.
+    - сохраняет гранты через GrantService (insert / update изменившихся / skip неизменных).
+    Прогресс и итоговые счётчики — GET /etl/jobs/{job_id}.
     """
-    try:
-        ids = await fetch_grants_from_simpler(
-            session=session,
-            pages=pages,
-            start_page=start_page,
-            throttle_sec=throttle_sec,
-        )
-        return {
-            "source": "simpler.grants.gov",
-            "pages": pages,
-            "start_page": start_page,
-            "throttle_sec": throttle_sec,
-            "inserted": len(ids),
-            "ids": ids,
-        }
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        return JSONResponse(
-            status_code=500,
-            content={"error": e.__class__.__name__, "message": str(e)},
-        )
+    job = etl_simpler_grants.delay(
+        pages=pages,
+        start_page=start_page,
+        throttle_sec=throttle_sec,
+        incremental=incremental,
+        stop_after_known=stop_after_known,
+    )
+    return {
+        "job_id": job.id,
+        "source": "simpler.grants.gov",
+        "pages": pages,
+        "start_page": start_page,
+        "throttle_sec": throttle_sec,
+        "incremental": incremental,
+        "status_url": str(request.url_for("get_etl_job", job_id=job.id)),
+    }
@@ -0,0 +1,129 @@
+# app/api/routes/export.py
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, List, Literal, Optional, Type
+
+from fastapi import APIRouter, Depends, Query, status
+from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.auth.dependencies import RoleChecker
+from app.db.main import AsyncSessionLocal
+from app.schemes.grant import GrantRead
+from app.schemes.internship import InternshipRead
+from app.schemes.scholarship import ScholarshipRead
+from app.services.grantService import GrantService
+from app.services.internshipService import InternshipService
+from app.services.opportunityService import OpportunityService
+from app.services.scholarshipService import ScholarshipService
+from .pagination import OpportunityFilterParams
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+role_checker = Depends(RoleChecker(['admin', 'user']))
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value: Any):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value: Any):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+async def _export_stream(
+    service: OpportunityService,
+    stmt,
+    schema: Type[BaseModel],
+    fmt: str,
+) -> AsyncIterator[str]:
+    """
+    Генератор тела ответа. Сессия открывается здесь, а не через Depends(get_session):
+    зависимость закрывается раньше, чем StreamingResponse дочитает курсор.
+    Каждая пачка курсора уходит клиенту одним куском.
+    """
+    # колонки — как в ответе листинга (без search_vector/content_hash)
+    fields: List[str] = list(schema.model_fields)
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+        yield buffer.getvalue()
+
+    async with AsyncSessionLocal() as session:
+        async for rows in service.stream_opportunities(session, stmt):
+            if fmt == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_csv_value(getattr(row, f)) for f in fields] for row in rows)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps({f: getattr(row, f) for f in fields}, default=_json_default, ensure_ascii=False) + "\n"
+                    for row in rows
+                )
+
+
+def _export_response(
+    service: OpportunityService,
+    schema: Type[BaseModel],
+    name: str,
+    fmt: str,
+    filters: dict,
+) -> StreamingResponse:
+    # фильтры проверяем до начала стрима — после первого байта 400 уже не отдать
+    try:
+        stmt = service.build_export_query(**filters)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return StreamingResponse(
+        _export_stream(service, stmt, schema, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{fmt}"'},
+    )
+
+
+@router.get("/grants", dependencies=[role_checker])
+async def export_grants(
+    params: OpportunityFilterParams = Depends(),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+):
+    """Полная выгрузка грантов (с теми же фильтрами, что и листинг) одним потоковым ответом."""
+    return _export_response(GrantService(), GrantRead, "grants", format, params.filter_kwargs())
+
+
+@router.get("/scholarships")
+async def export_scholarships(
+    params: OpportunityFilterParams = Depends(),
+    level: Optional[str] = Query(None, description="bachelor / master / phd"),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+):
+    """Полная выгрузка стипендий одним потоковым ответом."""
+    return _export_response(
+        ScholarshipService(), ScholarshipRead, "scholarships", format, {**params.filter_kwargs(), "level": level}
+    )
+
+
+@router.get("/internships")
+async def export_internships(
+    params: OpportunityFilterParams = Depends(),
+    format: Literal["ndjson", "csv"] = Query("ndjson"),
+):
+    """Полная выгрузка стажировок одним потоковым ответом."""
+    return _export_response(InternshipService(), InternshipRead, "internships", format, params.filter_kwargs())
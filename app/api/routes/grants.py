@@ -1,6 +1,6 @@
-from fastapi import APIRouter, status, Depends, Response, Query, Header
+from fastapi import APIRouter, status, Depends, Request, Response, Query
 from fastapi.exceptions import HTTPException
-from typing import List, Optional, Literal
+from typing import List
 
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -8,6 +8,15 @@ from app.schemes import grant
 from app.services.grantService import GrantService
 from app.db.main import get_session
 from app.auth.dependencies import AccessTokenBearer, RoleChecker
+from app.middlewares.http_cache import (
+    is_not_modified,
+    item_etag,
+    list_etag,
+    not_modified_response,
+    set_validators,
+)
+from .pagination import OpportunityListParams, set_pagination_headers
+from .similar import MAX_SIMILAR, similar_items
 
 router = APIRouter(prefix="/grants", tags=["grants"])
 
@@ -21,43 +30,28 @@ checker_admin = Depends(RoleChecker(['admin']))
             status_code=status.HTTP_200_OK,
             dependencies=[role_checker])
 async def get_all_grants(
+    request: Request,
     session: AsyncSession = Depends(get_session),
-    # Пагинация
-    page: int = Query(1, ge=1, description="Номер страницы, начиная с 1"),
-    page_size: int = Query(20, ge=1, le=100, description="Размер страницы"),
-    # Фильтры
-    q: Optional[str] = Query(None, description="Поиск по title/description"),
-    provider: Optional[str] = Query(None),
-    country: Optional[str] = Query(None),
-    deadline_from: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    deadline_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
-    # Сортировка
-    sort_by: Literal["created_at", "published_at", "deadline"] = Query("created_at"),
-    order: Literal["asc", "desc"] = Query("desc"),
+    params: OpportunityListParams = Depends(),
     response: Response = None,
 ):
     """
     Возвращает список грантов с пагинацией/фильтрами/сортировкой.
-    Метаданные пагинации кладутся в заголовки X-Total-Count, X-Page, X-Page-Size.
+    Метаданные пагинации кладутся в заголовки X-Total-Count, X-Page, X-Page-Size, X-Next-Cursor.
+    Поддерживает If-None-Match / If-Modified-Since (304 без выборки строк).
     """
-    # делегируем бизнес-логику в сервис (добавь там соответствующие параметры)
-    items, total = await grant_service.get_all_grants(
-        session=session,
-        page=page,
-        page_size=page_size,
-        q=q,
-        provider=provider,
-        country=country,
-        deadline_from=deadline_from,
-        deadline_to=deadline_to,
-        sort_by=sort_by,
-        order=order,
-    )
-
-    # Заголовки пагинации
-    response.headers["X-Total-Count"] = str(total)
-    response.headers["X-Page"] = str(page)
-    response.headers["X-Page-Size"] = str(page_size)
+    try:
+        last_modified, version = await grant_service.list_validators(session)
+        etag = list_etag(request, last_modified, version)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified, "grants:list")
+
+        items, total, next_cursor = await grant_service.get_all_grants(session=session, **params.as_kwargs())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    set_pagination_headers(response, params, total, next_cursor)
+    set_validators(response, etag, last_modified, "grants:list")
     return items
 
 
@@ -79,13 +73,28 @@ async def create_a_grant(
 @router.get("/{grant_id}", response_model=grant.GrantRead,
             status_code=status.HTTP_200_OK,
             dependencies=[role_checker])
-async def get_grant(grant_id: int, session: AsyncSession = Depends(get_session)):
+async def get_grant(grant_id: int, request: Request, response: Response, session: AsyncSession = Depends(get_session)):
     item = await grant_service.get_grant(grant_id, session)
     if item:
+        etag = item_etag("grant", item.id, item.updated_at)
+        if is_not_modified(request, etag, item.updated_at):
+            return not_modified_response(etag, item.updated_at, "grants:item")
+        set_validators(response, etag, item.updated_at, "grants:item")
         return item
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Grant not found")
 
 
+@router.get("/{grant_id}/similar", status_code=status.HTTP_200_OK,
+            dependencies=[role_checker])
+async def get_similar_grants(
+    grant_id: int,
+    k: int = Query(10, ge=1, le=MAX_SIMILAR),
+    session: AsyncSession = Depends(get_session),
+):
+    """Похожие гранты по векторному индексу (для блока «похожие» на странице карточки)."""
+    return await similar_items("grant", grant_id, k, session)
+
+
 @router.patch("/{grant_id}", response_model=grant.GrantRead,
               status_code=status.HTTP_202_ACCEPTED,
               dependencies=[checker_admin])
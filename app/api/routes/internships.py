@@ -1,4 +1,4 @@
-from fastapi import APIRouter, status, Depends, Response
+from fastapi import APIRouter, status, Depends, Request, Response, Query
 from fastapi.exceptions import HTTPException
 from app.schemes import internship
 from sqlmodel.ext.asyncio.session import AsyncSession
@@ -7,6 +7,15 @@ from app.models.internship import Internship
 from typing import List
 from app.db.main import get_session
 from app.auth.dependencies import RoleChecker
+from app.middlewares.http_cache import (
+    is_not_modified,
+    item_etag,
+    list_etag,
+    not_modified_response,
+    set_validators,
+)
+from .pagination import OpportunityListParams, set_pagination_headers
+from .similar import MAX_SIMILAR, similar_items
 
 router = APIRouter()
 internship_service = InternshipService()
@@ -14,9 +23,25 @@ checker_admin = Depends(RoleChecker(['admin']))
 
 
 @router.get("/", response_model=List[internship.InternshipRead], status_code=status.HTTP_200_OK)
-async def get_all_internships(session: AsyncSession = Depends(get_session)):
-    internships = await internship_service.get_all_internships(session)
-    return internships
+async def get_all_internships(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    params: OpportunityListParams = Depends(),
+    response: Response = None,
+):
+    try:
+        last_modified, version = await internship_service.list_validators(session)
+        etag = list_etag(request, last_modified, version)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified, "internships:list")
+
+        items, total, next_cursor = await internship_service.get_all_internships(session, **params.as_kwargs())
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    set_pagination_headers(response, params, total, next_cursor)
+    set_validators(response, etag, last_modified, "internships:list")
+    return items
 
 
 @router.post("/", response_model=internship.InternshipRead, status_code=status.HTTP_201_CREATED, dependencies=[checker_admin])
@@ -26,15 +51,29 @@ async def create_an_internship(internship_data: internship.InternshipCreate, ses
 
 
 @router.get("/{internship_id}", response_model=internship.InternshipRead, status_code=status.HTTP_200_OK)
-async def get_internship(internship_id: int, session: AsyncSession = Depends(get_session)):
+async def get_internship(internship_id: int, request: Request, response: Response, session: AsyncSession = Depends(get_session)):
     internship = await internship_service.get_internship(internship_id, session)
 
     if internship:
+        etag = item_etag("internship", internship.id, internship.updated_at)
+        if is_not_modified(request, etag, internship.updated_at):
+            return not_modified_response(etag, internship.updated_at, "internships:item")
+        set_validators(response, etag, internship.updated_at, "internships:item")
         return internship
 
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Internship not found")
 
 
+@router.get("/{internship_id}/similar", status_code=status.HTTP_200_OK)
+async def get_similar_internships(
+    internship_id: int,
+    k: int = Query(10, ge=1, le=MAX_SIMILAR),
+    session: AsyncSession = Depends(get_session),
+):
+    """Похожие стажировки по векторному индексу (для блока «похожие» на странице карточки)."""
+    return await similar_items("internship", internship_id, k, session)
+
+
 @router.patch("/{internship_id}", response_model=internship.InternshipRead, status_code=status.HTTP_202_ACCEPTED, dependencies=[checker_admin])
 async def update_internship(internship_id: int, update_data: internship.InternshipUpdate, session: AsyncSession = Depends(get_session)):
     updated_internship = await internship_service.update_internship(internship_id, update_data, session)
@@ -0,0 +1,107 @@
+from typing import Optional, Literal
+
+from fastapi import Query, Response
+
+from app.services.opportunityService import MAX_PAGE_SIZE
+
+
+class OpportunityFilterParams:
+    """
+    Фильтры листингов /grants, /scholarships, /internships (без пагинации и сортировки).
+    Используются и выгрузкой /export.
+    """
+
+    def __init__(
+        self,
+        q: Optional[str] = Query(None, description="Поиск по title/description"),
+        provider: Optional[str] = Query(None),
+        country: Optional[str] = Query(None),
+        deadline_from: Optional[str] = Query(None, description="YYYY-MM-DD"),
+        deadline_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    ):
+        self.q = q
+        self.provider = provider
+        self.country = country
+        self.deadline_from = deadline_from
+        self.deadline_to = deadline_to
+
+    def filter_kwargs(self) -> dict:
+        """Только фильтры (без пагинации/сортировки) — для агрегатов по всему набору."""
+        return {
+            "q": self.q,
+            "provider": self.provider,
+            "country": self.country,
+            "deadline_from": self.deadline_from,
+            "deadline_to": self.deadline_to,
+        }
+
+
+class OpportunityListParams(OpportunityFilterParams):
+    """
+    Общие query-параметры листингов /grants, /scholarships, /internships:
+    пагинация (page или cursor), фильтры, сортировка и режим подсчёта total.
+    """
+
+    def __init__(
+        self,
+        # Пагинация
+        page: int = Query(1, ge=1, description="Номер страницы, начиная с 1"),
+        page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+        cursor: Optional[str] = Query(None, description="Непрозрачный курсор из X-Next-Cursor; при нём page игнорируется"),
+        include_total: Literal["false", "estimate", "exact"] = Query(
+            "exact", description="exact — count(*), estimate — оценка планировщика, false — без подсчёта"
+        ),
+        # Фильтры
+        q: Optional[str] = Query(None, description="Поиск по title/description"),
+        provider: Optional[str] = Query(None),
+        country: Optional[str] = Query(None),
+        deadline_from: Optional[str] = Query(None, description="YYYY-MM-DD"),
+        deadline_to: Optional[str] = Query(None, description="YYYY-MM-DD"),
+        # Сортировка
+        sort_by: Literal["created_at", "published_at", "deadline", "relevance"] = Query(
+            "created_at", description="relevance — по рангу совпадения с q (без q работает как created_at)"
+        ),
+        order: Literal["asc", "desc"] = Query("desc"),
+    ):
+        super().__init__(
+            q=q,
+            provider=provider,
+            country=country,
+            deadline_from=deadline_from,
+            deadline_to=deadline_to,
+        )
+        self.page = page
+        self.page_size = page_size
+        self.cursor = cursor
+        self.include_total = include_total
+        self.sort_by = sort_by
+        self.order = order
+
+    def as_kwargs(self) -> dict:
+        return {
+            "page": self.page,
+            "page_size": self.page_size,
+            "cursor": self.cursor,
+            "include_total": self.include_total,
+            **self.filter_kwargs(),
+            "sort_by": self.sort_by,
+            "order": self.order,
+        }
+
+
+def set_pagination_headers(
+    response: Response,
+    params: OpportunityListParams,
+    total: Optional[int],
+    next_cursor: Optional[str],
+) -> None:
+    """Метаданные пагинации: X-Total-Count, X-Page, X-Page-Size, X-Next-Cursor."""
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+        if params.include_total == "estimate":
+            response.headers["X-Total-Count-Estimated"] = "true"
+    if not params.cursor:
+        response.headers["X-Page"] = str(params.page)
+    response.headers["X-Page-Size"] = str(params.page_size)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
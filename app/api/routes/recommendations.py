@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from typing import List, Literal, Optional
 from uuid import UUID
 
 from app.db.main import get_session
 from app.auth.dependencies import get_current_user, RoleChecker
 from app.auth.models import User
-from app.schemes.recommendation import RecommendationCreate, RecommendationRead
+from app.models.recommendation import ItemType
+from app.schemes.recommendation import (
+    RecommendationBulkReplace,
+    RecommendationBulkResult,
+    RecommendationCreate,
+    RecommendationRead,
+)
+from app.services.opportunityService import MAX_PAGE_SIZE
 from app.services.recommendationService import RecommendationService
 
 router = APIRouter()
@@ -18,13 +25,31 @@ recommendation_service = RecommendationService()
 
 @router.get("/")
 async def get_user_recommendations(
+    response: Response,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE, description="Размер страницы"),
+    cursor: Optional[str] = Query(None, description="Непрозрачный курсор из next_cursor / X-Next-Cursor"),
+    types: Optional[List[ItemType]] = Query(None, description="Только эти типы: ?types=grant&types=scholarship"),
+    view: Literal["summary", "full"] = Query("summary", description="summary — без description"),
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_session),
 ):
-    recommendations = await recommendation_service.get_recommendations_for_user(current_user.uid, session)
+    """
+    Рекомендации текущего пользователя по убыванию score, страницами по limit.
+    Следующая страница — по next_cursor (он же в заголовке X-Next-Cursor).
+    """
+    try:
+        recommendations, next_cursor = await recommendation_service.get_recommendations_for_user(
+            current_user.uid, session, limit=limit, cursor=cursor, types=types, view=view,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return {
         "user_id": str(current_user.uid),
-        "recommendations": recommendations
+        "recommendations": recommendations,
+        "next_cursor": next_cursor,
     }
 
 @router.post("/", response_model=List[RecommendationRead], status_code=201)
@@ -35,6 +60,20 @@ async def create(
 ):
     return await recommendation_service.create_recommendations(recommendations, session)
 
+@router.put("/bulk", response_model=RecommendationBulkResult)
+async def replace_bulk(
+    payload: RecommendationBulkReplace,
+    session: AsyncSession = Depends(get_session),
+    _: bool = Depends(check_admin)
+):
+    """Заменяет наборы source_model указанных пользователей целиком (одна транзакция)."""
+    try:
+        return await recommendation_service.replace_user_sets(
+            session, payload.source_model, payload.recommendations, user_ids=payload.user_ids,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.delete("/{rec_id}", status_code=204)
 async def delete(
     rec_id: UUID,
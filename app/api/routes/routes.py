@@ -5,6 +5,8 @@ from .internships import router as internships_router
 from .recommendations import router as recommendations_router
 from .etl_scholarships import router as etl_scholarships_router
 from .etl_simpler_grants import router as etl_simpler_grants_router
+from .etl_jobs import router as etl_jobs_router
+from .export import router as export_router
 
 router = APIRouter()
 router.include_router(grants_router, prefix="/grants", tags=["Grants"])
@@ -12,4 +14,6 @@ router.include_router(scholarships_router, prefix="/scholarships", tags=["Schola
 router.include_router(internships_router, prefix="/internships", tags=["Internships"])
 router.include_router(recommendations_router, prefix="/recommendations", tags=["Recommendations"])
 router.include_router(etl_scholarships_router)
-router.include_router(etl_simpler_grants_router)
\ No newline at end of file
+router.include_router(etl_simpler_grants_router)
+router.include_router(etl_jobs_router)
+router.include_router(export_router)
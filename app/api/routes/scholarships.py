@@ -1,12 +1,21 @@
-from fastapi import APIRouter, status, Depends, Response
+from fastapi import APIRouter, status, Depends, Request, Response, Query
 from fastapi.exceptions import HTTPException
 from app.schemes import scholarship
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.services.scholarshipService import ScholarshipService
 from app.models.scholarship import Scholarship
-from typing import List
+from typing import List, Optional
 from app.db.main import get_session
 from app.auth.dependencies import RoleChecker
+from app.middlewares.http_cache import (
+    is_not_modified,
+    item_etag,
+    list_etag,
+    not_modified_response,
+    set_validators,
+)
+from .pagination import OpportunityListParams, set_pagination_headers
+from .similar import MAX_SIMILAR, similar_items
 
 router = APIRouter()
 scholarship_service = ScholarshipService()
@@ -14,9 +23,26 @@ checker_admin = Depends(RoleChecker(['admin']))
 
 
 @router.get("/", response_model=List[scholarship.ScholarshipRead], status_code=status.HTTP_200_OK)
-async def get_all_scholarships(session: AsyncSession = Depends(get_session)):
-    scholarships = await scholarship_service.get_all_scholarships(session)
-    return scholarships
+async def get_all_scholarships(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    params: OpportunityListParams = Depends(),
+    level: Optional[str] = Query(None, description="bachelor / master / phd"),
+    response: Response = None,
+):
+    try:
+        last_modified, version = await scholarship_service.list_validators(session)
+        etag = list_etag(request, last_modified, version)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified, "scholarships:list")
+
+        items, total, next_cursor = await scholarship_service.get_all_scholarships(session, **params.as_kwargs(), level=level)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    set_pagination_headers(response, params, total, next_cursor)
+    set_validators(response, etag, last_modified, "scholarships:list")
+    return items
 
 
 @router.post("/", response_model=scholarship.ScholarshipRead, status_code=status.HTTP_201_CREATED, dependencies=[checker_admin])
@@ -26,15 +52,29 @@ async def create_a_scholarship(scholarship_data: scholarship.ScholarshipCreate,
 
 
 @router.get("/{scholarship_id}", response_model=scholarship.ScholarshipRead, status_code=status.HTTP_200_OK)
-async def get_scholarship(scholarship_id: int, session: AsyncSession = Depends(get_session)):
+async def get_scholarship(scholarship_id: int, request: Request, response: Response, session: AsyncSession = Depends(get_session)):
     scholarship = await scholarship_service.get_scholarship(scholarship_id, session)
 
     if scholarship:
+        etag = item_etag("scholarship", scholarship.id, scholarship.updated_at)
+        if is_not_modified(request, etag, scholarship.updated_at):
+            return not_modified_response(etag, scholarship.updated_at, "scholarships:item")
+        set_validators(response, etag, scholarship.updated_at, "scholarships:item")
         return scholarship
 
     raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scholarship not found")
 
 
+@router.get("/{scholarship_id}/similar", status_code=status.HTTP_200_OK)
+async def get_similar_scholarships(
+    scholarship_id: int,
+    k: int = Query(10, ge=1, le=MAX_SIMILAR),
+    session: AsyncSession = Depends(get_session),
+):
+    """Похожие стипендии по векторному индексу (для блока «похожие» на странице карточки)."""
+    return await similar_items("scholarship", scholarship_id, k, session)
+
+
 @router.patch("/{scholarship_id}", response_model=scholarship.ScholarshipRead, status_code=status.HTTP_202_ACCEPTED, dependencies=[checker_admin])
 async def update_scholarship(scholarship_id: int, update_data: scholarship.ScholarshipUpdate, session: AsyncSession = Depends(get_session)):
     updated_scholarship = await scholarship_service.update_scholarship(scholarship_id, update_data, session)
@@ -0,0 +1,54 @@
+from typing import Any, Dict, List
+
+from fastapi import HTTPException, status
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.ml.vector_index import get_vector_index
+from app.services.recommendationService import VIEW_FIELDS, type_map
+
+# Сколько похожих отдаём максимум
+MAX_SIMILAR = 50
+
+
+async def similar_items(item_type: str, item_id: int, k: int, session: AsyncSession) -> List[Dict[str, Any]]:
+    """
+    Похожие объекты того же типа по векторному индексу (app/ml/vector_index.py), по убыванию косинуса.
+    Сам поиск идёт по mmap-индексу без БД; из БД — только summary-поля найденных k строк по первичному ключу.
+    Почти-дубликат (duplicate_of) в индекс не входит — для него ищутся соседи канонической записи.
+    Объект есть в БД, но ещё не попал в индекс (или индекса нет) — пустой список; объекта нет — 404.
+    """
+    model = type_map[item_type]
+    index = get_vector_index()
+    hits = index.similar(item_type, item_id, k=k) if index is not None else None
+    if hits is None:
+        duplicate_of = (await session.exec(select(model.duplicate_of).where(model.id == item_id))).first()
+        if duplicate_of is None:
+            if await session.get(model, item_id) is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"{item_type.capitalize()} not found")
+            return []
+        hits = index.similar(item_type, duplicate_of, k=k) if index is not None else None
+        if hits is None:
+            return []
+    if not hits:
+        return []
+
+    fields = VIEW_FIELDS["summary"]
+    stmt = select(model.id, *(getattr(model, f) for f in fields)).where(
+        model.id.in_([hit_id for _, hit_id, _ in hits]),
+        model.duplicate_of.is_(None),
+    )
+    rows = {row[0]: row for row in (await session.exec(stmt)).all()}
+
+    items = []
+    for hit_type, hit_id, score in hits:
+        row = rows.get(hit_id)
+        if row is None:
+            continue  # удалён или помечен дубликатом после сборки индекса
+        items.append({
+            "type": hit_type,
+            "item_id": hit_id,
+            "score": round(score, 6),
+            "data": dict(zip(fields, row[1:])),
+        })
+    return items
@@ -3,12 +3,12 @@ from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from .utils import decode_token
 from fastapi.exceptions import HTTPException
-from app.db.redis import token_blocklist, token_in_blocklist
+from app.db.redis import RevocationUnavailable, token_in_blocklist
 from app.db.main import get_session
 from sqlmodel.ext.asyncio.session import AsyncSession
 from .service import UserService
+from .token_versions import token_version_is_current
 from typing import List, Any
-from .models import User
 
 user_service = UserService()
 
@@ -23,9 +23,10 @@ class TokenBearer(HTTPBearer):
 
         token = creds.credentials
 
+        # декодируем ровно один раз на запрос
         token_data = decode_token(token)
 
-        if not self.token_valid(token):
+        if token_data is None:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail={
@@ -34,7 +35,15 @@ class TokenBearer(HTTPBearer):
                 }
             )
         
-        if await token_in_blocklist(token_data['jti']):
+        # локальная копия блоклиста — без сетевого запроса на каждый вызов
+        try:
+            revoked = await token_in_blocklist(token_data['jti'])
+        except RevocationUnavailable:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Token revocation list is unavailable, please retry later"
+            )
+        if revoked:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN, detail={
                     "error":"This token is invalid or has been revoked",
@@ -46,11 +55,6 @@ class TokenBearer(HTTPBearer):
 
         return token_data
         
-    def token_valid(self, token: str) -> bool:
-        token_data = decode_token(token)
-
-        return token_data is not None
-    
     def verify_token_data(self, token_data):
         raise NotImplementedError("Please override this method in child classes")
 
@@ -78,7 +82,12 @@ async def get_current_user(
         token_details: dict = Depends(AccessTokenBearer()),
         session: AsyncSession = Depends(get_session)
 ):
-    user_email = token_details['user']['email']
+    claims = token_details['user']
+
+    if claims.get('user_uid'):
+        return await user_service.get_user_by_uid(claims['user_uid'], session)
+
+    user_email = claims['email']
 
     user = await user_service.get_user_by_email(user_email, session)
     
@@ -89,8 +98,31 @@ class RoleChecker:
         
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_user)):
-        if not current_user.is_verified:
+    async def __call__(
+            self,
+            token_details: dict = Depends(AccessTokenBearer()),
+            session: AsyncSession = Depends(get_session)
+    ):
+        claims = token_details['user']
+
+        # Быстрый путь: роль и верификация берутся из подписанных claims, без SELECT пользователя
+        # (карта свежих подъёмов версий синхронизируется из users не чаще раза в несколько секунд на процесс).
+        # Если claims старого формата или версия устарела (роль/верификация менялись) — идём в БД.
+        if (
+            'role' in claims and 'is_verified' in claims and 'ver' in claims
+            and await token_version_is_current(session, claims['user_uid'], claims['ver'])
+        ):
+            role, is_verified = claims['role'], claims['is_verified']
+        else:
+            current_user = await get_current_user(token_details, session)
+            if current_user is None:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You are not allowed to perform this action"
+                )
+            role, is_verified = current_user.role, current_user.is_verified
+
+        if not is_verified:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail={
@@ -99,7 +131,7 @@ class RoleChecker:
                 }
             )
         
-        if current_user.role in self.allowed_roles:
+        if role in self.allowed_roles:
             return True
         
         raise HTTPException(
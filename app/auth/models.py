@@ -2,6 +2,7 @@ from sqlmodel import SQLModel, Field, Column
 import sqlalchemy.dialects.postgresql as pg
 import uuid
 from datetime import datetime
+from typing import Optional
 
 
 
@@ -17,13 +18,23 @@ class User(SQLModel, table=True):
         )
     )
     username: str
-    email: str
+    email: str = Field(index=True)
     first_name: str
     last_name: str
     role: str = Field(
         sa_column=Column(pg.VARCHAR, nullable=False, server_default="user")
     )
     is_verified: bool = Field(default=False)
+    # растёт при смене role/is_verified — токены с меньшей ver в claims больше не доверяются
+    token_version: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, server_default="0")
+    )
+    # когда token_version поднималась последний раз; воркеры читают свежие подъёмы по индексу
+    token_version_bumped_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(pg.TIMESTAMP, nullable=True, index=True)
+    )
     password_hash: str = Field(exclude=True)
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
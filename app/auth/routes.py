@@ -9,7 +9,8 @@ from .utils import (
     verify_password,
     generate_password_hash,
     create_url_safe_token,
-    decode_url_safe_token
+    decode_url_safe_token,
+    user_claims
 )
 from .dependencies import RefreshTokenBearer, AccessTokenBearer, get_current_user, RoleChecker
 from app.db.main import get_session
@@ -110,11 +111,7 @@ async def login_users(login_data: UserLoginModel, session: AsyncSession = Depend
 
         if password_valid:
             access_token = create_access_token(
-                user_data={
-                    'email': user.email,
-                    'user_uid': str(user.uid),
-                    'role' : user.role
-                }
+                user_data=user_claims(user)
             )
 
             refresh_token = create_access_token(
@@ -146,12 +143,18 @@ async def login_users(login_data: UserLoginModel, session: AsyncSession = Depend
 
 
 @auth_router.get('/refresh_token')
-async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer())):
+async def get_new_access_token(token_details: dict = Depends(RefreshTokenBearer()), session: AsyncSession = Depends(get_session)):
     expiry_timestamp = token_details['exp']
 
     if datetime.fromtimestamp(expiry_timestamp) > datetime.now():
+        # claims (роль, верификация, версия) перевыпускаем из актуальной строки пользователя
+        user = await user_service.get_user_by_uid(token_details['user']['user_uid'], session)
+
+        if user is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired token")
+
         new_access_token = create_access_token(
-            user_data=token_details['user']
+            user_data=user_claims(user)
         )
 
         return JSONResponse(content={
@@ -170,7 +173,8 @@ async def get_account_credentials(user = Depends(get_current_user), _:bool= Depe
 async def revoke_token(token_details: dict = Depends(AccessTokenBearer())):
     jti = token_details['jti']
 
-    await add_jti_to_blocklist(jti)
+    # отзыв действует ровно до exp токена
+    await add_jti_to_blocklist(jti, exp=token_details['exp'])
 
     return JSONResponse(
         content={
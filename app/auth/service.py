@@ -1,8 +1,14 @@
+import uuid
+from datetime import datetime
 from .models import User
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 from .schemes import UserCreateModel
 from .utils import generate_password_hash, verify_password
+from .token_versions import token_version_cache
+
+# поля, смена которых должна инвалидировать claims в уже выданных токенах
+CLAIM_FIELDS = ('role', 'is_verified')
 
 class UserService:
     async def get_user_by_email(self, email:str, session: AsyncSession):
@@ -13,6 +19,10 @@ class UserService:
         user = result.first()
 
         return user
+
+    async def get_user_by_uid(self, uid, session: AsyncSession):
+        # поиск по первичному ключу
+        return await session.get(User, uuid.UUID(str(uid)))
     
     async def user_exists(self, email: str, session: AsyncSession):
         user = await self.get_user_by_email(email, session)
@@ -33,10 +43,22 @@ class UserService:
         return new_user
     
     async def update_user(self, user: User, user_data: dict, session: AsyncSession):
-        
+        claims_changed = any(
+            k in CLAIM_FIELDS and getattr(user, k) != v for k, v in user_data.items()
+        )
+
         for k,v in user_data.items():
             setattr(user, k, v)
 
+        if claims_changed:
+            user.token_version = (user.token_version or 0) + 1
+            # по этой метке остальные воркеры подхватывают подъём (см. TokenVersionCache)
+            user.token_version_bumped_at = datetime.now()
+
         await session.commit()
 
+        if claims_changed:
+            # подъём закоммичен вместе с изменением; в этом процессе он виден сразу
+            token_version_cache.set_version(str(user.uid), user.token_version)
+
         return user
\ No newline at end of file
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .models import User
+from .utils import ACCESS_TOKEN_EXPIRY
+from app.db.redis import REVOCATION_MAX_STALENESS, REVOCATION_SYNC_INTERVAL
+
+# Запас на расхождение часов серверов приложения: bumped_at пишет один воркер, горизонт считает другой
+TOKEN_VERSION_CLOCK_SKEW = 60
+
+
+class TokenVersionCache:
+    """
+    In-process карта версий токенов (uid -> token_version) для пользователей, чья версия поднималась
+    за последние ACCESS_TOKEN_EXPIRY секунд. Источник — сама таблица users: подъём версии коммитится
+    вместе со сменой роли/верификации, так что отдельной публикации, которая может не дойти, нет.
+    Более ранние подъёмы не нужны — выданные до них access-токены уже истекли; нет записи — версия 0.
+    Синхронизация — один индексный SELECT по users.token_version_bumped_at не чаще раза в sync_interval.
+    """
+
+    def __init__(self, sync_interval: float = REVOCATION_SYNC_INTERVAL) -> None:
+        self.sync_interval = sync_interval
+        self._versions: Dict[str, int] = {}
+        self._synced_at = 0.0
+        self._last_success: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def set_version(self, uid: str, version: int) -> None:
+        self._versions[uid] = max(version, self._versions.get(uid, 0))
+
+    def version(self, uid: str) -> int:
+        return self._versions.get(uid, 0)
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._synced_at >= self.sync_interval
+
+    def is_trusted(self) -> bool:
+        """Была успешная синхронизация, и не дольше REVOCATION_MAX_STALENESS назад."""
+        return self._last_success is not None and time.monotonic() - self._last_success <= REVOCATION_MAX_STALENESS
+
+    async def sync(self, session: AsyncSession) -> None:
+        if not self.is_stale():
+            return
+        async with self._lock:
+            if not self.is_stale():
+                return
+            self._synced_at = time.monotonic()
+            horizon = datetime.now() - timedelta(seconds=ACCESS_TOKEN_EXPIRY + TOKEN_VERSION_CLOCK_SKEW)
+            try:
+                rows = (await session.exec(
+                    select(User.uid, User.token_version).where(User.token_version_bumped_at > horizon)
+                )).all()
+            except Exception as e:
+                logging.error("Token version sync failed: %s", e)
+                # сессия запроса нужна дальше — для похода за ролью в БД
+                await session.rollback()
+                return
+            # карта пересобирается целиком: в ней только свежие подъёмы, с числом пользователей она не растёт
+            self._versions = {str(uid): version for uid, version in rows}
+            self._last_success = time.monotonic()
+
+
+token_version_cache = TokenVersionCache()
+
+
+async def token_version_is_current(session: AsyncSession, uid: str, version: int) -> bool:
+    """
+    Версия из claims не ниже текущей. Пока карта версий недостоверна (ни одной успешной
+    синхронизации или слишком давно) — False: вызывающий идёт за ролью в БД, а не верит claims.
+    """
+    await token_version_cache.sync(session)
+    if not token_version_cache.is_trusted():
+        return False
+    return version >= token_version_cache.version(str(uid))
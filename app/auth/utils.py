@@ -21,6 +21,20 @@ def verify_password(password: str, hash: str) -> bool:
     return password_context.verify(password, hash)
 
 
+def user_claims(user) -> dict:
+    """
+    Подписанные claims пользователя: их достаточно RoleChecker'у, чтобы авторизовать запрос без SELECT.
+    ver — token_version на момент выпуска токена.
+    """
+    return {
+        'email': user.email,
+        'user_uid': str(user.uid),
+        'role': user.role,
+        'is_verified': user.is_verified,
+        'ver': user.token_version or 0,
+    }
+
+
 def create_access_token(user_data: dict, expiry: timedelta = None, refresh: bool = False):
     payload = {}
 
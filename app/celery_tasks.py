@@ -2,16 +2,16 @@ from __future__ import annotations
 import os
 import ssl
 import asyncio
+from contextlib import contextmanager
 from typing import Optional
 
-from celery import Celery
+from celery import Celery, chord, group
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 from celery.utils.log import get_task_logger
 
-from asgiref.sync import async_to_sync
-
 from app.core.config import settings
-from app.middlewares.mail import mail, create_message
+from app.middlewares.mail import MailDeliveryError, close_mailer, get_mailer
 
 # ВАЖНО: для ETL нам нужен AsyncSession напрямую, без FastAPI Depends
 # Экспортируй из app.db.main объект AsyncSessionLocal (sessionmaker)
@@ -47,27 +47,370 @@ if settings.CELERY_BROKER_URL.startswith("redis://") or settings.CELERY_BROKER_U
 
 # EMAIL
 
+# Получателей на одну задачу: больший список режется на подзадачи, их разбирают разные воркеры
+EMAIL_BATCH_SIZE = 50
+
+
+@worker_process_shutdown.connect
+def _close_mailer(**_kwargs):
+    close_mailer()
+
+
 @celery_app.task(
     bind=True,
-    autoretry_for=(Exception,),
-    retry_backoff=True,
-    retry_kwargs={"max_retries": 5},
-    time_limit=30, # жёсткий таймаут задачи
+    max_retries=5,
+    time_limit=60, # жёсткий таймаут задачи (на пачку до EMAIL_BATCH_SIZE писем)
 )
 def send_email(self, recipients: list[str], subject: str, html_message: str):
     """
-    Отправка email через существующий mail middleware.
+    Отправка email через постоянное SMTP-соединение процесса воркера (PooledMailer):
+    без нового подключения/STARTTLS/логина на каждое письмо, по письму на получателя.
+    Список длиннее EMAIL_BATCH_SIZE режется на подзадачи; при сбое повторяется только неотправленный хвост.
     """
+    if len(recipients) > EMAIL_BATCH_SIZE:
+        chunks = [recipients[i:i + EMAIL_BATCH_SIZE] for i in range(0, len(recipients), EMAIL_BATCH_SIZE)]
+        group(send_email.s(chunk, subject, html_message) for chunk in chunks).apply_async()
+        return {"ok": True, "chunks": len(chunks)}
+
     try:
-        message = create_message(
-            recipients=recipients,
-            subject=subject,
-            body=html_message,
+        result = get_mailer().send_batch(recipients, subject, html_message)
+    except MailDeliveryError as e:
+        logger.warning("Email sending failed, %d recipients left: %s", len(e.remaining), e)
+        raise self.retry(
+            exc=e,
+            args=(e.remaining, subject, html_message),
+            countdown=min(5 * 2 ** self.request.retries, 300),
         )
-        # mail.send_message — async → исполняем синхронно в Celery
-        async_to_sync(mail.send_message)(message)
-        logger.info("Email sent to %s", recipients)
-        return {"ok": True}
-    except Exception as e:
-        logger.exception("Email sending failed: %s", e)
+    if result["refused"]:
+        logger.warning("Recipients refused by SMTP server: %s", result["refused"])
+    logger.info("Email sent to %d recipients", len(result["sent"]))
+    return {"ok": True, "sent": len(result["sent"]), "refused": result["refused"]}
+
+# ETL
+#
+# Задачи обхода (etl_simpler_grants / etl_intl_scholarships, в т.ч. шарды) идут в очередь ETL_QUEUE.
+# Дочерние процессы воркера prefork — daemon, пул процессов для парсинга HTML (app.parsers.parse_executor)
+# в них не поднимается, и парсинг уходит в поток под GIL. Чтобы парсинг шёл в пуле процессов,
+# очередь etl обслуживают воркеры с --pool solo (параллелизм — числом таких воркеров, размер пула
+# на воркер — CRAWLER_PARSE_WORKERS):
+#     celery -A app.celery_tasks worker -Q etl --pool solo -n etl1@%h
+#     celery -A app.celery_tasks worker -Q celery          # остальное: почта, координатор, рекомендации
+# Пул solo не прерывает задачу по soft_time_limit/time_limit; от зависшего прогона страхует TTL
+# блокировки источника. Если лимиты важнее — тот же -Q etl на prefork, парсинг тогда в потоке.
+ETL_QUEUE = "etl"
+
+# Краулы идут минутами; soft-лимит даёт импортёру шанс закоммитить текущую пачку
+ETL_SOFT_TIME_LIMIT = 60 * 60
+ETL_TIME_LIMIT = ETL_SOFT_TIME_LIMIT + 5 * 60
+
+# Блокировка «один прогон на источник». Одиночный прогон держит её ETL_LOCK_TTL;
+# шардированный — с запасом на худший случай, когда все шарды идут друг за другом (см. etl_crawl_source),
+# и каждый шард при старте продлевает её ещё на ETL_LOCK_TTL.
+ETL_LOCK_PREFIX = "etl:"
+ETL_LOCK_TTL = 2 * ETL_TIME_LIMIT
+
+SOURCE_SIMPLER_GRANTS = "simpler.grants.gov"
+SOURCE_INTL_SCHOLARSHIPS = "internationalscholarships.com"
+
+celery_app.conf.task_routes = {
+    f"{__name__}.etl_simpler_grants": {"queue": ETL_QUEUE},
+    f"{__name__}.etl_intl_scholarships": {"queue": ETL_QUEUE},
+}
+
+
+def _progress_reporter(task):
+    """Снимок счётчиков -> meta задачи (state=PROGRESS), его и отдаёт GET /etl/jobs/{id}."""
+    def report(counters: dict) -> None:
+        task.update_state(state="PROGRESS", meta=counters)
+    return report
+
+
+async def _run_etl(importer, task, **kwargs):
+    """
+    Импортёр в собственной сессии (без FastAPI Depends).
+    asyncio.run создаёт новый loop на каждую задачу, а соединения пула привязаны к loop,
+    поэтому в конце движок закрываем — следующая задача откроет свежие соединения.
+    """
+    from app.db.main import dispose_engine
+    from app.parsers.progress import EtlProgress
+
+    progress = EtlProgress(on_change=_progress_reporter(task))
+    try:
+        async with AsyncSessionLocal() as session:
+            result = await importer(session=session, progress=progress, **kwargs)
+    finally:
+        await dispose_engine()
+    return result, progress.as_dict()
+
+
+def _incremental_kwargs(incremental: bool, stop_after_known: Optional[int]) -> dict:
+    # порог по умолчанию держит сам импортёр
+    kwargs = {"incremental": incremental}
+    if stop_after_known is not None:
+        kwargs["stop_after_known"] = stop_after_known
+    return kwargs
+
+
+def _acquire_source_lock(source: str, ttl: int = ETL_LOCK_TTL) -> Optional[str]:
+    from app.db.redis import acquire_lock
+    return acquire_lock(ETL_LOCK_PREFIX + source, ttl=ttl)
+
+
+def _extend_source_lock(source: str, token: str) -> None:
+    from app.db.redis import extend_lock
+    if not extend_lock(ETL_LOCK_PREFIX + source, token, ttl=ETL_LOCK_TTL):
+        logger.warning("ETL %s lock expired before the shard started", source)
+
+
+def _release_source_lock(source: str, token: str) -> None:
+    from app.db.redis import release_lock
+    release_lock(ETL_LOCK_PREFIX + source, token)
+
+
+@contextmanager
+def _source_lock(source: str, lock_token: Optional[str]):
+    """
+    Одиночный прогон источника: держим блокировку на время задачи.
+    Шард шардированного прогона получает lock_token от координатора — блокировка уже взята им.
+    Отдаёт True, если можно работать, и False, если источник уже обходит другой прогон.
+    """
+    if lock_token is not None:
+        # шард мог долго ждать в очереди — продлеваем блокировку координатора на время своей работы
+        _extend_source_lock(source, lock_token)
+        yield True
+        return
+    token = _acquire_source_lock(source)
+    if token is None:
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        _release_source_lock(source, token)
+
+
+def _locked_result(source: str) -> dict:
+    logger.warning("ETL %s is already running, skipping", source)
+    return {"source": source, "skipped": "locked"}
+
+
+def _upsert_summary(stats: dict, counters: dict) -> dict:
+    return {
+        "progress": counters,
+        "inserted": len(stats["inserted"]),
+        "updated": len(stats["updated"]),
+        "unchanged": stats["unchanged"],
+        "ids": stats["inserted"] + stats["updated"],
+    }
+
+
+@celery_app.task(bind=True, track_started=True, soft_time_limit=ETL_SOFT_TIME_LIMIT, time_limit=ETL_TIME_LIMIT)
+def etl_simpler_grants(
+    self,
+    pages: int = 1,
+    start_page: int = 1,
+    throttle_sec: float = 0.0,
+    incremental: bool = False,
+    stop_after_known: Optional[int] = None,
+    lock_token: Optional[str] = None,
+):
+    """Импорт грантов с Simpler.Grants.gov в фоне (целиком или шард страниц start_page..start_page+pages-1)."""
+    from app.parsers.grant.simpler_grants import fetch_grants_from_simpler
+
+    with _source_lock(SOURCE_SIMPLER_GRANTS, lock_token) as acquired:
+        if not acquired:
+            return _locked_result(SOURCE_SIMPLER_GRANTS)
+        stats, counters = asyncio.run(_run_etl(
+            fetch_grants_from_simpler, self,
+            pages=pages, start_page=start_page, throttle_sec=throttle_sec,
+            **_incremental_kwargs(incremental, stop_after_known),
+        ))
+    logger.info("ETL simpler.grants.gov pages %d..%d done: %s", start_page, start_page + pages - 1, counters)
+    return {"source": SOURCE_SIMPLER_GRANTS, **_upsert_summary(stats, counters)}
+
+
+@celery_app.task(bind=True, track_started=True, soft_time_limit=ETL_SOFT_TIME_LIMIT, time_limit=ETL_TIME_LIMIT)
+def etl_intl_scholarships(
+    self,
+    details: int = 128,
+    max_items: int = 20,
+    max_pages: int = 1,
+    per_page: int = 40,
+    dry_run: bool = False,
+    skip_past_years: bool = True,
+    incremental: bool = False,
+    stop_after_known: Optional[int] = None,
+    start_page: int = 1,
+    lock_token: Optional[str] = None,
+):
+    """Импорт стипендий с internationalscholarships.com в фоне (целиком или шард страниц листинга)."""
+    from app.parsers.scholarship.internationalscholarships import (
+        fetch_scholarships_from_internationalscholarships,
+    )
+
+    with _source_lock(SOURCE_INTL_SCHOLARSHIPS, lock_token) as acquired:
+        if not acquired:
+            return _locked_result(SOURCE_INTL_SCHOLARSHIPS)
+        result, counters = asyncio.run(_run_etl(
+            fetch_scholarships_from_internationalscholarships, self,
+            details=details, max_items=max_items, max_pages=max_pages, per_page=per_page,
+            dry_run=dry_run, skip_past_years=skip_past_years, start_page=start_page,
+            **_incremental_kwargs(incremental, stop_after_known),
+        ))
+    logger.info("ETL internationalscholarships.com from page %d done: %s", start_page, counters)
+    if dry_run:
+        return {"source": SOURCE_INTL_SCHOLARSHIPS, "dry_run": True, "items": result, "count": len(result), "progress": counters}
+    return {"source": SOURCE_INTL_SCHOLARSHIPS, **_upsert_summary(result, counters)}
+
+
+# Шардированные прогоны: координатор берёт блокировку источника, режет обход на диапазоны страниц
+# и раздаёт их воркерам chord'ом; колбэк складывает статистику шардов и снимает блокировку.
+
+def _simpler_grants_shard(start_page: int, pages: int, **options):
+    return etl_simpler_grants.s(start_page=start_page, pages=pages, **options)
+
+
+def _intl_scholarships_shard(start_page: int, pages: int, per_page: int = 40, **options):
+    return etl_intl_scholarships.s(
+        start_page=start_page, max_pages=pages, per_page=per_page, max_items=pages * per_page, **options
+    )
+
+
+ETL_SHARD_BUILDERS = {
+    SOURCE_SIMPLER_GRANTS: _simpler_grants_shard,
+    SOURCE_INTL_SCHOLARSHIPS: _intl_scholarships_shard,
+}
+
+
+@celery_app.task(bind=True)
+def etl_crawl_source(self, source: str, pages: int, shard_pages: int = 5, **options):
+    """
+    Шардированный обход источника: страницы 1..pages режутся по shard_pages и идут параллельно на воркеры.
+    Инкрементальный обход (incremental=True) не шардируется: одна цепочка идёт по листингу от первой страницы,
+    пока её не остановит водяной знак, — шарды со своих start_page качали бы страницы и за ним.
+    Если источник уже обходится (блокировка занята) — прогон пропускается.
+    """
+    build_shard = ETL_SHARD_BUILDERS[source]
+    if options.get("incremental"):
+        shard_pages = pages
+    starts = range(1, pages + 1, shard_pages)
+    # блокировка должна пережить все шарды, даже если свободный воркер один и они идут по очереди
+    token = _acquire_source_lock(source, ttl=max(ETL_LOCK_TTL, (len(starts) + 1) * ETL_TIME_LIMIT))
+    if token is None:
+        return _locked_result(source)
+
+    try:
+        shards = [
+            build_shard(start, min(shard_pages, pages - start + 1), lock_token=token, **options)
+            for start in starts
+        ]
+        callback = etl_aggregate.s(source=source, lock_token=token).on_error(
+            etl_release_lock.si(source=source, lock_token=token)
+        )
+        result = chord(shards)(callback)
+    except Exception:
+        _release_source_lock(source, token)
         raise
+
+    logger.info("ETL %s: %d shards of %d pages scheduled", source, len(shards), shard_pages)
+    return {"source": source, "shards": len(shards), "aggregate_id": result.id}
+
+
+@celery_app.task
+def etl_release_lock(source: str, lock_token: str):
+    """errback chord'а: шард упал, колбэк не вызовется — блокировку снимаем здесь."""
+    _release_source_lock(source, lock_token)
+
+
+@celery_app.task
+def etl_aggregate(results: list, source: str, lock_token: str):
+    """Колбэк chord: суммирует счётчики шардов и снимает блокировку источника."""
+    try:
+        total = {"source": source, "shards": len(results), "progress": {}, "inserted": 0, "updated": 0, "unchanged": 0, "ids": []}
+        for part in results:
+            for key in ("inserted", "updated", "unchanged"):
+                total[key] += part.get(key, 0)
+            total["ids"].extend(part.get("ids", []))
+            for key, value in part.get("progress", {}).items():
+                total["progress"][key] = total["progress"].get(key, 0) + value
+        logger.info("ETL %s done: %s", source, total["progress"])
+        return total
+    finally:
+        _release_source_lock(source, lock_token)
+
+
+# Рекомендации
+
+RECOMMEND_SOFT_TIME_LIMIT = 2 * 60 * 60
+RECOMMEND_TIME_LIMIT = RECOMMEND_SOFT_TIME_LIMIT + 10 * 60
+
+
+@celery_app.task(bind=True, track_started=True, soft_time_limit=RECOMMEND_SOFT_TIME_LIMIT, time_limit=RECOMMEND_TIME_LIMIT)
+def recommend_tfidf(self, top_k: int = 20, chunk_size: int = 256, max_features: int = 100_000, dry_run: bool = False):
+    """Пересчёт content-based рекомендаций (TF-IDF) для всех пользователей с взаимодействиями."""
+    from dataclasses import asdict
+    from app.ml.tfidf_recommender import SOURCE_MODEL, generate_recommendations
+
+    async def run():
+        from app.db.main import dispose_engine
+        try:
+            async with AsyncSessionLocal() as session:
+                return await generate_recommendations(
+                    session, top_k=top_k, chunk_size=chunk_size, max_features=max_features, dry_run=dry_run,
+                )
+        finally:
+            await dispose_engine()
+
+    stats = asyncio.run(run())
+    return {"source_model": SOURCE_MODEL, "dry_run": dry_run, **asdict(stats)}
+
+
+@celery_app.task(bind=True, track_started=True, soft_time_limit=RECOMMEND_SOFT_TIME_LIMIT, time_limit=RECOMMEND_TIME_LIMIT)
+def build_vector_index(self, dim: int = 128, ivf: Optional[bool] = None):
+    """Пересборка векторного индекса «похожих» (версия пишется рядом, current переключается атомарно)."""
+    from app.ml.vector_index import build_index
+
+    async def run():
+        from app.db.main import dispose_engine
+        try:
+            async with AsyncSessionLocal() as session:
+                return await build_index(session, dim=dim, ivf=ivf)
+        finally:
+            await dispose_engine()
+
+    return asyncio.run(run())
+
+
+# Расписание (celery beat): ежедневный инкрементальный обход «головы» (одной цепочкой, pages — лишь потолок)
+# и еженедельный полный, шардированный
+celery_app.conf.beat_schedule = {
+    "etl-simpler-grants-daily": {
+        "task": etl_crawl_source.name,
+        "schedule": crontab(hour=3, minute=0),
+        "kwargs": {"source": SOURCE_SIMPLER_GRANTS, "pages": 10, "incremental": True},
+    },
+    "etl-simpler-grants-weekly": {
+        "task": etl_crawl_source.name,
+        "schedule": crontab(hour=2, minute=0, day_of_week="sun"),
+        "kwargs": {"source": SOURCE_SIMPLER_GRANTS, "pages": 25, "shard_pages": 5},
+    },
+    "etl-intl-scholarships-daily": {
+        "task": etl_crawl_source.name,
+        "schedule": crontab(hour=4, minute=0),
+        "kwargs": {"source": SOURCE_INTL_SCHOLARSHIPS, "pages": 10, "incremental": True},
+    },
+    "etl-intl-scholarships-weekly": {
+        "task": etl_crawl_source.name,
+        "schedule": crontab(hour=5, minute=0, day_of_week="sun"),
+        "kwargs": {"source": SOURCE_INTL_SCHOLARSHIPS, "pages": 25, "shard_pages": 5},
+    },
+    # после ночных обходов каталога
+    "recommend-tfidf-daily": {
+        "task": recommend_tfidf.name,
+        "schedule": crontab(hour=6, minute=30),
+    },
+    "vector-index-daily": {
+        "task": build_vector_index.name,
+        "schedule": crontab(hour=6, minute=0),
+    },
+}
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -21,6 +23,16 @@ class Settings(BaseSettings):
 
     DOMAIN: str
 
+    # Дисковый кеш ответов краулеров (ETag/Last-Modified + хеш тела)
+    CRAWLER_CACHE_DIR: str = ".cache/crawler"
+    # Парсинг HTML краулеров: бэкенд BeautifulSoup ("html.parser" | "lxml")
+    # и размер пула процессов (None — по числу ядер, 0 — без пула, в потоке)
+    CRAWLER_HTML_PARSER: Literal["html.parser", "lxml"] = "html.parser"
+    CRAWLER_PARSE_WORKERS: Optional[int] = None
+
+    # Векторный индекс «похожих» (app/ml/vector_index.py): версии + симлинк current
+    VECTOR_INDEX_DIR: str = ".cache/vector_index"
+
     model_config = SettingsConfigDict(
         env_file = ".env",
         extra = "ignore"
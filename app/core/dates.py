@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import re
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Общая нормализация дат для парсеров и сервисов.
+# Одна скомпилированная грамматика вместо цепочки регулярок / перебора strptime;
+# разбор строки кешируется (сроки вида 'October 15, 2025' повторяются сотнями),
+# а год для дат без года подставляется уже после кеша — относительно текущего момента.
+
+_MONTH = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+)
+_MONTHS = {
+    name: i
+    for i, name in enumerate(("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), 1)
+}
+
+# Грамматика: альтернативы в порядке приоритета на одной позиции; имя группы = <вид>_<поле>.
+# Два яруса одной грамматики: дата с годом важнее даты без года, даже если та стоит раньше в строке.
+_DATED = rf"""
+    \b(?:
+        (?P<mdy_m>{_MONTH})\s+(?P<mdy_d>\d{{1,2}})(?:st|nd|rd|th)?,?\s+(?P<mdy_y>\d{{4}})   # October 15, 2025
+      | (?P<dmy_d>\d{{1,2}})\s+(?P<dmy_m>{_MONTH}),?\s+(?P<dmy_y>\d{{4}})                  # 15 October 2025
+      | (?P<iso_y>\d{{4}})-(?P<iso_m>\d{{1,2}})-(?P<iso_d>\d{{1,2}})                         # 2025-10-15
+      | (?P<num_m>\d{{1,2}})/(?P<num_d>\d{{1,2}})/(?P<num_y>\d{{4}})                         # 10/15/2025
+    )\b
+"""
+_YEARLESS = rf"""
+    \b(?:
+        (?P<md_m>{_MONTH})\s+(?P<md_d>\d{{1,2}})(?:st|nd|rd|th)?                             # Oct 15
+      | (?P<dm_d>\d{{1,2}})\s+(?P<dm_m>{_MONTH})                                             # 15 Oct
+    )\b
+"""
+_GRAMMAR = tuple(re.compile(p, re.IGNORECASE | re.VERBOSE) for p in (_DATED, _YEARLESS))
+_UNDATED_RE = re.compile(r"\b(varies|open|ongoing|rolling|until\s+filled)\b", re.IGNORECASE)
+_DEADLINE_PREFIX_RE = re.compile(r"(?i)^.*deadline:\s*")
+
+# (год или None, месяц, день)
+_Parts = Tuple[Optional[int], int, int]
+
+CACHE_SIZE = 4096
+
+
+def _month(text: str) -> int:
+    return _MONTHS[text[:3].lower()]
+
+
+def _parts(m: re.Match) -> _Parts:
+    kind = m.lastgroup.split("_", 1)[0]
+    g = m.group
+    if kind == "mdy":
+        return int(g("mdy_y")), _month(g("mdy_m")), int(g("mdy_d"))
+    if kind == "dmy":
+        return int(g("dmy_y")), _month(g("dmy_m")), int(g("dmy_d"))
+    if kind == "iso":
+        return int(g("iso_y")), int(g("iso_m")), int(g("iso_d"))
+    if kind == "num":
+        return int(g("num_y")), int(g("num_m")), int(g("num_d"))
+    if kind == "md":
+        return None, _month(g("md_m")), int(g("md_d"))
+    return None, _month(g("dm_m")), int(g("dm_d"))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _tokenize(raw: str, whole: bool) -> Optional[_Parts]:
+    txt = raw.strip()
+    if whole:
+        m = _GRAMMAR[0].fullmatch(txt) or _GRAMMAR[1].fullmatch(txt)
+        return _parts(m) if m else None
+    if not txt or _UNDATED_RE.search(txt):
+        return None
+    # 'Deadline: ...' — дата ищется после последнего такого префикса
+    txt = _DEADLINE_PREFIX_RE.sub("", txt)
+    for grammar in _GRAMMAR:
+        m = grammar.search(txt)
+        if m:
+            return _parts(m)
+    return None
+
+
+def _resolve(parts: Optional[_Parts], now: datetime) -> Optional[datetime]:
+    if parts is None:
+        return None
+    year, month, day = parts
+    try:
+        if year is not None:
+            return datetime(year, month, day)
+        # без года — ближайшая будущая дата (сегодняшняя уже считается прошедшей)
+        candidate = datetime(now.year, month, day)
+        if candidate < now:
+            candidate = datetime(now.year + 1, month, day)
+        return candidate
+    except ValueError:
+        return None
+
+
+def parse_date(value: Optional[str], now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Первая дата в произвольной строке:
+      - 'October 15, 2025' / 'Sep 9, 2025' / '15 October 2025'
+      - '12/31/2025' (MM/DD/YYYY), '2025-12-31'
+      - 'Oct 31' / '31 Oct' (без года → ближайшее будущее относительно now)
+      - 'Deadline: ...' — префикс отбрасывается
+      - 'Varies/Open/Rolling/Until filled', мусор, несуществующая дата -> None
+    """
+    if not value:
+        return None
+    return _resolve(_tokenize(value, False), now or datetime.now())
+
+
+def parse_dates(values: Iterable[Optional[str]], now: Optional[datetime] = None) -> List[Optional[datetime]]:
+    """parse_date для целой страницы строк: одно now на всех, повторы разбираются один раз."""
+    now = now or datetime.now()
+    seen: Dict[Optional[str], Optional[datetime]] = {}
+    out: List[Optional[datetime]] = []
+    for value in values:
+        if value not in seen:
+            seen[value] = _resolve(_tokenize(value, False), now) if value else None
+        out.append(seen[value])
+    return out
+
+
+def to_datetime(value: Optional[str | date | datetime]) -> Optional[datetime]:
+    """
+    Строгое приведение к naive datetime (поля схем, параметры фильтров).
+    Строка должна целиком быть датой одного из форматов parse_date ('YYYY-MM-DD' и т.п.), иначе ValueError.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    parsed = _resolve(_tokenize(str(value), True), datetime.now())
+    if parsed is None:
+        raise ValueError(f"Unrecognized date: {value!r}")
+    return parsed
+
+
+def cache_info():
+    return _tokenize.cache_info()
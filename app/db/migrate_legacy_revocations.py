@@ -0,0 +1,73 @@
+"""
+Разовый перенос отзывов старого формата в sorted set REVOKED_JTI_KEY.
+
+До sorted set отзыв хранился отдельным ключом SET <jti> "" EX JTI_EXPIRY. Воркеры такие ключи больше
+не читают, поэтому скрипт запускается шагом деплоя — до старта новых API-воркеров:
+    python -m app.db.migrate_legacy_revocations
+    python -m app.db.migrate_legacy_revocations --dry-run
+
+Переносятся только ключи, похожие на старый отзыв: имя — UUID, строковое значение "" и TTL не больше
+JTI_EXPIRY. Прочие ключи общего Redis не трогаются. Повторный запуск безопасен.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import re
+import time
+from typing import List, Optional
+
+from app.db.redis import JTI_EXPIRY, REVOKED_JTI_KEY, sync_redis
+
+logger = logging.getLogger(__name__)
+
+# SCAN-шаблон только сужает выборку; точную форму имени проверяет LEGACY_JTI_RE
+LEGACY_JTI_PATTERN = "????????-????-????-????-????????????"
+LEGACY_JTI_RE = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def _is_legacy_revocation(key: str) -> Optional[int]:
+    """TTL ключа, если это отзыв старого формата, иначе None."""
+    if not LEGACY_JTI_RE.match(key):
+        return None
+    if sync_redis.type(key) != "string" or sync_redis.get(key) != "":
+        return None
+    ttl = sync_redis.ttl(key)
+    if not ttl or ttl <= 0 or ttl > JTI_EXPIRY:
+        return None
+    return ttl
+
+
+def migrate(dry_run: bool = False, count: int = 1000) -> dict:
+    stats = {"scanned": 0, "migrated": 0}
+    cursor = 0
+    while True:
+        cursor, keys = sync_redis.scan(cursor, match=LEGACY_JTI_PATTERN, count=count)
+        for key in keys:
+            stats["scanned"] += 1
+            ttl = _is_legacy_revocation(key)
+            if ttl is None:
+                continue
+            stats["migrated"] += 1
+            if dry_run:
+                continue
+            # сначала ZADD, потом DEL: отзыв ни на миг не пропадает
+            sync_redis.zadd(REVOKED_JTI_KEY, {key: time.time() + ttl})
+            sync_redis.delete(key)
+        if str(cursor) == "0":
+            break
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="только посчитать ключи, ничего не менять")
+    parser.add_argument("--count", type=int, default=1000, help="COUNT для SCAN")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    print(migrate(dry_run=args.dry_run, count=args.count))
+
+
+if __name__ == "__main__":
+    main()
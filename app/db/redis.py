@@ -1,19 +1,168 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, Optional
+
+from upstash_redis import Redis as SyncRedis
 from upstash_redis.asyncio import Redis
 from app.core.config import settings
 
 token_blocklist = Redis(
-    url=settings.UPSTASH_REDIS_REST_URL, 
+    url=settings.UPSTASH_REDIS_REST_URL,
+    token=settings.UPSTASH_REDIS_REST_TOKEN
+)
+
+# Синхронный клиент для Celery-задач (распределённые блокировки)
+sync_redis = SyncRedis(
+    url=settings.UPSTASH_REDIS_REST_URL,
     token=settings.UPSTASH_REDIS_REST_TOKEN
 )
 
 JTI_EXPIRY = 3600
 
-async def add_jti_to_blocklist(jti: str) -> None:
-    await token_blocklist.set(jti, "", ex=JTI_EXPIRY)
+# Отозванные jti живут в sorted set: member = jti, score = exp токена (unix ts).
+# Так каждый воркер одним ZRANGEBYSCORE забирает все ещё действующие отзывы.
+REVOKED_JTI_KEY = "revoked_jti"
+
+# Как часто воркер пересинхронизирует локальную копию блоклиста (сек).
+# Это же — максимальная задержка, с которой logout в одном воркере виден в остальных.
+REVOCATION_SYNC_INTERVAL = 5.0
+
+# Сколько локальная копия считается достоверной после последней УСПЕШНОЙ синхронизации (сек).
+# Дольше (или ни одной успешной с запуска процесса) — проверяем отзыв напрямую в Redis.
+REVOCATION_MAX_STALENESS = 60.0
+
+
+class RevocationUnavailable(Exception):
+    """Локальная копия блоклиста недостоверна, а Redis не отвечает — отзыв токена проверить нельзя."""
+
+
+class RevocationCache:
+    """
+    In-process копия блоклиста (jti -> exp).
+    Проверка токена — поиск в dict; в сеть ходим не чаще раза в sync_interval на процесс.
+    """
+
+    def __init__(self, sync_interval: float = REVOCATION_SYNC_INTERVAL) -> None:
+        self.sync_interval = sync_interval
+        self._revoked: Dict[str, float] = {}
+        self._synced_at = 0.0
+        self._last_success: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def add(self, jti: str, exp: float) -> None:
+        self._revoked[jti] = exp
+
+    def contains(self, jti: str) -> bool:
+        exp = self._revoked.get(jti)
+        if exp is None:
+            return False
+        if exp <= time.time():
+            # токен и так истёк — запись больше не нужна
+            self._revoked.pop(jti, None)
+            return False
+        return True
+
+    def is_stale(self) -> bool:
+        return time.monotonic() - self._synced_at >= self.sync_interval
+
+    def is_trusted(self) -> bool:
+        """Была успешная синхронизация, и не дольше REVOCATION_MAX_STALENESS назад."""
+        return self._last_success is not None and time.monotonic() - self._last_success <= REVOCATION_MAX_STALENESS
+
+    async def sync(self, force: bool = False) -> None:
+        if not force and not self.is_stale():
+            return
+        async with self._lock:
+            # пока ждали lock, другой запрос мог уже синхронизировать
+            if not force and not self.is_stale():
+                return
+            now = time.time()
+            # следующая попытка — не раньше чем через sync_interval, даже если Redis недоступен;
+            # достоверность копии отдельно отслеживает _last_success
+            self._synced_at = time.monotonic()
+            try:
+                entries = await token_blocklist.zrangebyscore(REVOKED_JTI_KEY, now, "+inf", withscores=True)
+                # чистим истёкшие отзывы, чтобы множество не росло бесконечно
+                await token_blocklist.zremrangebyscore(REVOKED_JTI_KEY, "-inf", now)
+            except Exception as e:
+                logging.error("Revocation list sync failed: %s", e)
+                return
+            # отзывы, сделанные в этом процессе после запроса, не теряем
+            revoked = {jti: float(exp) for jti, exp in entries}
+            for jti, exp in self._revoked.items():
+                revoked.setdefault(jti, exp)
+            self._revoked = revoked
+            self._last_success = time.monotonic()
+
+
+revocation_cache = RevocationCache()
+
+
+async def add_jti_to_blocklist(jti: str, exp: Optional[float] = None) -> None:
+    """
+    Отзывает токен до его exp (если exp неизвестен — на JTI_EXPIRY секунд).
+    Локальный кеш обновляется сразу, остальные воркеры подхватят отзыв при ближайшей синхронизации.
+    """
+    if exp is None:
+        exp = time.time() + JTI_EXPIRY
+    await token_blocklist.zadd(REVOKED_JTI_KEY, {jti: float(exp)})
+    revocation_cache.add(jti, float(exp))
 
 async def token_in_blocklist(jti: str) -> bool:
-    value = await token_blocklist.get(jti)
-    return value is not None
+    """
+    Отозван ли jti. Пока локальная копия достоверна — поиск в dict; иначе (Redis лежал с запуска
+    процесса или давно) — ZSCORE напрямую. Не ответил и он — RevocationUnavailable: молча пропускать
+    возможно отозванный токен нельзя.
+    """
+    await revocation_cache.sync()
+    if revocation_cache.contains(jti):
+        return True
+    if revocation_cache.is_trusted():
+        return False
+    try:
+        exp = await token_blocklist.zscore(REVOKED_JTI_KEY, jti)
+    except Exception as e:
+        logging.error("Revocation check failed: %s", e)
+        raise RevocationUnavailable() from e
+    return exp is not None and float(exp) > time.time()
+
+# Распределённые блокировки: SET key token NX EX ttl; снимает только владелец токена.
+# TTL — страховка: упавший воркер не держит блокировку вечно.
+LOCK_PREFIX = "lock:"
+
+_RELEASE_LOCK_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+def acquire_lock(name: str, ttl: int) -> Optional[str]:
+    """Возвращает токен владельца или None, если блокировку уже держит кто-то другой."""
+    token = uuid.uuid4().hex
+    if sync_redis.set(LOCK_PREFIX + name, token, nx=True, ex=ttl):
+        return token
+    return None
+
+def release_lock(name: str, token: str) -> bool:
+    return bool(sync_redis.eval(_RELEASE_LOCK_LUA, keys=[LOCK_PREFIX + name], args=[token]))
+
+
+_EXTEND_LOCK_LUA = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    if redis.call('ttl', KEYS[1]) < tonumber(ARGV[2]) then
+        redis.call('expire', KEYS[1], ARGV[2])
+    end
+    return 1
+end
+return 0
+"""
+
+def extend_lock(name: str, token: str, ttl: int) -> bool:
+    """Продлевает блокировку владельца до ttl секунд (если осталось меньше); False — блокировка уже не наша."""
+    return bool(sync_redis.eval(_EXTEND_LOCK_LUA, keys=[LOCK_PREFIX + name], args=[token, str(ttl)]))
 
 
 # Admin
@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response, status
+
+# Cache-Control по маршрутам. Гранты отдаются только авторизованным — их кешировать может лишь клиент.
+CACHE_POLICIES = {
+    "grants:list": "private, no-cache",
+    "grants:item": "private, max-age=60",
+    "scholarships:list": "public, max-age=60, stale-while-revalidate=300",
+    "scholarships:item": "public, max-age=300",
+    "internships:list": "public, max-age=60, stale-while-revalidate=300",
+    "internships:item": "public, max-age=300",
+}
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # в БД TIMESTAMP без таймзоны — считаем его UTC; HTTP-даты с точностью до секунды
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def query_fingerprint(request: Request) -> str:
+    """Отпечаток запроса: путь + отсортированные query-параметры (фильтры, сортировка, страница)."""
+    params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    return hashlib.sha1(f"{request.url.path}?{params}".encode()).hexdigest()
+
+
+def list_etag(request: Request, modified_at: Optional[datetime], version: int) -> str:
+    # version таблицы (table_versions) меняется на любую вставку, правку и удаление
+    stamp = modified_at.isoformat() if modified_at else "-"
+    digest = hashlib.sha1(f"{query_fingerprint(request)}|{stamp}|{version}".encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def item_etag(kind: str, item_id: int, updated_at: Optional[datetime]) -> str:
+    stamp = updated_at.isoformat() if updated_at else "-"
+    digest = hashlib.sha1(f"{kind}|{item_id}|{stamp}".encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    RFC 9110: If-None-Match важнее If-Modified-Since; ETag сравниваем слабо (без W/).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        wanted = etag.removeprefix("W/")
+        return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+    if_modified_since = request.headers.get("if-modified-since")
+    last_modified = _as_utc(last_modified)
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return last_modified <= _as_utc(since)
+    return False
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime], policy: str) -> None:
+    response.headers["ETag"] = etag
+    last_modified = _as_utc(last_modified)
+    if last_modified is not None:
+        response.headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    response.headers["Cache-Control"] = CACHE_POLICIES[policy]
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime], policy: str) -> Response:
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_validators(response, etag, last_modified, policy)
+    return response
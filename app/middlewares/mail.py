@@ -1,3 +1,12 @@
+import os
+import smtplib
+import ssl
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Dict, List, Optional
+
 from fastapi_mail import FastMail, ConnectionConfig, MessageSchema, MessageType
 from app.core.config import settings
 from pathlib import Path
@@ -32,4 +41,151 @@ def create_message(recipients: list[str], subject: str, body: str):
         subtype=MessageType.html
     )
 
-    return message
\ No newline at end of file
+    return message
+
+
+class MailDeliveryError(Exception):
+    """SMTP недоступен даже после переподключения; remaining — получатели, которым письмо не ушло."""
+
+    def __init__(self, remaining: List[str], cause: Exception):
+        super().__init__(f"{len(remaining)} recipients not delivered: {cause}")
+        self.remaining = remaining
+
+
+class PooledMailer:
+    """
+    Постоянное SMTP-соединение на процесс воркера Celery: подключение, STARTTLS и логин — один раз,
+    дальше письма идут подряд по той же сессии. Соединение переоткрывается, если сервер его закрыл,
+    оно простояло дольше IDLE_CHECK_SEC и не ответило на NOOP, или по нему ушло MAX_MESSAGES_PER_CONNECTION писем
+    (лимит сессии у многих провайдеров).
+    """
+
+    IDLE_CHECK_SEC = 30
+    MAX_MESSAGES_PER_CONNECTION = 100
+
+    def __init__(self, config: ConnectionConfig = mail_config):
+        self.config = config
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._pid: Optional[int] = None
+        self._sent_on_connection = 0
+        self._last_used = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        c = self.config
+        context = ssl.create_default_context()
+        if not c.VALIDATE_CERTS:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        if c.MAIL_SSL_TLS:
+            smtp = smtplib.SMTP_SSL(
+                c.MAIL_SERVER, c.MAIL_PORT, local_hostname=c.LOCAL_HOSTNAME, timeout=c.TIMEOUT, context=context
+            )
+        else:
+            smtp = smtplib.SMTP(c.MAIL_SERVER, c.MAIL_PORT, local_hostname=c.LOCAL_HOSTNAME, timeout=c.TIMEOUT)
+            if c.MAIL_STARTTLS:
+                smtp.starttls(context=context)
+        if c.USE_CREDENTIALS:
+            smtp.login(c.MAIL_USERNAME, c.MAIL_PASSWORD.get_secret_value())
+        self._pid = os.getpid()
+        self._sent_on_connection = 0
+        return smtp
+
+    def _session(self) -> smtplib.SMTP:
+        if self._smtp is not None and self._pid != os.getpid():
+            # соединение унаследовано от родителя через fork — сокет общий, закрывать по протоколу нельзя
+            self._smtp = None
+        if self._smtp is not None and self._sent_on_connection >= self.MAX_MESSAGES_PER_CONNECTION:
+            self.close()
+        if self._smtp is not None and time.monotonic() - self._last_used > self.IDLE_CHECK_SEC:
+            try:
+                if self._smtp.noop()[0] != 250:
+                    self.close()
+            except (smtplib.SMTPException, OSError):
+                self.close()
+        if self._smtp is None:
+            self._smtp = self._connect()
+        return self._smtp
+
+    def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is not None:
+            try:
+                smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                smtp.close()
+
+    def build_message(self, recipient: str, subject: str, html: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = formataddr((self.config.MAIL_FROM_NAME or "", self.config.MAIL_FROM))
+        message["To"] = recipient
+        message["Subject"] = subject
+        message["Message-ID"] = make_msgid()
+        message.set_content(html, subtype="html")
+        return message
+
+    def _send(self, message: EmailMessage) -> None:
+        self._session().send_message(message)
+        self._sent_on_connection += 1
+        self._last_used = time.monotonic()
+
+    @staticmethod
+    def _is_refused(error: Exception) -> bool:
+        # 5xx на MAIL FROM / RCPT TO / DATA — отказ в этом письме, повтор не поможет; сессия после RSET жива.
+        # 535 при логине тоже 5xx, но это отказ всей сессии, а не письма
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return True
+        return (
+            isinstance(error, smtplib.SMTPResponseException)
+            and not isinstance(error, smtplib.SMTPAuthenticationError)
+            and error.smtp_code >= 500
+        )
+
+    def _deliver(self, message: EmailMessage) -> None:
+        try:
+            self._send(message)
+        except (smtplib.SMTPException, OSError) as e:
+            if self._is_refused(e):
+                raise
+            # сервер закрыл простаивавшую сессию / временный сбой — одна попытка по свежему соединению
+            self.close()
+            self._send(message)
+
+    def send_batch(self, recipients: List[str], subject: str, html: str) -> Dict[str, List[str]]:
+        """
+        По отдельному письму каждому получателю (адреса не видят друг друга) по одной SMTP-сессии.
+        Постоянный отказ (5xx на отправителя, адрес или само письмо) — адрес попадает в refused, остальные уходят.
+        Обрыв/временная ошибка — одно переподключение; не помогло — MailDeliveryError с неотправленным хвостом.
+        """
+        sent: List[str] = []
+        refused: List[str] = []
+        with self._lock:
+            for i, recipient in enumerate(recipients):
+                message = self.build_message(recipient, subject, html)
+                try:
+                    self._deliver(message)
+                except (smtplib.SMTPException, OSError) as e:
+                    if self._is_refused(e):
+                        refused.append(recipient)
+                        continue
+                    self.close()
+                    raise MailDeliveryError(recipients[i:], e) from e
+                else:
+                    sent.append(recipient)
+        return {"sent": sent, "refused": refused}
+
+
+_mailer: Optional[PooledMailer] = None
+
+
+def get_mailer() -> PooledMailer:
+    """PooledMailer процесса (соединение открывается лениво, при первой отправке)."""
+    global _mailer
+    if _mailer is None:
+        _mailer = PooledMailer()
+    return _mailer
+
+
+def close_mailer() -> None:
+    if _mailer is not None:
+        _mailer.close()
@@ -0,0 +1,145 @@
+"""
+Почти-дубликаты между источниками: MinHash-сигнатура по шинглам нормализованного текста и LSH-корзины.
+
+Одна и та же стипендия/грант приходит под разными URL (фильтры `details` на internationalscholarships.com,
+зеркала провайдера, два агентства), и ключ (title, source_url) их не ловит. На каждую строку храним:
+  - minhash        — NUM_PERM минимумов 32-битных хешей шинглов (bytea, NUM_PERM * 4 байт);
+  - minhash_bands  — BANDS хешей полос по ROWS значений сигнатуры (bigint[] под GIN-индексом).
+Кандидаты — строки, у которых совпала хотя бы одна полоса (minhash_bands && :bands, поиск по индексу,
+а не по всей таблице); подтверждаются оценкой Jaccard по сигнатурам >= THRESHOLD.
+
+Проставить сигнатуры и связи уже лежащим в БД строкам:
+    python -m app.ml.minhash backfill
+    python -m app.ml.minhash backfill --type scholarship --batch-size 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import re
+import zlib
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Менять NUM_PERM/BANDS/ROWS/SHINGLE_SIZE/коэффициенты — только вместе с повторным backfill:
+# сигнатуры в БД станут несравнимы с новыми
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+# Короче — сигнатура слишком шумная (шаблонные «Apply now» совпадут у всего подряд), такие строки не сравниваем
+MIN_SHINGLES = 8
+# При 16 x 8 вероятность стать кандидатом: ~95% при Jaccard 0.8 и ~6% при 0.5
+THRESHOLD = 0.8
+
+_PRIME = (1 << 31) - 1
+
+
+def _coefficients(tag: str) -> np.ndarray:
+    # детерминированно из sha256, а не из ГПСЧ numpy — поток генератора между версиями не гарантирован
+    return np.array(
+        [int.from_bytes(hashlib.sha256(f"{tag}{i}".encode()).digest()[:8], "little") % (_PRIME - 1) + 1
+         for i in range(NUM_PERM)],
+        dtype=np.uint64,
+    )
+
+
+_A = _coefficients("a")
+_B = _coefficients("b")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def shingles(text: Optional[str]) -> np.ndarray:
+    """crc32 уникальных словесных шинглов длины SHINGLE_SIZE по тексту без регистра/пунктуации."""
+    words = _WORD_RE.findall((text or "").casefold())
+    if len(words) < SHINGLE_SIZE:
+        return np.empty(0, dtype=np.uint64)
+    grams = {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def signature(text: Optional[str]) -> Optional[np.ndarray]:
+    """MinHash (uint32[NUM_PERM]) или None, если шинглов меньше MIN_SHINGLES."""
+    hashed = shingles(text)
+    if hashed.size < MIN_SHINGLES:
+        return None
+    # (a * x + b) mod p для всех перестановок сразу: a < 2^31, x < 2^32 — в uint64 без переполнения
+    values = (np.outer(_A, hashed) + _B[:, None]) % _PRIME
+    return values.min(axis=1).astype(np.uint32)
+
+
+def band_hashes(sig: np.ndarray) -> List[int]:
+    """BANDS хешей полос; номер полосы входит в хеш, чтобы одинаковые полосы на разных местах не сталкивались."""
+    raw = sig.astype("<u4").reshape(BANDS, ROWS)
+    return [
+        int.from_bytes(hashlib.blake2b(bytes([band]) + raw[band].tobytes(), digest_size=8).digest(), "little", signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def encode(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def decode(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<u4")
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Оценка Jaccard: доля совпавших позиций сигнатур."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def text_of(row: dict) -> str:
+    # title входит в текст: у шаблонных описаний одного провайдера различается часто только он
+    return f"{row.get('title') or ''}\n{row.get('description') or ''}"
+
+
+def fingerprint(row: dict) -> Tuple[Optional[bytes], Optional[List[int]]]:
+    """(minhash, minhash_bands) для dict колонок строки; (None, None) — строку не сравниваем."""
+    sig = signature(text_of(row))
+    if sig is None:
+        return None, None
+    return encode(sig), band_hashes(sig)
+
+
+async def _main(args: argparse.Namespace) -> dict:
+    from app.db.main import AsyncSessionLocal, dispose_engine
+    from app.services.grantService import GrantService
+    from app.services.internshipService import InternshipService
+    from app.services.scholarshipService import ScholarshipService
+
+    services = {"grant": GrantService, "scholarship": ScholarshipService, "internship": InternshipService}
+    selected = [args.type] if args.type else list(services)
+    stats = {}
+    try:
+        async with AsyncSessionLocal() as session:
+            for item_type in selected:
+                stats[item_type] = await services[item_type]().backfill_near_duplicates(
+                    session, batch_size=args.batch_size
+                )
+    finally:
+        await dispose_engine()
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    backfill = sub.add_parser("backfill", help="сигнатуры и duplicate_of для строк без minhash")
+    backfill.add_argument("--type", choices=("grant", "scholarship", "internship"), default=None)
+    backfill.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main()
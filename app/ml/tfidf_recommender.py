@@ -0,0 +1,272 @@
+"""
+Офлайн content-based рекомендации: TF-IDF по каталогу grant/scholarship/internship.
+
+    python -m app.ml.tfidf_recommender --top-k 20
+    python -m app.ml.tfidf_recommender --dry-run --max-features 100000
+
+Профиль пользователя — взвешенная сумма TF-IDF векторов объектов, с которыми он уже связан,
+нормированная по L2. Таблицы взаимодействий нет, поэтому они приближаются рекомендациями из явного
+списка источников INTERACTION_SOURCE_MODELS (ручные/baseline) — выход сгенерированных моделей
+в профили не попадает и сам себя не подкрепляет. Скоры — косинус профиля со всем
+каталогом: матричное произведение (разреженный каталог) кусками по chunk_size пользователей, top-k через argpartition.
+Пользователи без взаимодействий пропускаются (холодный старт); если у такого пользователя остался
+набор SOURCE_MODEL с прошлых прогонов, он очищается.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+from sqlalchemy import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.recommendation import Recommendation
+from app.services.recommendationService import RecommendationService, type_map
+
+logger = logging.getLogger(__name__)
+
+# Поднимать при изменении признаков/весов: старые строки останутся под прежним source_model
+MODEL_VERSION = 1
+SOURCE_MODEL = f"tfidf-v{MODEL_VERSION}"
+
+# Источники рекомендаций, которые считаются взаимодействиями пользователя: baseline — и дефолт
+# POST /recommendations (строки, заведённые админом), manual — ручные подборки
+INTERACTION_SOURCE_MODELS = ("baseline", "manual")
+
+DEFAULT_TOP_K = 20
+# На кусок: 256 x 10^5 объектов x float32 ≈ 100 МБ скоров и столько же плотных профилей при 10^5 признаков
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_MAX_FEATURES = 100_000
+STREAM_BATCH_SIZE = 5000
+
+ItemKey = Tuple[str, int]
+
+
+@dataclass
+class Catalogue:
+    """Строки матрицы TF-IDF (L2-нормированные) и соответствующие им (item_type, item_id)."""
+    keys: List[ItemKey]
+    matrix: sp.csr_matrix
+    index: Dict[ItemKey, int] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not self.index:
+            self.index = {key: i for i, key in enumerate(self.keys)}
+
+
+@dataclass
+class RecommenderStats:
+    items: int = 0
+    features: int = 0
+    users: int = 0
+    written: int = 0
+    cleared: int = 0
+    elapsed_sec: float = 0.0
+
+
+async def load_texts(session: AsyncSession) -> Tuple[List[ItemKey], List[str]]:
+    """(item_type, id) и текст title + description всего каталога — серверным курсором, без ORM-объектов."""
+    keys: List[ItemKey] = []
+    texts: List[str] = []
+    for item_type, model in type_map.items():
+        # почти-дубликаты (duplicate_of) в каталог не входят — их представляет каноническая запись
+        stmt = select(model.id, model.title, model.description).where(model.duplicate_of.is_(None)).order_by(model.id)
+        result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+        async for item_id, title, description in result:
+            keys.append((item_type, item_id))
+            texts.append(f"{title or ''}\n{description or ''}")
+    return keys, texts
+
+
+def build_catalogue(keys: List[ItemKey], texts: Sequence[str], max_features: int = DEFAULT_MAX_FEATURES) -> Catalogue:
+    vectorizer = TfidfVectorizer(
+        stop_words="english",
+        sublinear_tf=True,
+        min_df=2 if len(texts) > 1000 else 1,
+        max_df=0.5 if len(texts) > 1000 else 1.0,
+        max_features=max_features,
+        dtype=np.float32,
+    )
+    # TfidfVectorizer уже нормирует строки по L2 — косинус сводится к скалярному произведению
+    matrix = vectorizer.fit_transform(texts).tocsr()
+    return Catalogue(keys=keys, matrix=matrix)
+
+
+async def load_interactions(session: AsyncSession, catalogue: Catalogue) -> Tuple[List[UUID], sp.csr_matrix]:
+    """
+    Матрица пользователи x объекты с весами взаимодействий.
+    Взаимодействия — рекомендации из INTERACTION_SOURCE_MODELS; вес — score, но не меньше 1.
+    Взаимодействие с почти-дубликатом засчитывается его канонической записи.
+    """
+    canonical: Dict[ItemKey, int] = {}
+    for item_type, model in type_map.items():
+        links = select(model.id, model.duplicate_of).where(model.duplicate_of.is_not(None))
+        for item_id, duplicate_of in (await session.execute(links)).all():
+            canonical[(item_type, item_id)] = duplicate_of
+
+    stmt = select(
+        Recommendation.user_id, Recommendation.item_type, Recommendation.item_id, Recommendation.score
+    ).where(Recommendation.source_model.in_(INTERACTION_SOURCE_MODELS))
+
+    users: Dict[UUID, int] = {}
+    rows: List[int] = []
+    cols: List[int] = []
+    weights: List[float] = []
+    result = await session.stream(stmt.execution_options(yield_per=STREAM_BATCH_SIZE))
+    async for user_id, item_type, item_id, score in result:
+        item_type = getattr(item_type, "value", item_type)
+        item_id = canonical.get((item_type, item_id), item_id)
+        col = catalogue.index.get((item_type, item_id))
+        if col is None:
+            continue  # объект удалён
+        rows.append(users.setdefault(user_id, len(users)))
+        cols.append(col)
+        weights.append(max(float(score or 0.0), 1.0))
+
+    matrix = sp.csr_matrix(
+        (np.asarray(weights, dtype=np.float32), (rows, cols)),
+        shape=(len(users), len(catalogue.keys)),
+    )
+    matrix.sum_duplicates()
+    return list(users), matrix
+
+
+async def load_stale_users(session: AsyncSession, current: Sequence[UUID]) -> List[UUID]:
+    """Пользователи с набором SOURCE_MODEL, которых нет среди current (взаимодействия пропали) — им пустой набор."""
+    stmt = select(Recommendation.user_id).where(Recommendation.source_model == SOURCE_MODEL).distinct()
+    holders = (await session.execute(stmt)).scalars().all()
+    current_set = set(current)
+    return [user_id for user_id in holders if user_id not in current_set]
+
+
+def top_k_scores(
+    profiles: sp.csr_matrix,
+    catalogue: Catalogue,
+    seen: sp.csr_matrix,
+    top_k: int,
+) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+    """
+    Для каждой строки profiles — (номер строки, индексы top_k объектов, их косинус), по убыванию.
+    Объекты, с которыми пользователь уже взаимодействовал, и нулевые скоры исключаются.
+    """
+    # разреженный каталог x плотный кусок профилей: в разы быстрее sparse @ sparse,
+    # выход которого на частых терминах всё равно почти плотный
+    scores = np.ascontiguousarray((catalogue.matrix @ profiles.T.toarray()).T)
+    seen_rows, seen_cols = seen.nonzero()
+    scores[seen_rows, seen_cols] = 0.0
+
+    k = min(top_k, scores.shape[1])
+    if k <= 0:
+        return
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(-top_scores, axis=1)
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = np.take_along_axis(top_scores, order, axis=1)
+    for row in range(scores.shape[0]):
+        keep = top_scores[row] > 0
+        yield row, top[row][keep], top_scores[row][keep]
+
+
+async def generate_recommendations(
+    session: AsyncSession,
+    top_k: int = DEFAULT_TOP_K,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    max_features: int = DEFAULT_MAX_FEATURES,
+    dry_run: bool = False,
+) -> RecommenderStats:
+    """
+    Полный прогон: каталог -> TF-IDF -> профили -> top-k косинус -> запись с source_model=SOURCE_MODEL.
+    Пишем кусками по chunk_size пользователей; dry_run только считает.
+    """
+    started = time.perf_counter()
+    stats = RecommenderStats()
+    service = RecommendationService()
+
+    keys, texts = await load_texts(session)
+    stats.items = len(keys)
+    if not keys:
+        return stats
+    catalogue = build_catalogue(keys, texts, max_features=max_features)
+    del texts
+    stats.features = catalogue.matrix.shape[1]
+
+    user_ids, interactions = await load_interactions(session, catalogue)
+    stats.users = len(user_ids)
+
+    # профили всех пользователей одним разреженным произведением: (U x I) @ (I x F)
+    profiles = normalize(interactions @ catalogue.matrix, norm="l2", copy=False).tocsr()
+
+    for start in range(0, len(user_ids), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        chunk_users = user_ids[chunk]
+        rows: List[dict] = []
+        for row, cols, scores in top_k_scores(profiles[chunk], catalogue, interactions[chunk], top_k):
+            for col, score in zip(cols.tolist(), scores.tolist()):
+                item_type, item_id = catalogue.keys[col]
+                rows.append({
+                    "user_id": chunk_users[row],
+                    "item_type": item_type,
+                    "item_id": item_id,
+                    "score": round(score, 6),
+                })
+        if not dry_run:
+            # набор tfidf-v<N> каждого пользователя куска меняется атомарно
+            await service.replace_user_sets(session, SOURCE_MODEL, rows, user_ids=chunk_users)
+        stats.written += len(rows)
+
+    # у кого взаимодействий больше нет, старый набор не должен висеть в ленте вечно
+    stale = await load_stale_users(session, user_ids)
+    stats.cleared = len(stale)
+    if not dry_run:
+        for start in range(0, len(stale), chunk_size):
+            await service.replace_user_sets(session, SOURCE_MODEL, [], user_ids=stale[start:start + chunk_size])
+
+    stats.elapsed_sec = time.perf_counter() - started
+    logger.info(
+        "TF-IDF recommendations %s: %d items x %d features, %d users, %d rows, %d stale sets cleared in %.1fs%s",
+        SOURCE_MODEL, stats.items, stats.features, stats.users, stats.written, stats.cleared,
+        stats.elapsed_sec, " (dry run)" if dry_run else "",
+    )
+    return stats
+
+
+async def _main(args: argparse.Namespace) -> RecommenderStats:
+    from app.db.main import AsyncSessionLocal, dispose_engine
+
+    try:
+        async with AsyncSessionLocal() as session:
+            return await generate_recommendations(
+                session,
+                top_k=args.top_k,
+                chunk_size=args.chunk_size,
+                max_features=args.max_features,
+                dry_run=args.dry_run,
+            )
+    finally:
+        await dispose_engine()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--max-features", type=int, default=DEFAULT_MAX_FEATURES)
+    parser.add_argument("--dry-run", action="store_true", help="посчитать, но не писать в БД")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    print(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main()
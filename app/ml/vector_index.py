@@ -0,0 +1,321 @@
+"""
+Векторный индекс каталога для «похожих возможностей»: TF-IDF + TruncatedSVD -> плотные L2-нормированные векторы.
+
+    python -m app.ml.vector_index build --dim 128
+    python -m app.ml.vector_index query grant 42 --k 10
+
+Индекс — каталог .npy-файлов, которые API-воркеры открывают через np.load(mmap_mode="r"):
+страницы лежат в page cache один раз на машину, а не копией в каждом процессе.
+  vectors.npy      (n, dim) float32, строки сгруппированы по спискам IVF (если он есть)
+  types.npy/ids.npy тип и id объекта каждой строки
+  lookup_keys.npy / lookup_rows.npy  отсортированные ключи (тип, id) -> строка, поиск через searchsorted
+  centroids.npy / offsets.npy        IVF: центроиды и границы списков в vectors (только для больших каталогов)
+Сборка пишет новую версию в отдельный подкаталог и атомарно переключает симлинк current;
+воркеры замечают переключение и переоткрывают индекс без рестарта.
+Поиск не ходит в БД: top-k скалярных произведений по всему mmap или по nprobe ближайшим спискам IVF.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+# sklearn и TF-IDF нужны только при сборке — API-воркеры, которые лишь читают индекс, их не импортируют
+if TYPE_CHECKING:
+    from app.ml.tfidf_recommender import ItemKey
+
+logger = logging.getLogger(__name__)
+
+# Поднимать при изменении формата файлов: воркеры не откроют индекс чужой версии
+INDEX_FORMAT = 1
+
+ITEM_TYPES = ("grant", "internship", "scholarship")
+TYPE_CODES = {name: code for code, name in enumerate(ITEM_TYPES)}
+
+DEFAULT_DIM = 128
+# До такого размера точный перебор (n x dim float32 ≈ 50 МБ на 10^5 при dim=128) укладывается в единицы мс;
+# дальше он упирается в пропускную способность памяти, и включается IVF
+IVF_MIN_ITEMS = 100_000
+DEFAULT_NPROBE = 16
+# Как часто воркер проверяет, не переключили ли current на новую версию
+RELOAD_CHECK_SEC = 30.0
+KEEP_VERSIONS = 2
+
+CURRENT_LINK = "current"
+
+
+def _lookup_key(codes: np.ndarray, ids: np.ndarray) -> np.ndarray:
+    return (codes.astype(np.int64) << 40) | ids.astype(np.int64)
+
+
+# Сборка
+
+def build_vectors(texts: Sequence[str], dim: int) -> np.ndarray:
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.preprocessing import normalize
+    from app.ml.tfidf_recommender import build_catalogue
+
+    matrix = build_catalogue([], texts).matrix
+    components = max(1, min(dim, matrix.shape[1] - 1, matrix.shape[0] - 1))
+    svd = TruncatedSVD(n_components=components, algorithm="randomized", random_state=0)
+    reduced = svd.fit_transform(matrix)
+    return normalize(reduced).astype(np.float32)
+
+
+def write_index(directory: str, keys: Sequence[ItemKey], vectors: np.ndarray, ivf: Optional[bool] = None) -> str:
+    """Пишет новую версию индекса и переключает на неё current. Возвращает путь версии."""
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.preprocessing import normalize
+
+    codes = np.fromiter((TYPE_CODES[t] for t, _ in keys), dtype=np.int8, count=len(keys))
+    ids = np.fromiter((i for _, i in keys), dtype=np.int64, count=len(keys))
+    n = len(keys)
+    use_ivf = n >= IVF_MIN_ITEMS if ivf is None else ivf
+    arrays = {}
+
+    if use_ivf:
+        # 4·sqrt(n) больше n при n < 16 — кластеров не может быть больше точек
+        nlist = max(1, min(n, int(4 * np.sqrt(n))))
+        kmeans = MiniBatchKMeans(n_clusters=nlist, batch_size=4096, n_init=1, random_state=0).fit(vectors)
+        labels = kmeans.labels_
+        order = np.argsort(labels, kind="stable")
+        vectors, codes, ids = vectors[order], codes[order], ids[order]
+        arrays["centroids"] = normalize(kmeans.cluster_centers_).astype(np.float32)
+        arrays["offsets"] = np.searchsorted(labels[order], np.arange(nlist + 1)).astype(np.int64)
+
+    keys_arr = _lookup_key(codes, ids)
+    lookup_rows = np.argsort(keys_arr, kind="stable")
+    arrays.update(
+        vectors=np.ascontiguousarray(vectors, dtype=np.float32),
+        types=codes,
+        ids=ids,
+        lookup_keys=keys_arr[lookup_rows],
+        lookup_rows=lookup_rows.astype(np.int64),
+    )
+
+    os.makedirs(directory, exist_ok=True)
+    version_dir = tempfile.mkdtemp(prefix=f"v{int(time.time())}-", dir=directory)
+    for name, arr in arrays.items():
+        np.save(os.path.join(version_dir, f"{name}.npy"), arr)
+    with open(os.path.join(version_dir, "meta.json"), "w") as f:
+        json.dump({"format": INDEX_FORMAT, "items": n, "dim": int(vectors.shape[1]), "ivf": use_ivf,
+                   "built_at": time.time()}, f)
+
+    # атомарная подмена симлинка: новый линк рядом + os.replace
+    tmp_link = os.path.join(directory, f".{CURRENT_LINK}-{os.getpid()}")
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.basename(version_dir), tmp_link)
+    os.replace(tmp_link, os.path.join(directory, CURRENT_LINK))
+    _prune_versions(directory, keep=os.path.basename(version_dir))
+    return version_dir
+
+
+def _prune_versions(directory: str, keep: str) -> None:
+    # последние KEEP_VERSIONS версий остаются: воркеры могут ещё держать mmap предыдущей
+    versions = sorted(
+        (d for d in os.listdir(directory) if d.startswith("v") and os.path.isdir(os.path.join(directory, d))),
+        key=lambda d: os.path.getmtime(os.path.join(directory, d)),
+    )
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+async def build_index(session, directory: Optional[str] = None, dim: int = DEFAULT_DIM, ivf: Optional[bool] = None) -> dict:
+    from app.ml.tfidf_recommender import load_texts
+
+    started = time.perf_counter()
+    keys, texts = await load_texts(session)
+    if not keys:
+        return {"items": 0}
+    vectors = build_vectors(texts, dim)
+    del texts
+    path = write_index(directory or settings.VECTOR_INDEX_DIR, keys, vectors, ivf=ivf)
+    stats = {"items": len(keys), "dim": int(vectors.shape[1]), "path": path,
+             "elapsed_sec": round(time.perf_counter() - started, 2)}
+    logger.info("Vector index built: %s", stats)
+    return stats
+
+
+# Поиск
+
+class VectorIndex:
+    """Открытая (mmap) версия индекса. Потокобезопасна: только чтение."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("format") != INDEX_FORMAT:
+            raise ValueError(f"Unsupported vector index format in {path}")
+
+        def load(name: str) -> Optional[np.ndarray]:
+            file = os.path.join(path, f"{name}.npy")
+            return np.load(file, mmap_mode="r") if os.path.exists(file) else None
+
+        self.vectors = load("vectors")
+        self.types = load("types")
+        self.ids = load("ids")
+        self.lookup_keys = load("lookup_keys")
+        self.lookup_rows = load("lookup_rows")
+        self.centroids = load("centroids")
+        self.offsets = load("offsets")
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def row_of(self, item_type: str, item_id: int) -> Optional[int]:
+        key = _lookup_key(np.array([TYPE_CODES[item_type]]), np.array([item_id]))[0]
+        pos = int(np.searchsorted(self.lookup_keys, key))
+        if pos < len(self.lookup_keys) and self.lookup_keys[pos] == key:
+            return int(self.lookup_rows[pos])
+        return None
+
+    def _candidates(self, query: np.ndarray, nprobe: int) -> List[slice]:
+        if self.centroids is None:
+            return [slice(0, len(self))]
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return [slice(int(self.offsets[c]), int(self.offsets[c + 1])) for c in probe]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        item_type: Optional[str] = None,
+        exclude_row: Optional[int] = None,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> List[Tuple[str, int, float]]:
+        """top-k (тип, id, косинус) к query по убыванию; item_type — только объекты этого типа."""
+        code = TYPE_CODES[item_type] if item_type is not None else None
+        parts = self._candidates(query, nprobe)
+        score_parts = []
+        for part in parts:
+            scores = self.vectors[part] @ query
+            if code is not None:
+                scores[self.types[part] != code] = -np.inf
+            if exclude_row is not None and part.start <= exclude_row < part.stop:
+                scores[exclude_row - part.start] = -np.inf
+            score_parts.append(scores)
+
+        if len(parts) == 1:
+            scores, rows = score_parts[0], None
+        else:
+            scores = np.concatenate(score_parts)
+            rows = np.concatenate([np.arange(p.start, p.stop) for p in parts])
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        result = []
+        for i in top:
+            if scores[i] == -np.inf:
+                break
+            row = parts[0].start + int(i) if rows is None else int(rows[i])
+            result.append((ITEM_TYPES[int(self.types[row])], int(self.ids[row]), float(scores[i])))
+        return result
+
+    def similar(
+        self,
+        item_type: str,
+        item_id: int,
+        k: int = 10,
+        same_type: bool = True,
+        nprobe: int = DEFAULT_NPROBE,
+    ) -> Optional[List[Tuple[str, int, float]]]:
+        """Похожие на объект; None — объекта нет в индексе (добавлен после последней сборки)."""
+        row = self.row_of(item_type, item_id)
+        if row is None:
+            return None
+        query = np.asarray(self.vectors[row])
+        return self.search(query, k, item_type=item_type if same_type else None, exclude_row=row, nprobe=nprobe)
+
+
+_index: Optional[VectorIndex] = None
+_index_target: Optional[str] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_vector_index(directory: Optional[str] = None) -> Optional[VectorIndex]:
+    """
+    Текущая версия индекса для этого процесса (None, если индекс ещё не собирали).
+    Симлинк current перечитывается не чаще раза в RELOAD_CHECK_SEC.
+    """
+    global _index, _index_target, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < RELOAD_CHECK_SEC:
+        return _index
+    with _lock:
+        _checked_at = now
+        link = os.path.join(directory or settings.VECTOR_INDEX_DIR, CURRENT_LINK)
+        try:
+            target = os.path.realpath(link, strict=True)
+        except OSError:
+            return _index
+        if target != _index_target:
+            try:
+                _index, _index_target = VectorIndex(target), target
+                logger.info("Vector index loaded: %s (%d items)", target, len(_index))
+            except (OSError, ValueError) as e:
+                logger.warning("Vector index %s is not usable: %s", target, e)
+    return _index
+
+
+# CLI
+
+async def _build(args: argparse.Namespace) -> dict:
+    from app.db.main import AsyncSessionLocal, dispose_engine
+
+    try:
+        async with AsyncSessionLocal() as session:
+            return await build_index(session, directory=args.directory, dim=args.dim, ivf=args.ivf)
+    finally:
+        await dispose_engine()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--directory", default=None, help="по умолчанию VECTOR_INDEX_DIR")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--dim", type=int, default=DEFAULT_DIM)
+    build.add_argument("--ivf", action=argparse.BooleanOptionalAction, default=None,
+                       help=f"по умолчанию — для каталогов от {IVF_MIN_ITEMS} объектов")
+    query = sub.add_parser("query")
+    query.add_argument("item_type", choices=ITEM_TYPES)
+    query.add_argument("item_id", type=int)
+    query.add_argument("--k", type=int, default=10)
+    query.add_argument("--nprobe", type=int, default=DEFAULT_NPROBE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "build":
+        print(asyncio.run(_build(args)))
+        return
+
+    index = get_vector_index(args.directory)
+    if index is None:
+        raise SystemExit("vector index is not built yet")
+    started = time.perf_counter()
+    result = index.similar(args.item_type, args.item_id, k=args.k, nprobe=args.nprobe)
+    print(f"{(time.perf_counter() - started) * 1000:.2f} ms")
+    for row in result or []:
+        print(*row)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,31 @@
 from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Computed, ForeignKey, Index, UniqueConstraint, text
 import sqlalchemy.dialects.postgresql as pg
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+# Взвешенный tsvector: совпадения в title (A) важнее, чем в description (B).
+# Колонка генерируется самим Postgres, поэтому всегда актуальна при INSERT/UPDATE.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
 class Grant(SQLModel, table=True):
+    __table_args__ = (
+        # ключ идемпотентности ETL: INSERT ... ON CONFLICT (title, source_url)
+        UniqueConstraint("title", "source_url", name="uq_grant_title_source_url"),
+        Index("ix_grant_search_vector", "search_vector", postgresql_using="gin"),
+        # под ORDER BY <col> NULLS LAST, id в листинге (и keyset-курсор); дефолт листинга — created_at DESC
+        Index("ix_grant_created_at_id", text("created_at DESC NULLS LAST"), text("id DESC")),
+        Index("ix_grant_deadline_id", text("deadline DESC NULLS LAST"), text("id DESC")),
+        # order=asc идёт как ASC NULLS LAST: обратный проход по DESC NULLS LAST дал бы NULLS FIRST
+        Index("ix_grant_deadline_asc_id", text("deadline ASC NULLS LAST"), text("id ASC")),
+        Index("ix_grant_published_at_id", text("published_at DESC NULLS LAST"), text("id DESC")),
+        # LSH-корзины почти-дубликатов: minhash_bands && :bands
+        Index("ix_grant_minhash_bands", "minhash_bands", postgresql_using="gin"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str
     description: str
@@ -15,8 +37,23 @@ class Grant(SQLModel, table=True):
     language: Optional[str] = None
     provider: str
     image_url: Optional[str] = None
+    # sha256 нормализованного контента (см. compute_content_hash) — для пропуска неизменившихся строк в ETL
+    content_hash: Optional[str] = Field(default=None, sa_column=Column(pg.VARCHAR(64), nullable=True))
+    # MinHash-сигнатура и её LSH-полосы (см. app/ml/minhash.py); duplicate_of — каноническая запись,
+    # если эта — почти-дубликат из другого источника (такие не показываются в листингах и рекомендациях)
+    minhash: Optional[bytes] = Field(default=None, sa_column=Column(pg.BYTEA, nullable=True))
+    minhash_bands: Optional[List[int]] = Field(default=None, sa_column=Column(pg.ARRAY(pg.BIGINT), nullable=True))
+    duplicate_of: Optional[int] = Field(
+        default=None,
+        sa_column=Column(pg.INTEGER, ForeignKey("grant.id", ondelete="SET NULL", name="fk_grant_duplicate_of"), nullable=True),
+    )
+
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    search_vector: Optional[str] = Field(
+        default=None,
+        sa_column=Column(pg.TSVECTOR, Computed(SEARCH_VECTOR_SQL, persisted=True)),
+    )
 
     def __repr__(self):
-        return f"<GRANT {self.title}>"
\ No newline at end of file
+        return f"<GRANT {self.title}>"
@@ -1,4 +1,5 @@
 from sqlmodel import SQLModel, Field, Column
+from sqlalchemy import Index, text
 from enum import Enum
 from uuid import UUID, uuid4
 from datetime import datetime
@@ -13,6 +14,10 @@ class ItemType(str, Enum):
 
 class Recommendation(SQLModel, table=True):
     __tablename__ = "recommendations"
+    __table_args__ = (
+        # лента GET /recommendations: WHERE user_id = ? ORDER BY score DESC, id DESC (и keyset-курсор)
+        Index("ix_recommendations_user_id_score_id", "user_id", text("score DESC"), text("id DESC")),
+    )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True, index=True)
 
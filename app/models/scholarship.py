@@ -1,9 +1,23 @@
 from sqlmodel import SQLModel, Field, Column
-from typing import Optional
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, text
+from typing import List, Optional
 import sqlalchemy.dialects.postgresql as pg
 from datetime import datetime
 
 class Scholarship(SQLModel, table=True):
+    __table_args__ = (
+        # ключ идемпотентности ETL: INSERT ... ON CONFLICT (title, source_url)
+        UniqueConstraint("title", "source_url", name="uq_scholarship_title_source_url"),
+        # под ORDER BY <col> NULLS LAST, id в листинге (и keyset-курсор); дефолт листинга — created_at DESC
+        Index("ix_scholarship_created_at_id", text("created_at DESC NULLS LAST"), text("id DESC")),
+        Index("ix_scholarship_deadline_id", text("deadline DESC NULLS LAST"), text("id DESC")),
+        # order=asc идёт как ASC NULLS LAST: обратный проход по DESC NULLS LAST дал бы NULLS FIRST
+        Index("ix_scholarship_deadline_asc_id", text("deadline ASC NULLS LAST"), text("id ASC")),
+        Index("ix_scholarship_published_at_id", text("published_at DESC NULLS LAST"), text("id DESC")),
+        # LSH-корзины почти-дубликатов: minhash_bands && :bands
+        Index("ix_scholarship_minhash_bands", "minhash_bands", postgresql_using="gin"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     level: Optional[str] = None  # bachelor, master, phd
 
@@ -24,6 +38,17 @@ class Scholarship(SQLModel, table=True):
     provider: str
     image_url: Optional[str] = None
 
+    # sha256 нормализованного контента (см. compute_content_hash) — для пропуска неизменившихся строк в ETL
+    content_hash: Optional[str] = Field(default=None, sa_column=Column(pg.VARCHAR(64), nullable=True))
+    # MinHash-сигнатура и её LSH-полосы (см. app/ml/minhash.py); duplicate_of — каноническая запись,
+    # если эта — почти-дубликат из другого источника (такие не показываются в листингах и рекомендациях)
+    minhash: Optional[bytes] = Field(default=None, sa_column=Column(pg.BYTEA, nullable=True))
+    minhash_bands: Optional[List[int]] = Field(default=None, sa_column=Column(pg.ARRAY(pg.BIGINT), nullable=True))
+    duplicate_of: Optional[int] = Field(
+        default=None,
+        sa_column=Column(pg.INTEGER, ForeignKey("scholarship.id", ondelete="SET NULL", name="fk_scholarship_duplicate_of"), nullable=True),
+    )
+
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
 
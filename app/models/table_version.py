@@ -0,0 +1,19 @@
+from sqlmodel import SQLModel, Field, Column
+from typing import Optional
+import sqlalchemy.dialects.postgresql as pg
+from datetime import datetime
+
+# Счётчик изменений таблицы: триггеры (см. миграцию add_table_versions) поднимают version и modified_at
+# после каждого INSERT/UPDATE/DELETE, реально затронувшего строки. Валидаторы листингов (ETag/Last-Modified)
+# читают одну строку по PK вместо агрегата по всему отфильтрованному набору; удаление тоже сдвигает modified_at.
+
+class TableVersion(SQLModel, table=True):
+    __tablename__ = "table_versions"
+
+    name: str = Field(primary_key=True)
+    version: int = Field(default=0, sa_column=Column(pg.BIGINT, nullable=False, server_default="0"))
+    # UTC без таймзоны, как и остальные TIMESTAMP в схеме
+    modified_at: Optional[datetime] = Field(default=None, sa_column=Column(pg.TIMESTAMP, nullable=True))
+
+    def __repr__(self):
+        return f"<TABLE_VERSION {self.name}={self.version}>"
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+
+from app.parsers.parse_executor import make_soup
+
+_WS_RE = re.compile(r"\s+")
+
+
+def clean_text(x: Optional[str]) -> str:
+    if not x:
+        return ""
+    return _WS_RE.sub(" ", x).strip()
+
+
+def tag_text(tag: Optional[Tag]) -> str:
+    return clean_text(tag.get_text(" ", strip=True)) if tag is not None else ""
+
+
+def has_classes(tag: Tag, *classes: str) -> bool:
+    tag_classes = tag.get("class") or ()
+    return all(c in tag_classes for c in classes)
+
+
+def has_ancestor(tag: Tag, name: Optional[str] = None, cls: Optional[str] = None) -> bool:
+    for parent in tag.parents:
+        if (name is None or parent.name == name) and (cls is None or has_classes(parent, cls)):
+            return True
+    return False
+
+
+class PageDocument:
+    """
+    Разобранная страница для экстракторов краулера: HTML парсится один раз, и за один обход дерева
+    строятся индексы по тегу, классу и data-testid (в порядке документа), текст <p>/<h4>,
+    пары <h4>Label</h4><p>Value</p>, абзацы вида «Label: value» и плоский текст страницы.
+    Экстракторы берут всё из индексов вместо повторных find_all/select/get_text по дереву.
+    """
+
+    def __init__(self, html: str) -> None:
+        self.soup: BeautifulSoup = make_soup(html)
+        self.by_tag: Dict[str, List[Tag]] = defaultdict(list)
+        self.by_class: Dict[str, List[Tag]] = defaultdict(list)
+        self.by_testid: Dict[str, List[Tag]] = defaultdict(list)
+        self._order: Dict[int, int] = {}
+
+        # текст собираем по ходу обхода: строки — в плоский текст и во все открытые <p>/<h4> над ними
+        strings: List[str] = []
+        open_parts: Dict[int, List[str]] = {}
+        block_text: Dict[int, str] = {}
+        # предки текущего узла; узел закрывается, когда обход выходит из его поддерева
+        path: List[Tag] = []
+        # <h4> без найденного <p>: id(родителя) -> [h4] (аналог find_next_sibling("p"))
+        pending_h4: Dict[int, List[Tag]] = defaultdict(list)
+        label_pairs: List[Tuple[Tag, Tag]] = []
+        paragraphs: List[Tag] = []
+
+        def close(tag: Tag) -> None:
+            parts = open_parts.pop(id(tag), None)
+            if parts is not None:
+                block_text[id(tag)] = clean_text(" ".join(parts))
+
+        i = 0
+        for node in self.soup.descendants:
+            parent = node.parent
+            while path and path[-1] is not parent:
+                close(path.pop())
+            if isinstance(node, Tag):
+                self._order[id(node)] = i
+                i += 1
+                self.by_tag[node.name].append(node)
+                for cls in node.get("class") or ():
+                    self.by_class[cls].append(node)
+                testid = node.get("data-testid")
+                if testid:
+                    self.by_testid[testid].append(node)
+                path.append(node)
+                if node.name == "h4":
+                    open_parts[id(node)] = []
+                    pending_h4[id(parent)].append(node)
+                elif node.name == "p":
+                    open_parts[id(node)] = []
+                    paragraphs.append(node)
+                    for h4 in pending_h4.pop(id(parent), ()):
+                        label_pairs.append((h4, node))
+            elif type(node) in (NavigableString, CData):
+                # те же строки, что берёт get_text (без комментариев, script/style)
+                text = node.strip()
+                if text:
+                    strings.append(text)
+                    for parts in open_parts.values():
+                        parts.append(text)
+        while path:
+            close(path.pop())
+
+        self.text = clean_text(" ".join(strings))
+        # пары h4/p — в порядке h4: [(label в нижнем регистре, текст value)]
+        label_pairs.sort(key=lambda pair: self._order[id(pair[0])])
+        self.labels: List[Tuple[str, str]] = [
+            (block_text[id(h4)].lower(), block_text[id(p)]) for h4, p in label_pairs
+        ]
+        # абзацы «Label: value»: [(label в нижнем регистре, value)] в порядке документа
+        self.fields: List[Tuple[str, str]] = []
+        for p in paragraphs:
+            label, sep, value = block_text[id(p)].partition(":")
+            if sep:
+                self.fields.append((label.strip().lower(), value.strip()))
+
+    def tags(self, name: str) -> List[Tag]:
+        return self.by_tag.get(name, [])
+
+    def with_class(self, cls: str, name: Optional[str] = None) -> List[Tag]:
+        tags = self.by_class.get(cls, [])
+        return [t for t in tags if t.name == name] if name else tags
+
+    def testid(self, value: str, name: Optional[str] = None) -> Optional[Tag]:
+        """Первый узел с data-testid=value (и нужным тегом, если задан)."""
+        for tag in self.by_testid.get(value, []):
+            if name is None or tag.name == name:
+                return tag
+        return None
+
+    def first(self, candidates: Iterable[Tag]) -> Optional[Tag]:
+        """Самый ранний в документе узел из кандидатов (аналог select_one со списком селекторов)."""
+        return min(candidates, key=lambda t: self._order[id(t)], default=None)
+
+    def label_value(self, label_contains: Iterable[str]) -> Optional[str]:
+        """Значение первой пары h4/p, чей label содержит одну из подстрок."""
+        keywords = tuple(label_contains)
+        for label, value in self.labels:
+            if any(kw in label for kw in keywords):
+                return value
+        return None
+
+    def field_value(self, label: str) -> Optional[str]:
+        """Значение первого абзаца «Label: value» с таким label (без учёта регистра)."""
+        label = label.lower()
+        for field_label, value in self.fields:
+            if field_label == label:
+                return value
+        return None
+
+
+def section_map(container: Optional[Tag]) -> Dict[str, str]:
+    """
+    Все секции контейнера разом: {заголовок h2 в нижнем регистре: текст после h2 до следующего h2}.
+    Списки, параграфы и голый текст сводятся к пробелам. Повторный заголовок не перезаписывает первый.
+    """
+    sections: Dict[str, str] = {}
+    if container is None:
+        return sections
+
+    for h2 in container.find_all("h2"):
+        heading = clean_text(h2.get_text()).lower()
+        if heading in sections:
+            continue
+        chunks: List[str] = []
+        for node in h2.next_siblings:
+            if isinstance(node, Tag):
+                if node.name == "h2":
+                    break  # дошли до следующей секции
+                if node.name in ("ul", "ol"):
+                    chunks.extend(tag_text(li) for li in node.find_all("li"))
+                else:
+                    chunks.append(tag_text(node))
+            elif isinstance(node, NavigableString):
+                text = clean_text(str(node))
+                if text:
+                    chunks.append(text)
+        sections[heading] = clean_text(" ".join(c for c in chunks if c))
+    return sections
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# На эти статусы повторяем запрос (с учётом Retry-After)
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+@dataclass(frozen=True)
+class HostPolicy:
+    """
+    Ограничения на один хост:
+    - max_concurrency — одновременных запросов;
+    - rate / burst — token bucket: запросов в секунду в среднем и допустимый всплеск;
+    - max_retries, backoff_base, max_backoff — повторы на 429/5xx и сетевые ошибки (экспонента с джиттером);
+    - max_retry_after — верхняя граница ожидания по Retry-After, чтобы не зависнуть на час.
+    """
+    max_concurrency: int = 4
+    rate: float = 2.0
+    burst: int = 4
+    max_retries: int = 4
+    backoff_base: float = 1.0
+    max_backoff: float = 60.0
+    max_retry_after: float = 300.0
+
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.max_backoff, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+
+class TokenBucket:
+    """Классический token bucket; ожидающие обслуживаются по очереди (FIFO через lock)."""
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        self.rate = rate
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class _HostState:
+    def __init__(self, policy: HostPolicy) -> None:
+        self.policy = policy
+        self.semaphore = asyncio.Semaphore(policy.max_concurrency)
+        self.bucket = TokenBucket(policy.rate, policy.burst)
+        # после 429 ставим на паузу весь хост, а не только упавший запрос
+        self.blocked_until = 0.0
+
+    def block_for(self, delay: float) -> None:
+        self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+    async def wait_unblocked(self) -> None:
+        delay = self.blocked_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _retry_after(resp: httpx.Response, limit: float) -> Optional[float]:
+    """Retry-After в секундах либо HTTP-датой (RFC 9110); None, если заголовка нет или он кривой."""
+    value = resp.headers.get("retry-after")
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), limit)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return min(max((when - datetime.now(timezone.utc)).total_seconds(), 0.0), limit)
+
+
+class FetchScheduler:
+    """
+    Общий планировщик запросов краулеров: на каждый хост — семафор, token bucket и пауза после 429.
+    Политики задаются по хосту; для остальных хостов действует default.
+    """
+
+    def __init__(self, policies: Optional[Dict[str, HostPolicy]] = None, default: Optional[HostPolicy] = None) -> None:
+        self.policies = dict(policies or {})
+        self.default = default or HostPolicy()
+        self._hosts: Dict[str, _HostState] = {}
+
+    def _state(self, url: str) -> _HostState:
+        host = urlsplit(url).netloc.lower()
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.policies.get(host, self.default))
+            self._hosts[host] = state
+        return state
+
+    async def get(self, client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+        """
+        client.get в рамках лимитов хоста. Повторяет 429/502/503/504 и сетевые ошибки;
+        после исчерпания попыток возвращает последний ответ (или пробрасывает последнюю сетевую ошибку).
+        """
+        state = self._state(url)
+        policy = state.policy
+        attempt = 0
+        while True:
+            resp: Optional[httpx.Response] = None
+            async with state.semaphore:
+                await state.wait_unblocked()
+                await state.bucket.acquire()
+                try:
+                    resp = await client.get(url, **kwargs)
+                except httpx.TransportError as e:
+                    if attempt >= policy.max_retries:
+                        raise
+                    delay = policy.backoff(attempt)
+                    logger.warning("GET %s failed (%s), retry %d in %.1fs", url, e, attempt + 1, delay)
+
+            if resp is not None:
+                if resp.status_code not in RETRY_STATUSES or attempt >= policy.max_retries:
+                    return resp
+                delay = _retry_after(resp, policy.max_retry_after)
+                if delay is None:
+                    delay = policy.backoff(attempt)
+                if resp.status_code == 429:
+                    state.block_for(delay)
+                logger.warning("GET %s -> %d, retry %d in %.1fs", url, resp.status_code, attempt + 1, delay)
+
+            attempt += 1
+            # ждём вне семафора — слот хоста достаётся другим запросам
+            await asyncio.sleep(delay)
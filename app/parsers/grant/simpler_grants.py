@@ -1,17 +1,26 @@
 from __future__ import annotations
 
 import asyncio
+import os
 import re
 from datetime import datetime
-from typing import Iterable, List, Optional, Tuple, Dict
+from typing import Any, Iterable, List, Optional, Tuple, Dict
 from urllib.parse import urljoin
 
 import httpx
-from bs4 import BeautifulSoup
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.dates import parse_date, parse_dates
+from app.parsers.fetch_scheduler import FetchScheduler, HostPolicy
+from app.parsers.http_cache import ResponseCache
+from app.parsers.document import PageDocument, clean_text
+from app.parsers.parse_executor import run_parse
+from app.parsers.pipeline import Stage, run_pipeline
+from app.parsers.progress import EtlProgress
+from app.parsers.watermark import DEFAULT_STOP_AFTER_KNOWN, KnownUrls, Watermark
 from app.schemes.grant import GrantCreate
 from app.services.grantService import GrantService
+from app.services.opportunityService import empty_upsert_stats, merge_upsert_stats
 
 BASE = "https://simpler.grants.gov"
 
@@ -24,43 +33,44 @@ BASE_LIST_URL = (
     "private_institutions_of_higher_education,unrestricted"
 )
 
+# Лимиты запросов к simpler.grants.gov: карточки листинга качаются параллельно, но не более чем так
+FETCH_POLICY = HostPolicy(max_concurrency=8, rate=5.0, burst=10)
+
+# Строк в одном bulk_upsert на стадии записи
+PERSIST_BATCH_SIZE = 100
+
+# Одновременных задач парсинга: сам разбор идёт в пуле процессов, так что держим по задаче на ядро
+PARSE_CONCURRENCY = os.cpu_count() or 1
+
+# Поднимать при любом изменении разбора карточки — иначе из кеша вернутся старые результаты
+DETAIL_PARSER_VERSION = 4
+
 USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
     "AppleWebKit/537.36 (KHTML, like Gecko) "
     "Chrome/125.0.0.0 Safari/537.36"
 )
 
-# утилиты 
+# Регулярки компилируем один раз на модуль (и на процесс пула парсинга)
+_US_DATE = r"([A-Za-z]{3,9}\s+\d{1,2},\s+\d{4})"
+_DATE_AFTER_RE = {
+    label: re.compile(rf"{re.escape(label)}\s*:\s*{_US_DATE}", re.IGNORECASE)
+    for label in ("Posted date", "Last Updated")
+}
+_US_DATE_RE = re.compile(_US_DATE)
+_CLOSING_RE = re.compile(rf"Closing:\s*{_US_DATE}", re.IGNORECASE)
+_SHOW_FULL_RE = re.compile(r"Show full description$", re.IGNORECASE)
 
-def _clean_text(s: Optional[str]) -> str:
-    if not s:
-        return ""
-    return re.sub(r"\s+", " ", s).strip()
+# утилиты 
 
-def _parse_any_us_date(s: Optional[str]) -> Optional[datetime]:
-    """Поддержка форматов вида 'Sep 9, 2025', 'September 9, 2025', '03/21/2023'."""
-    if not s:
-        return None
-    s = _clean_text(s)
-    for fmt in ("%b %d, %Y", "%B %d, %Y", "%m/%d/%Y"):
-        try:
-            return datetime.strptime(s, fmt)
-        except ValueError:
-            pass
-    return None
+_clean_text = clean_text
 
-def _extract_first_date_after(label_text: str, haystack: str) -> Optional[datetime]:
+def _date_text_after(label_text: str, haystack: str) -> Optional[str]:
     """
-    Ищем 'Posted date: Jun 12, 2025' или 'Last Updated: February 26, 2025'
+    Текст даты после метки: 'Posted date: Jun 12, 2025', 'Last Updated: February 26, 2025'
     """
-    m = re.search(
-        rf"{re.escape(label_text)}\s*:\s*([A-Za-z]{{3,9}}\s+\d{{1,2}},\s+\d{{4}})",
-        haystack,
-        flags=re.IGNORECASE,
-    )
-    if m:
-        return _parse_any_us_date(m.group(1))
-    return None
+    m = _DATE_AFTER_RE[label_text].search(haystack)
+    return m.group(1) if m else None
 
 # парсинг листинга 
 
@@ -75,8 +85,8 @@ def _parse_list_page(html: str) -> List[Dict]:
         'posted_at': Optional[datetime],
     }
     """
-    soup = BeautifulSoup(html, "html.parser")
-    table = soup.find("table", attrs={"data-testid": "table"})
+    doc = PageDocument(html)
+    table = doc.testid("table", "table")
     if not table or not table.tbody:
         return []
 
@@ -90,7 +100,6 @@ def _parse_list_page(html: str) -> List[Dict]:
 
         # close date — в первом td
         close_text = _clean_text(tds[0].get_text(" ", strip=True))
-        close_dt = _parse_any_us_date(close_text)
 
         # третий td (index 2): содержит ссылку и заголовок
         a = tds[2].find("a", href=True)
@@ -103,29 +112,33 @@ def _parse_list_page(html: str) -> List[Dict]:
         agency_block_text = _clean_text(tds[3].get_text(" ", strip=True))
         # agency — это всё до "Posted date"
         agency = agency_block_text.split("Posted date")[0].strip(" :") or "Unknown agency"
-        posted_at = _extract_first_date_after("Posted date", agency_block_text)
+        posted_text = _date_text_after("Posted date", agency_block_text)
 
         items.append(
             {
                 "title": title,
                 "href": href,
                 "agency": agency,
-                "close_date": close_dt,
-                "posted_at": posted_at,
+                "close_date": close_text,
+                "posted_at": posted_text,
             }
         )
 
+    # даты всей страницы — одним пакетом (сроки в листинге часто совпадают)
+    dates = iter(parse_dates(v for it in items for v in (it["close_date"], it["posted_at"])))
+    for it in items:
+        it["close_date"], it["posted_at"] = next(dates), next(dates)
     return items
 
 # парсинг карточки 
 
-def _extract_description_from_detail(soup: BeautifulSoup) -> str:
+def _extract_description_from_detail(doc: PageDocument) -> str:
     """
     В блоке data-testid="opportunity-description" обычно:
       [header div с H2] [div с основным текстом] [div data-testid="toggled-content-container"] [кнопка Show full...]
     Собираем основной + "toggled" куски.
     """
-    container = soup.find("div", attrs={"data-testid": "opportunity-description"})
+    container = doc.testid("opportunity-description", "div")
     if not container:
         return ""
 
@@ -145,54 +158,53 @@ def _extract_description_from_detail(soup: BeautifulSoup) -> str:
 
     # убираем мусор типа "Show full description"
     text = "\n\n".join(parts)
-    text = re.sub(r"Show full description$", "", text, flags=re.IGNORECASE).strip()
+    text = _SHOW_FULL_RE.sub("", text).strip()
     return text
 
-def _extract_deadline_from_detail(soup: BeautifulSoup) -> Optional[datetime]:
+def _extract_deadline_from_detail(doc: PageDocument) -> Optional[str]:
     """
-    В сайдбаре виджет 'Closing: September 9, 2025'
+    В сайдбаре виджет 'Closing: September 9, 2025' — возвращаем текст даты
     """
-    box = soup.find("div", attrs={"data-testid": "opportunity-status-widget"})
+    box = doc.testid("opportunity-status-widget", "div")
     if not box:
         return None
     txt = _clean_text(box.get_text(" ", strip=True))
-    m = re.search(r"Closing:\s*([A-Za-z]{3,9}\s+\d{1,2},\s+\d{4})", txt, re.IGNORECASE)
+    m = _CLOSING_RE.search(txt)
     if m:
-        return _parse_any_us_date(m.group(1))
+        return m.group(1)
     return None
 
-def _extract_agency_from_detail(soup: BeautifulSoup, fallback: str) -> str:
+def _extract_agency_from_detail(doc: PageDocument, fallback: str) -> str:
     """
     Вверху страницы есть p с 'Agency: ...'
     """
-    for p in soup.find_all("p"):
-        t = _clean_text(p.get_text(" ", strip=True))
-        if "Agency:" in t:
-            # всё после 'Agency:'
-            return _clean_text(t.split("Agency:", 1)[1])
-    return fallback
-
-def _extract_posted_date_from_detail(soup: BeautifulSoup, fallback: Optional[datetime]) -> Optional[datetime]:
-    # сначала пробуем "Posted date" в разделе History
-    whole = _clean_text(soup.get_text(" ", strip=True))
-    posted = _extract_first_date_after("Posted date", whole)
-    if posted:
-        return posted
-    # иначе можно взять "Last Updated"
-    last_updated = _extract_first_date_after("Last Updated", whole)
-    return posted or last_updated or fallback
-
-async def _fetch_detail_page(client: httpx.AsyncClient, url: str) -> Tuple[str, Optional[datetime], Optional[datetime], str]:
+    return doc.field_value("Agency") or fallback
+
+def _extract_posted_date_from_detail(doc: PageDocument) -> Optional[str]:
+    # сначала пробуем "Posted date" в разделе History, иначе "Last Updated".
+    # Обычно это абзацы «Label: value» из индекса документа; если метка свёрстана не в <p> —
+    # ищем её в плоском тексте страницы (он уже собран тем же обходом, повторного get_text нет)
+    for label in ("Posted date", "Last Updated"):
+        value = doc.field_value(label)
+        m = _US_DATE_RE.match(value) if value else None
+        if m and parse_date(m.group(1)):
+            return m.group(1)
+    for label in ("Posted date", "Last Updated"):
+        text = _date_text_after(label, doc.text)
+        if parse_date(text):
+            return text
+    return None
+
+def _parse_detail_page(html: str) -> Tuple[str, Optional[str], Optional[str], str]:
     """
-    Возвращает (description, deadline, posted_at, agency_from_detail)
+    Возвращает (description, deadline_text, posted_text, agency_from_detail); HTML разбирается один раз.
+    Даты — сырым текстом: результат кешируется, а разрешать их нужно относительно момента обхода.
     """
-    r = await client.get(url, timeout=40)
-    r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
-    description = _extract_description_from_detail(soup)
-    deadline = _extract_deadline_from_detail(soup)
-    agency = _extract_agency_from_detail(soup, fallback="Unknown agency")
-    posted_at = _extract_posted_date_from_detail(soup, fallback=None)
+    doc = PageDocument(html)
+    description = _extract_description_from_detail(doc)
+    deadline = _extract_deadline_from_detail(doc)
+    agency = _extract_agency_from_detail(doc, fallback="Unknown agency")
+    posted_at = _extract_posted_date_from_detail(doc)
     return description, deadline, posted_at, agency
 
 def _to_grant_create(
@@ -223,13 +235,32 @@ async def fetch_grants_from_simpler(
     pages: int = 1,
     start_page: int = 1,
     throttle_sec: float = 0.0,
-) -> List[int]:
+    progress: Optional[EtlProgress] = None,
+    incremental: bool = False,
+    stop_after_known: int = DEFAULT_STOP_AFTER_KNOWN,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    fetch_policy: Optional[HostPolicy] = None,
+) -> Dict[str, Any]:
     """
-    Проходит по выдаче Simpler.Grants.gov, парсит и создаёт записи через GrantService.
-    Возвращает список ID созданных грантов.
+    Обходит выдачу Simpler.Grants.gov конвейером:
+      листинг -> карточки (параллельно, в лимитах FETCH_POLICY) -> парсинг -> пакетный upsert.
+    Стадии связаны ограниченными очередями и работают одновременно.
+    Возвращает {"inserted": [id...], "updated": [id...], "unchanged": int}.
+    progress — счётчики для наблюдения за ходом импорта (фоновая задача ETL).
+    incremental — уже известные URL не качаем, а после stop_after_known известных подряд перестаём листать.
+    transport — подмена HTTP-транспорта (запись/воспроизведение корпуса в benchmarks/).
+    fetch_policy — подмена FETCH_POLICY (воспроизведение корпуса идёт без лимитов сайта).
     """
-    created_ids: List[int] = []
+    stats = empty_upsert_stats()
+    progress = progress or EtlProgress()
     grant_service = GrantService()
+    cache = ResponseCache("simpler_grants", parser_version=DETAIL_PARSER_VERSION)
+    policy = fetch_policy or FETCH_POLICY
+    scheduler = FetchScheduler({"simpler.grants.gov": policy}, default=policy)
+    watermark = None
+    if incremental:
+        known = await KnownUrls.load(grant_service, session, prefix=BASE)
+        watermark = Watermark(known, stop_after_known=stop_after_known)
 
     headers = {
         "User-Agent": USER_AGENT,
@@ -237,59 +268,86 @@ async def fetch_grants_from_simpler(
         "Accept-Language": "en-US,en;q=0.9",
     }
 
-    async with httpx.AsyncClient(headers=headers, follow_redirects=True) as client:
-        for page in range(start_page, start_page + pages):
-            list_url = BASE_LIST_URL if page == 1 else f"{BASE_LIST_URL}&page={page}"
-            resp = await client.get(list_url, timeout=40)
-            resp.raise_for_status()
-
-            items = _parse_list_page(resp.text)
-            if not items:
-                # Нечего парсить — идём дальше
+    async with httpx.AsyncClient(headers=headers, follow_redirects=True, transport=transport) as client:
+
+        async def discover():
+            # стадия 1: страницы листинга по очереди; строки уходят дальше сразу, не дожидаясь карточек
+            for page in range(start_page, start_page + pages):
+                list_url = BASE_LIST_URL if page == 1 else f"{BASE_LIST_URL}&page={page}"
+                resp = await scheduler.get(client, list_url, timeout=40)
+                resp.raise_for_status()
+                rows = await run_parse(_parse_list_page, resp.text)
+                progress.add(pages=1)
+                for it in rows:
+                    if watermark is not None and watermark.is_known(it["href"]):
+                        progress.add(known=1)
+                        if watermark.reached:
+                            # дальше по дате только то, что уже есть в БД
+                            return
+                        continue
+                    yield it
                 if throttle_sec:
                     await asyncio.sleep(throttle_sec)
-                continue
-
-            # Параллельно тянем карточки
-            tasks = [asyncio.create_task(_fetch_detail_page(client, it["href"])) for it in items]
-            details = await asyncio.gather(*tasks, return_exceptions=True)
 
-            for it, det in zip(items, details):
-                if isinstance(det, Exception):
-                    # Если карточка упала — сохраним хотя бы из листинга
-                    description, deadline, posted_at, agency_from_detail = "", it["close_date"], it["posted_at"], it["agency"]
+        async def fetch_detail(it: Dict) -> Tuple[Dict, Any]:
+            # стадия 2: карточка через кеш; ошибку не бросаем — сохраним хотя бы данные листинга
+            try:
+                res = await cache.fetch(client, it["href"], scheduler=scheduler, timeout=40)
+            except Exception as e:
+                progress.add(failed=1)
+                return it, e
+            progress.add(fetched=1)
+            return it, res
+
+        async def parse(fetched: Tuple[Dict, Any]) -> GrantCreate:
+            # стадия 3: разбор карточки (или результат из кеша) и сборка DTO
+            it, res = fetched
+            if isinstance(res, Exception):
+                description, deadline, posted_at, agency_from_detail = "", it["close_date"], it["posted_at"], it["agency"]
+            else:
+                if res.unchanged:
+                    det = res.parsed
                 else:
-                    description, deadline_d, posted_at_d, agency_from_detail = det
-                    # приоритет: deadline из карточки > из листинга; published_at: posted из карточки > из листинга
-                    deadline = deadline_d or it["close_date"]
-                    posted_at = posted_at_d or it["posted_at"]
-
-                provider = agency_from_detail or it["agency"]
-
-                grant_obj = _to_grant_create(
-                    title=it["title"],
-                    description=description,
-                    source_url=it["href"],  # можно заменить на Grants.gov link, но этот стабильно работает
-                    deadline=deadline,
-                    published_at=posted_at,
-                    provider=provider,
-                )
-
-                try:
-                    new_grant = await grant_service.create_grant(grant_obj, session)
-                    created_ids.append(new_grant.id)
-                except Exception:
-                    # На случай уникальности по title+source_url и т.п. — просто пропустим
-                    pass
-
-            if throttle_sec:
-                await asyncio.sleep(throttle_sec)
+                    det = await run_parse(_parse_detail_page, res.text)
+                    await res.commit(det)
+                description, deadline_text, posted_text, agency_from_detail = det
+                deadline_d, posted_at_d = parse_dates((deadline_text, posted_text))
+                # приоритет: deadline из карточки > из листинга; published_at: posted из карточки > из листинга
+                deadline = deadline_d or it["close_date"]
+                posted_at = posted_at_d or it["posted_at"]
+
+            progress.add(parsed=1)
+            return _to_grant_create(
+                title=it["title"],
+                description=description,
+                source_url=it["href"],  # можно заменить на Grants.gov link, но этот стабильно работает
+                deadline=deadline,
+                published_at=posted_at,
+                provider=agency_from_detail or it["agency"],
+            )
+
+        async def persist(batch: List[GrantCreate]) -> None:
+            # стадия 4: пачка — одним INSERT ... ON CONFLICT (title, source_url) DO UPDATE
+            part = await grant_service.bulk_upsert(batch, session)
+            merge_upsert_stats(stats, part)
+            progress.add(inserted=len(part["inserted"]), updated=len(part["updated"]), unchanged=part["unchanged"])
+
+        progress.pipeline = await run_pipeline(
+            discover(),
+            [
+                Stage("detail", fetch_detail, concurrency=policy.max_concurrency),
+                Stage("parse", parse, concurrency=PARSE_CONCURRENCY),
+            ],
+            persist,
+            batch_size=PERSIST_BATCH_SIZE,
+        )
 
-    return created_ids
+    progress.flush()
+    return stats
 
 
 # Удобная обвязка для ручного запуска из консоли:
-async def import_simpler_grants(pages: int = 1, start_page: int = 1) -> List[int]:
+async def import_simpler_grants(pages: int = 1, start_page: int = 1) -> Dict[str, Any]:
     """
     Пример: asyncio.run(import_simpler_grants(pages=2))
     """
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.parsers.fetch_scheduler import FetchScheduler
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheEntry:
+    """
+    То, что храним на диске для одного URL: валидаторы, хеш тела и уже распарсенный результат.
+    parsed должен сериализоваться в JSON; значения, зависящие от момента обхода (даты без года),
+    храним сырым текстом и разрешаем уже после чтения из кеша.
+    """
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body_hash: str
+    parsed: Any
+    parser_version: int
+    fetched_at: datetime = field(default_factory=datetime.utcnow)
+
+
+@dataclass
+class CachedResponse:
+    """
+    Результат ResponseCache.fetch.
+    unchanged=True — сервер ответил 304 или тело побайтно совпало с прошлым: parsed можно брать как есть.
+    Иначе — парсим text и сохраняем результат через commit(parsed).
+    """
+    url: str
+    status_code: int
+    text: str
+    body_hash: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    unchanged: bool
+    parsed: Any
+    _cache: "ResponseCache"
+
+    async def commit(self, parsed: Any) -> None:
+        if self.unchanged or self.body_hash is None:
+            return
+        self.parsed = parsed
+        await self._cache.asave(self.url, CacheEntry(
+            etag=self.etag,
+            last_modified=self.last_modified,
+            body_hash=self.body_hash,
+            parsed=parsed,
+            parser_version=self._cache.parser_version,
+        ))
+
+
+class ResponseCache:
+    """
+    Дисковый кеш ответов краулера, ключ — URL.
+    Повторный обход шлёт If-None-Match / If-Modified-Since; на 304 или совпавший sha256 тела
+    возвращает прошлый результат парсинга, не разбирая HTML заново.
+    Записи — JSON-файлы; чтение/запись идут в пуле потоков (asyncio.to_thread), не блокируя event loop.
+    parser_version: при изменении парсера поднимаем — старые записи перестают считаться валидными.
+    """
+
+    def __init__(self, namespace: str, parser_version: int = 1, directory: Optional[str] = None) -> None:
+        self.directory = os.path.join(directory or settings.CRAWLER_CACHE_DIR, namespace)
+        self.parser_version = parser_version
+        self.stats: Dict[str, int] = {"not_modified": 0, "same_body": 0, "miss": 0}
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def load(self, url: str) -> Optional[CacheEntry]:
+        try:
+            with open(self._path(url), encoding="utf-8") as f:
+                data = json.load(f)
+            data["fetched_at"] = datetime.fromisoformat(data["fetched_at"])
+            entry = CacheEntry(**data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # битый/несовместимый файл — просто перекачаем
+            logger.warning("Crawler cache entry for %s is unreadable: %s", url, e)
+            return None
+        if entry.parser_version != self.parser_version:
+            return None
+        return entry
+
+    def save(self, url: str, entry: CacheEntry) -> None:
+        # пишем во временный файл и атомарно подменяем — параллельный обход не увидит половину записи
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({**dataclasses.asdict(entry), "fetched_at": entry.fetched_at.isoformat()}, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(url))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    async def aload(self, url: str) -> Optional[CacheEntry]:
+        return await asyncio.to_thread(self.load, url)
+
+    async def asave(self, url: str, entry: CacheEntry) -> None:
+        await asyncio.to_thread(self.save, url, entry)
+
+    async def fetch(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        scheduler: Optional["FetchScheduler"] = None,
+        **kwargs,
+    ) -> CachedResponse:
+        """
+        GET с условными заголовками из кеша (через scheduler, если передан).
+        Ошибочные статусы пробрасываются как httpx.HTTPStatusError.
+        """
+        entry = await self.aload(url)
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        if scheduler is not None:
+            resp = await scheduler.get(client, url, headers=headers, **kwargs)
+        else:
+            resp = await client.get(url, headers=headers, **kwargs)
+
+        if resp.status_code == httpx.codes.NOT_MODIFIED and entry is not None:
+            self.stats["not_modified"] += 1
+            return CachedResponse(
+                url=url,
+                status_code=resp.status_code,
+                text="",
+                body_hash=entry.body_hash,
+                etag=resp.headers.get("etag") or entry.etag,
+                last_modified=resp.headers.get("last-modified") or entry.last_modified,
+                unchanged=True,
+                parsed=entry.parsed,
+                _cache=self,
+            )
+
+        resp.raise_for_status()
+
+        body_hash = hashlib.sha256(resp.content).hexdigest()
+        etag = resp.headers.get("etag")
+        last_modified = resp.headers.get("last-modified")
+
+        if entry is not None and entry.body_hash == body_hash:
+            # сервер не умеет в 304, но тело то же — парсить незачем; обновим только валидаторы
+            self.stats["same_body"] += 1
+            if (etag, last_modified) != (entry.etag, entry.last_modified):
+                entry.etag, entry.last_modified = etag, last_modified
+                await self.asave(url, entry)
+            return CachedResponse(
+                url=url,
+                status_code=resp.status_code,
+                text=resp.text,
+                body_hash=body_hash,
+                etag=etag,
+                last_modified=last_modified,
+                unchanged=True,
+                parsed=entry.parsed,
+                _cache=self,
+            )
+
+        self.stats["miss"] += 1
+        return CachedResponse(
+            url=url,
+            status_code=resp.status_code,
+            text=resp.text,
+            body_hash=body_hash,
+            etag=etag,
+            last_modified=last_modified,
+            unchanged=False,
+            parsed=None,
+            _cache=self,
+        )
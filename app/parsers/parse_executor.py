@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from bs4 import BeautifulSoup
+
+from app.core.config import settings
+
+# Бэкенд BeautifulSoup: "html.parser" (stdlib) или "lxml" (C, заметно быстрее на больших страницах)
+HTML_PARSER = settings.CRAWLER_HTML_PARSER
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def make_soup(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+def _pool_size() -> int:
+    workers = settings.CRAWLER_PARSE_WORKERS
+    if workers is None:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _mp_context() -> multiprocessing.context.BaseContext:
+    # fork из процесса, где уже крутятся event loop и потоки, небезопасен: дочерние процессы
+    # запускаем через forkserver (где его нет — spawn)
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def get_parse_executor() -> Optional[ProcessPoolExecutor]:
+    """
+    Ленивый пул процессов для парсинга HTML (размер — по числу ядер или CRAWLER_PARSE_WORKERS).
+    None, если пул выключен (CRAWLER_PARSE_WORKERS=0) или мы сами в daemon-процессе
+    (воркер Celery prefork) — там дочерние процессы запрещены. Поэтому очередь etl, где пул нужен,
+    обслуживает воркер с --pool solo (см. app.celery_tasks).
+    """
+    global _executor
+    if _executor is None:
+        if _pool_size() <= 0 or multiprocessing.current_process().daemon:
+            return None
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(max_workers=_pool_size(), mp_context=_mp_context())
+    return _executor
+
+
+async def run_parse(fn: Callable[..., Any], *args: Any) -> Any:
+    """
+    Выполняет fn(*args) вне event loop: в пуле процессов, а без пула — в потоке.
+    fn должна быть функцией уровня модуля, принимать сырой HTML и возвращать простые данные (dict/tuple/list),
+    чтобы и аргументы, и результат сериализовались pickle.
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_parse_executor()
+    if executor is None:
+        return await asyncio.to_thread(fn, *args)
+    try:
+        return await loop.run_in_executor(executor, fn, *args)
+    except BrokenProcessPool:
+        # воркер умер (OOM и т.п.) — следующий вызов поднимет пул заново
+        shutdown_parse_executor(wait=False)
+        raise
+
+
+def shutdown_parse_executor(wait: bool = True) -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Dict, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Маркер конца потока в очереди между стадиями
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    Стадия конвейера: fn(item) -> результат для следующей стадии (None — элемент отброшен).
+    concurrency — сколько воркеров стадии работает одновременно.
+    """
+    name: str
+    fn: Callable[[Any], Awaitable[Any]]
+    concurrency: int = 1
+
+
+@dataclass
+class StageStats:
+    processed: int = 0
+    dropped: int = 0
+    # суммарное время внутри fn по всем воркерам стадии
+    busy_sec: float = 0.0
+
+
+@dataclass
+class PipelineStats:
+    stages: Dict[str, StageStats] = field(default_factory=dict)
+    persisted: int = 0
+    elapsed_sec: float = 0.0
+
+
+async def run_pipeline(
+    source: AsyncIterable[Any],
+    stages: Sequence[Stage],
+    sink: Callable[[List[Any]], Awaitable[None]],
+    batch_size: int = 100,
+    queue_size: int = 64,
+) -> PipelineStats:
+    """
+    source -> stages[0] -> ... -> stages[-1] -> sink(batch).
+    Стадии связаны ограниченными очередями (queue_size): быстрая стадия упирается в медленную
+    и ждёт (backpressure), а не копит всё в памяти. Все стадии работают одновременно,
+    так что время обхода стремится ко времени самой медленной стадии, а не к их сумме.
+    sink вызывается одним воркером (сессия БД не потокобезопасна) пачками по batch_size.
+    Исключение в любой стадии отменяет весь конвейер и пробрасывается наружу.
+    """
+    stats = PipelineStats(stages={s.name: StageStats() for s in stages})
+    queues: List[asyncio.Queue] = [asyncio.Queue(maxsize=queue_size) for _ in range(len(stages) + 1)]
+
+    def consumers(i: int) -> int:
+        # сколько воркеров читают очередь i (последнюю читает единственный sink)
+        return stages[i].concurrency if i < len(stages) else 1
+
+    async def close(i: int) -> None:
+        for _ in range(consumers(i)):
+            await queues[i].put(_DONE)
+
+    async def produce() -> None:
+        async for item in source:
+            await queues[0].put(item)
+        await close(0)
+
+    async def worker(i: int) -> None:
+        stage, inbox, outbox = stages[i], queues[i], queues[i + 1]
+        stage_stats = stats.stages[stage.name]
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            started = time.perf_counter()
+            result = await stage.fn(item)
+            stage_stats.busy_sec += time.perf_counter() - started
+            if result is None:
+                stage_stats.dropped += 1
+                continue
+            stage_stats.processed += 1
+            await outbox.put(result)
+
+    async def run_stage(i: int) -> None:
+        await asyncio.gather(*(worker(i) for _ in range(stages[i].concurrency)))
+        await close(i + 1)
+
+    async def persist() -> None:
+        batch: List[Any] = []
+        while True:
+            item = await queues[-1].get()
+            if item is _DONE:
+                break
+            batch.append(item)
+            if len(batch) >= batch_size:
+                await sink(batch)
+                stats.persisted += len(batch)
+                batch = []
+        if batch:
+            await sink(batch)
+            stats.persisted += len(batch)
+
+    started = time.perf_counter()
+    tasks = [
+        asyncio.create_task(produce()),
+        *(asyncio.create_task(run_stage(i)) for i in range(len(stages))),
+        asyncio.create_task(persist()),
+    ]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    stats.elapsed_sec = time.perf_counter() - started
+    logger.info(
+        "Pipeline done in %.1fs, persisted %d; stages: %s",
+        stats.elapsed_sec,
+        stats.persisted,
+        ", ".join(f"{name}={s.processed}/{s.busy_sec:.1f}s" for name, s in stats.stages.items()),
+    )
+    return stats
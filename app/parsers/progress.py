@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field, fields
+from typing import Callable, Dict, Optional
+
+from app.parsers.pipeline import PipelineStats
+
+
+@dataclass
+class EtlProgress:
+    """
+    Счётчики прогресса импорта. Импортёры увеличивают их по ходу конвейера,
+    а on_change (например, update_state задачи Celery) получает снимок не чаще раза в min_interval сек.
+    """
+    pages: int = 0
+    # строки листинга, пропущенные в инкрементальном режиме как уже известные
+    known: int = 0
+    fetched: int = 0
+    parsed: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    failed: int = 0
+
+    # статистика стадий конвейера (время в parse и т.п.) — заполняет импортёр по завершении
+    pipeline: Optional[PipelineStats] = field(default=None, repr=False, compare=False)
+
+    on_change: Optional[Callable[[Dict[str, int]], None]] = field(default=None, repr=False, compare=False)
+    min_interval: float = field(default=1.0, repr=False, compare=False)
+    _reported_at: float = field(default=0.0, repr=False, compare=False)
+
+    def add(self, **deltas: int) -> None:
+        for name, delta in deltas.items():
+            setattr(self, name, getattr(self, name) + delta)
+        now = time.monotonic()
+        if self.on_change is not None and now - self._reported_at >= self.min_interval:
+            self._reported_at = now
+            self.on_change(self.as_dict())
+
+    def flush(self) -> None:
+        if self.on_change is not None:
+            self._reported_at = time.monotonic()
+            self.on_change(self.as_dict())
+
+    def as_dict(self) -> Dict[str, int]:
+        return {f.name: getattr(self, f.name) for f in fields(self) if f.name in _COUNTERS}
+
+
+_COUNTERS = frozenset(("pages", "known", "fetched", "parsed", "inserted", "updated", "unchanged", "failed"))
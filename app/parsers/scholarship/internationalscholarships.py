@@ -1,20 +1,40 @@
 from __future__ import annotations
-import asyncio
+import os
 import re
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import List, Optional
 from urllib.parse import urljoin, quote_plus
 
 import httpx
-from bs4 import BeautifulSoup, Tag
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.dates import parse_date
+from app.parsers.fetch_scheduler import FetchScheduler, HostPolicy
+from app.parsers.http_cache import CachedResponse, ResponseCache
+from app.parsers.document import PageDocument, clean_text, has_ancestor, has_classes, section_map
+from app.parsers.parse_executor import run_parse
+from app.parsers.pipeline import Stage, run_pipeline
+from app.parsers.progress import EtlProgress
+from app.parsers.watermark import DEFAULT_STOP_AFTER_KNOWN, KnownUrls, Watermark
 from app.schemes.scholarship import ScholarshipCreate
 from app.services.scholarshipService import ScholarshipService
+from app.services.opportunityService import empty_upsert_stats, merge_upsert_stats
 
 BASE = "https://www.internationalscholarships.com"
 LIST_PRIMARY = "/scholarships"  # нормализованный листинг
 
+# Лимиты запросов к сайту: без них per_page=1000 давал тысячу одновременных запросов и 429
+FETCH_POLICY = HostPolicy(max_concurrency=4, rate=4.0, burst=4)
+
+# Строк в одном bulk_upsert на стадии записи
+PERSIST_BATCH_SIZE = 100
+
+# Одновременных задач парсинга: сам разбор идёт в пуле процессов, так что держим по задаче на ядро
+PARSE_CONCURRENCY = os.cpu_count() or 1
+
+# Поднимать при любом изменении _parse_detail — иначе из кеша вернутся старые результаты
+DETAIL_PARSER_VERSION = 2
+
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
@@ -24,127 +44,23 @@ HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
 }
 
-MONTHS = {
-    "jan": 1, "january": 1,
-    "feb": 2, "february": 2,
-    "mar": 3, "march": 3,
-    "apr": 4, "april": 4,
-    "may": 5,
-    "jun": 6, "june": 6,
-    "jul": 7, "july": 7,
-    "aug": 8, "august": 8,
-    "sep": 9, "sept": 9, "september": 9,
-    "oct": 10, "october": 10,
-    "nov": 11, "november": 11,
-    "dec": 12, "december": 12,
-}
+# Регулярки компилируем один раз на модуль (и на процесс пула парсинга)
+_UNRESTRICTED_RE = re.compile(r"\bunrestricted\b", re.I)
+_YEAR_RE = re.compile(r"\b((?:19|20)\d{2})\b")
+
+# Подписи h4 на карточке
+_DEADLINE_LABELS = ("deadline",)
+_COUNTRY_LABELS = (
+    "you must be studying in", "host countries", "country of study", "You must be from one of the following countries",
+)
 
 # utils
 
-def _clean_text(x: str | None) -> str:
-    if not x:
-        return ""
-    return re.sub(r"\s+", " ", x).strip()
+_clean_text = clean_text
 
 def _abs(url: str) -> str:
     return url if url.startswith("http") else urljoin(BASE, url)
 
-def _nearest_future_date(month: int, day: int) -> Optional[datetime]:
-    now = datetime.now(timezone.utc).astimezone().replace(tzinfo=None)
-    year = now.year
-    try:
-        candidate = datetime(year, month, day)
-    except ValueError:
-        return None
-    if candidate < now:
-        try:
-            candidate = datetime(year + 1, month, day)
-        except ValueError:
-            return None
-    return candidate
-
-def _parse_human_date(s: str) -> Optional[datetime]:
-    """
-    Поддерживает:
-      - 'Deadline: October 15, 2025'
-      - '15 October 2025'
-      - 'Oct 31' / '31 Oct' (без года → ближайшее будущее)
-      - '12/31/2025'
-      - 'Varies/Open/Rolling/Until filled' -> None
-    """
-    if not s:
-        return None
-    txt = s.strip()
-    if re.search(r"\b(varies|open|ongoing|rolling|until\s+filled)\b", txt, re.I):
-        return None
-
-    # убрать префиксы (Deadline: ...)
-    txt = re.sub(r"(?i)^.*deadline:\s*", "", txt).strip()
-
-    # Month Day, Year  |  Month Day Year
-    m = re.search(r"(?i)\b([A-Za-z]{3,9})\s+(\d{1,2})(?:st|nd|rd|th)?(?:,)?\s+(\d{4})\b", txt)
-    if m:
-        month = MONTHS.get(m.group(1).lower())
-        day = int(m.group(2))
-        year = int(m.group(3))
-        if month:
-            try:
-                return datetime(year, month, day)
-            except ValueError:
-                return None
-
-    # Day Month Year
-    m = re.search(r"(?i)\b(\d{1,2})\s+([A-Za-z]{3,9})(?:,)?\s+(\d{4})\b", txt)
-    if m:
-        day = int(m.group(1))
-        month = MONTHS.get(m.group(2).lower())
-        year = int(m.group(3))
-        if month:
-            try:
-                return datetime(year, month, day)
-            except ValueError:
-                return None
-
-    # MM/DD/YYYY
-    m = re.search(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b", txt)
-    if m:
-        mm, dd, yyyy = map(int, m.groups())
-        try:
-            return datetime(yyyy, mm, dd)
-        except ValueError:
-            return None
-
-    # Month Day (без года)
-    m = re.search(r"(?i)\b([A-Za-z]{3,9})\s+(\d{1,2})(?:st|nd|rd|th)?\b", txt)
-    if m:
-        month = MONTHS.get(m.group(1).lower())
-        day = int(m.group(2))
-        if month:
-            return _nearest_future_date(month, day)
-
-    # Day Month (без года)
-    m = re.search(r"(?i)\b(\d{1,2})\s+([A-Za-z]{3,9})\b", txt)
-    if m:
-        day = int(m.group(1))
-        month = MONTHS.get(m.group(2).lower())
-        if month:
-            return _nearest_future_date(month, day)
-
-    return None
-
-def _text_h4_value_block(container: Tag, label_contains: list[str]) -> Optional[str]:
-    """
-    На карточке поля идут парами <h4>Label</h4><p>Value</p>.
-    Ищем h4 по подстроке и забираем текст следующего p.
-    """
-    for h4 in container.select("h4"):
-        lab = _clean_text(h4.get_text(" ", strip=True)).lower()
-        if any(kw in lab for kw in label_contains):
-            p = h4.find_next_sibling("p")
-            if p:
-                return _clean_text(p.get_text(" ", strip=True))
-    return None
-
 def _normalize_list_url(details: int, per_page: int = 40, page: int = 1) -> str:
     """Всегда строим URL на новый листинг /scholarships с нужными параметрами."""
     params = [
@@ -157,19 +73,31 @@ def _normalize_list_url(details: int, per_page: int = 40, page: int = 1) -> str:
 
 # listing parsers
 
-def _parse_listing(html: str) -> list[dict]:
-    soup = BeautifulSoup(html, "html.parser")
+def _parse_listing(doc: PageDocument) -> list[dict]:
     items: list[dict] = []
 
-    for a in soup.select('table.table.table-v2 tbody tr td:nth-of-type(1) a[href^="/scholarships/"]'):
-        href = (a.get("href") or "").strip()
-        title = _clean_text(a.get_text(" ", strip=True)) or "Untitled"
-        if href:
-            items.append({"title": title, "url": _abs(href)})
+    # table.table.table-v2 tbody tr td:nth-of-type(1) a[href^="/scholarships/"]
+    for table in doc.with_class("table-v2", "table"):
+        if not has_classes(table, "table"):
+            continue
+        for tbody in table.find_all("tbody"):
+            for tr in tbody.find_all("tr"):
+                td = tr.find("td", recursive=False)
+                if td is None:
+                    continue
+                for a in td.find_all("a", href=True):
+                    if not a["href"].startswith("/scholarships/"):
+                        continue
+                    href = a["href"].strip()
+                    title = _clean_text(a.get_text(" ", strip=True)) or "Untitled"
+                    if href:
+                        items.append({"title": title, "url": _abs(href)})
 
     if not items:
         # fallback
-        for a in soup.find_all("a", href=True):
+        for a in doc.tags("a"):
+            if not a.has_attr("href"):
+                continue
             href = a["href"].strip()
             if href.startswith("/scholarships/"):
                 title = _clean_text(a.get_text(" ", strip=True)) or "Untitled"
@@ -184,65 +112,30 @@ def _parse_listing(html: str) -> list[dict]:
             seen.add(it["url"])
     return uniq
 
-def _next_page_url(html: str) -> Optional[str]:
-    soup = BeautifulSoup(html, "html.parser")
-    active = soup.select_one("ul.pagination li.page-item.active")
+def _next_page_url(doc: PageDocument) -> Optional[str]:
+    # ul.pagination li.page-item.active
+    active = doc.first(
+        li for li in doc.with_class("active", "li")
+        if has_classes(li, "page-item") and has_ancestor(li, "ul", "pagination")
+    )
     if active:
         nxt = active.find_next_sibling("li")
         if nxt:
             a = nxt.find("a", class_="page-link")
             if a and a.get("href"):
                 return _abs(a["href"])
-    # fallback
-    a = soup.select_one("li.pager-next a.page-link")
+    # fallback: li.pager-next a.page-link
+    a = doc.first(a for a in doc.with_class("page-link", "a") if has_ancestor(a, "li", "pager-next"))
     if a and a.get("href"):
         return _abs(a["href"])
     return None
 
-# detail helpers
-
-def _extract_section_text(desc_wrap: Tag, heading_text: str) -> str:
-    """
-    Берём ТОЛЬКО текст после нужного <h2> до следующего <h2>.
-    Возвращаем «плоский» текст (параграфы, br, списки — сведены к пробелам).
-    """
-    if not desc_wrap:
-        return ""
-    # найдём <h2> с нужным заголовком
-    h2 = None
-    for h in desc_wrap.select("h2"):
-        if _clean_text(h.get_text()).lower() == heading_text.lower():
-            h2 = h
-            break
-    if not h2:
-        return ""
-
-    chunks: list[str] = []
-    node = h2.next_sibling
-    while node:
-        if isinstance(node, Tag) and node.name == "h2":
-            break  # дошли до следующей секции
-        # собираем из p, li, br и просто текста
-        if isinstance(node, Tag):
-            # списки
-            if node.name in ("ul", "ol"):
-                for li in node.find_all("li"):
-                    chunks.append(_clean_text(li.get_text(" ", strip=True)))
-            # параграфы и прочее блочное
-            elif node.name in ("p", "div"):
-                chunks.append(_clean_text(node.get_text(" ", strip=True)))
-            # просто текст внутри
-            else:
-                chunks.append(_clean_text(node.get_text(" ", strip=True)))
-        else:
-            # NavigableString/прочий текст
-            text = _clean_text(str(node))
-            if text:
-                chunks.append(text)
-        node = node.next_sibling
+def _parse_listing_page(html: str) -> tuple[list[dict], Optional[str]]:
+    """Строки листинга и ссылка на следующую страницу — один разбор HTML, один вызов в пуле парсинга."""
+    doc = PageDocument(html)
+    return _parse_listing(doc), _next_page_url(doc)
 
-    text = _clean_text(" ".join([c for c in chunks if c]))
-    return text
+# detail helpers
 
 def _pick_level(text: str) -> Optional[str]:
     t = text.lower()
@@ -265,37 +158,35 @@ def _pick_level(text: str) -> Optional[str]:
 # detail parser
 
 def _parse_detail(html: str, url: str) -> dict:
-    soup = BeautifulSoup(html, "html.parser")
+    doc = PageDocument(html)
 
-    # title
-    h1 = soup.select_one("h1.title, h1, .page-title, .title")
+    # title: h1.title, h1, .page-title, .title
+    h1 = doc.first([*doc.tags("h1"), *doc.with_class("page-title"), *doc.with_class("title")])
     title = _clean_text(h1.get_text(" ", strip=True)) if h1 else "Untitled"
 
     # provider/author
-    author = soup.select_one(".author")
+    author = doc.first(doc.with_class("author"))
     provider = _clean_text(author.get_text(" ", strip=True)) if author else "InternationalScholarships.com"
 
-    # блок с описанием
-    desc_wrap = soup.select_one(".award-title .award-description")
+    # блок с описанием: .award-title .award-description
+    desc_wrap = doc.first(t for t in doc.with_class("award-description") if has_ancestor(t, cls="award-title"))
 
     # берём строго две секции: Description и Other Criteria (если есть)
-    desc_text = _extract_section_text(desc_wrap, "Description")
-    other_text = _extract_section_text(desc_wrap, "Other Criteria")
+    sections = section_map(desc_wrap)
+    desc_text = sections.get("description", "")
+    other_text = sections.get("other criteria", "")
     if desc_text and other_text:
         description = f"Description: {desc_text}\nOther Criteria: {other_text}"
     else:
         description = desc_text or other_text or ""
 
     # пары <h4>…</h4><p>…</p>
-    deadline_txt = _text_h4_value_block(soup, ["deadline"])
-    deadline = _parse_human_date(deadline_txt or "")
+    # срок — сырым текстом: результат кешируется, а 'March 15' без года разрешается относительно момента обхода
+    deadline_txt = doc.label_value(_DEADLINE_LABELS)
 
-    host_countries = _text_h4_value_block(
-        soup,
-        ["you must be studying in", "host countries", "country of study", "You must be from one of the following countries"]
-    )
+    host_countries = doc.label_value(_COUNTRY_LABELS)
     country_val = _clean_text(host_countries) if host_countries else None
-    country = None if (country_val and re.search(r"\bunrestricted\b", country_val, re.I)) else country_val
+    country = None if (country_val and _UNRESTRICTED_RE.search(country_val)) else country_val
 
     # эвристика уровня
     level = _pick_level(" ".join([title, description]))
@@ -304,7 +195,7 @@ def _parse_detail(html: str, url: str) -> dict:
         "title": title,
         "description": description,
         "provider": provider,
-        "deadline": deadline,
+        "deadline_text": deadline_txt,
         "country": country,
         "source_url": url,
         "language": "en",
@@ -324,97 +215,134 @@ async def fetch_scholarships_from_internationalscholarships(
     per_page: int = 40,
     dry_run: bool = False,
     skip_past_years: bool = True,
-) -> list[int] | list[str]:
+    start_page: int = 1,
+    progress: Optional[EtlProgress] = None,
+    incremental: bool = False,
+    stop_after_known: int = DEFAULT_STOP_AFTER_KNOWN,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+    fetch_policy: Optional[HostPolicy] = None,
+) -> dict | list[str]:
     """
-    Качаем листинг (/scholarships), обходим карточки и сохраняем.
-    Возвращаем список id вставленных записей, либо (в dry_run) список "title :: url".
+    Качаем листинг (/scholarships), обходим карточки и сохраняем — конвейером
+    листинг -> карточки -> парсинг -> пакетный upsert (стадии работают одновременно).
+    Возвращаем {"inserted": [id...], "updated": [id...], "unchanged": int}, либо (в dry_run) список "title :: url".
+    progress — счётчики для наблюдения за ходом импорта (фоновая задача ETL).
+    incremental — уже известные URL не качаем (и не считаем в max_items),
+    а после stop_after_known известных подряд перестаём листать.
+    transport — подмена HTTP-транспорта (запись/воспроизведение корпуса в benchmarks/).
+    fetch_policy — подмена FETCH_POLICY (воспроизведение корпуса идёт без лимитов сайта).
     """
     service = ScholarshipService()
-    created: List[int] = []
+    progress = progress or EtlProgress()
+    cache = ResponseCache("internationalscholarships", parser_version=DETAIL_PARSER_VERSION)
+    policy = fetch_policy or FETCH_POLICY
+    scheduler = FetchScheduler({"www.internationalscholarships.com": policy}, default=policy)
+    watermark = None
+    if incremental:
+        known = await KnownUrls.load(service, session, prefix=BASE)
+        watermark = Watermark(known, stop_after_known=stop_after_known)
+    stats = empty_upsert_stats()
     preview: List[str] = []
-
-    next_url = _normalize_list_url(details=details, per_page=per_page, page=1)
-
-    async with httpx.AsyncClient(timeout=30, headers=HEADERS) as client:
-        grabbed = 0
-        for _ in range(max_pages):
-            r = await client.get(next_url)
-            r.raise_for_status()
-
-            items = _parse_listing(r.text)
-            if not items:
-                # на всякий — сохраним дамп
-                try:
-                    with open("intl_list_dump.html", "w", encoding="utf-8") as f:
-                        f.write(r.text[:200_000])
-                except Exception:
-                    pass
-                break
-
-            remain = max_items - grabbed
-            if remain <= 0:
-                break
-            batch = items[:remain]
-            grabbed += len(batch)
-
-            async def fetch_one(u: str) -> tuple[str, str] | Exception:
-                try:
-                    await asyncio.sleep(0.25)
-                    resp = await client.get(u)
-                    resp.raise_for_status()
-                    return u, resp.text
-                except Exception as e:
-                    return e
-
-            pages = await asyncio.gather(
-                *(asyncio.create_task(fetch_one(it["url"])) for it in batch),
-                return_exceptions=True
-            )
-
-            for p in pages:
-                if isinstance(p, Exception) or not isinstance(p, tuple):
-                    continue
-
-                url, html = p
-                data = _parse_detail(html, url)
-
-                # фильтр по году в title — если указан только прошедший год, пропускаем
-                if skip_past_years:
-                    now_year = datetime.now().year
-                    years = [int(y) for y in re.findall(r"\b((?:19|20)\d{2})\b", data["title"])]
-                    if years and max(years) < now_year:
+    now_year = datetime.now().year
+
+    async with httpx.AsyncClient(timeout=30, headers=HEADERS, transport=transport) as client:
+
+        async def discover():
+            # стадия 1: страницы листинга, пока не наберём max_items
+            next_url = _normalize_list_url(details=details, per_page=per_page, page=start_page)
+            grabbed = 0
+            for _ in range(max_pages):
+                r = await scheduler.get(client, next_url)
+                r.raise_for_status()
+
+                items, nxt = await run_parse(_parse_listing_page, r.text)
+                progress.add(pages=1)
+                if not items:
+                    # на всякий — сохраним дамп
+                    try:
+                        with open("intl_list_dump.html", "w", encoding="utf-8") as f:
+                            f.write(r.text[:200_000])
+                    except Exception:
+                        pass
+                    return
+
+                for it in items:
+                    if grabbed >= max_items:
+                        return
+                    if watermark is not None and watermark.is_known(it["url"]):
+                        progress.add(known=1)
+                        if watermark.reached:
+                            # дальше по дате только то, что уже есть в БД
+                            return
                         continue
+                    grabbed += 1
+                    yield it
+                if grabbed >= max_items:
+                    return
 
-                if dry_run:
-                    preview.append(f'{data["title"]} :: {url}')
-                    continue
-
-                dto = ScholarshipCreate(
-                    title=data["title"],
-                    description=data["description"],
-                    source_url=data["source_url"],
-                    deadline=data["deadline"],
-                    published_at=data["published_at"],
-                    country=data["country"],
-                    region=data["region"],
-                    language=data["language"],
-                    provider=data["provider"],
-                    image_url=data["image_url"],
-                    level=data["level"],
-                )
-                try:
-                    obj = await service.create_scholarship(dto, session)
-                    created.append(obj.id)
-                except Exception:
-                    # дубль/уникальный индекс — пропускаем
-                    continue
+                if not nxt:
+                    return
+                next_url = nxt
 
-            if grabbed >= max_items:
-                break
+        async def fetch_detail(it: dict) -> CachedResponse | None:
+            # стадия 2: карточка через кеш; упавшие карточки пропускаем
+            try:
+                res = await cache.fetch(client, it["url"], scheduler=scheduler)
+            except Exception:
+                progress.add(failed=1)
+                return None
+            progress.add(fetched=1)
+            return res
+
+        async def parse(res: CachedResponse) -> ScholarshipCreate | None:
+            # стадия 3: разбор (или результат из кеша) и фильтры
+            if res.unchanged:
+                # 304 / то же тело — парсинг пропускаем
+                data = res.parsed
+            else:
+                data = await run_parse(_parse_detail, res.text, res.url)
+                await res.commit(data)
+            progress.add(parsed=1)
+
+            # фильтр по году в title — если указан только прошедший год, пропускаем
+            if skip_past_years:
+                years = [int(y) for y in _YEAR_RE.findall(data["title"])]
+                if years and max(years) < now_year:
+                    return None
+
+            if dry_run:
+                preview.append(f'{data["title"]} :: {res.url}')
+                return None
 
-            nxt = _next_page_url(r.text)
-            if not nxt:
-                break
-            next_url = nxt
+            return ScholarshipCreate(
+                title=data["title"],
+                description=data["description"],
+                source_url=data["source_url"],
+                deadline=parse_date(data["deadline_text"]),
+                published_at=data["published_at"],
+                country=data["country"],
+                region=data["region"],
+                language=data["language"],
+                provider=data["provider"],
+                image_url=data["image_url"],
+                level=data["level"],
+            )
 
-    return preview if dry_run else created
+        async def persist(batch: List[ScholarshipCreate]) -> None:
+            # стадия 4: пачка — одним INSERT ... ON CONFLICT (title, source_url) DO UPDATE
+            part = await service.bulk_upsert(batch, session)
+            merge_upsert_stats(stats, part)
+            progress.add(inserted=len(part["inserted"]), updated=len(part["updated"]), unchanged=part["unchanged"])
+
+        progress.pipeline = await run_pipeline(
+            discover(),
+            [
+                Stage("detail", fetch_detail, concurrency=policy.max_concurrency),
+                Stage("parse", parse, concurrency=PARSE_CONCURRENCY),
+            ],
+            persist,
+            batch_size=PERSIST_BATCH_SIZE,
+        )
+
+    progress.flush()
+    return preview if dry_run else stats
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+from typing import AsyncIterable, Iterable, List, Optional
+
+import numpy as np
+from pydantic import HttpUrl, TypeAdapter, ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.services.opportunityService import OpportunityService
+
+_HTTP_URL = TypeAdapter(HttpUrl)
+
+# Сколько подряд уже известных строк листинга считаем «водоразделом»: дальше идут только старые записи
+DEFAULT_STOP_AFTER_KNOWN = 40
+
+# Отпечатков в промежуточном list при загрузке, прежде чем слить их в массив
+_EXTEND_CHUNK = 65536
+
+
+def normalize_url(url: str) -> str:
+    """Та же нормализация, что у source_url при записи (HttpUrl), чтобы URL листинга совпадал с URL в БД."""
+    try:
+        return str(_HTTP_URL.validate_python(url))
+    except ValidationError:
+        return url
+
+
+def _url_key(url: str) -> int:
+    # 64-битный отпечаток вместо строки, коллизии пренебрежимо редки
+    return int.from_bytes(hashlib.blake2b(normalize_url(url).encode(), digest_size=8).digest(), "big")
+
+
+class KnownUrls:
+    """
+    Компактное множество уже сохранённых source_url одного источника:
+    отсортированный np.uint64-массив отпечатков (8 байт на URL), поиск — searchsorted.
+    """
+
+    def __init__(self, urls: Iterable[str] = ()) -> None:
+        self._keys = np.unique(np.fromiter((_url_key(u) for u in urls), dtype=np.uint64))
+
+    @classmethod
+    async def load(cls, service: OpportunityService, session: AsyncSession, prefix: Optional[str] = None) -> "KnownUrls":
+        known = cls()
+        await known.extend(service.iter_source_urls(session, prefix=prefix))
+        return known
+
+    async def extend(self, urls: AsyncIterable[str]) -> None:
+        # копим кусками, а не set из int (~70 байт на элемент), и сливаем одним unique (он же сортирует)
+        chunks: List[np.ndarray] = [self._keys]
+        buffer: List[int] = []
+        async for url in urls:
+            buffer.append(_url_key(url))
+            if len(buffer) >= _EXTEND_CHUNK:
+                chunks.append(np.array(buffer, dtype=np.uint64))
+                buffer.clear()
+        chunks.append(np.array(buffer, dtype=np.uint64))
+        self._keys = np.unique(np.concatenate(chunks))
+
+    def __contains__(self, url: str) -> bool:
+        key = np.uint64(_url_key(url))
+        i = int(np.searchsorted(self._keys, key))
+        return i < len(self._keys) and self._keys[i] == key
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class Watermark:
+    """
+    Инкрементальный обход: известные URL пропускаем без похода в карточку,
+    а после stop_after_known известных подряд (листинг отсортирован по дате) прекращаем листать.
+    """
+
+    def __init__(self, known: KnownUrls, stop_after_known: int = DEFAULT_STOP_AFTER_KNOWN) -> None:
+        self.known = known
+        self.stop_after_known = stop_after_known
+        self.consecutive_known = 0
+
+    def is_known(self, url: str) -> bool:
+        if url in self.known:
+            self.consecutive_known += 1
+            return True
+        self.consecutive_known = 0
+        return False
+
+    @property
+    def reached(self) -> bool:
+        return self.consecutive_known >= self.stop_after_known
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from app.models.recommendation import ItemType
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from datetime import datetime
 
@@ -15,4 +15,14 @@ class RecommendationCreate(BaseModel):
 class RecommendationRead(RecommendationCreate):
     id: UUID
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+class RecommendationBulkReplace(BaseModel):
+    source_model: str
+    recommendations: List[RecommendationCreate]
+    # чьи наборы заменить; по умолчанию — пользователи из recommendations
+    user_ids: Optional[List[UUID]] = None
+
+class RecommendationBulkResult(BaseModel):
+    deleted: int
+    inserted: List[UUID]
@@ -1,20 +1,22 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
 from app.schemes import internship
-from sqlmodel import select, desc
 from app.models.internship import Internship
+from app.services.opportunityService import OpportunityService
 from datetime import datetime
 
 
-class InternshipService:
-    async def get_all_internships(self, session: AsyncSession):
-        statement = select(Internship).order_by(desc(Internship.created_at))
+class InternshipService(OpportunityService):
+    model = Internship
 
-        result = await session.exec(statement)
-        
-        return result.all()
+    async def get_all_internships(self, session: AsyncSession, page: int = 1, page_size: int = 20, **filters):
+        """
+        Страница стажировок: (items, total, next_cursor).
+        filters — те же, что у OpportunityService.list_opportunities (q, provider, country, deadline_*, ...).
+        """
+        return await self.list_opportunities(session, page=page, page_size=page_size, **filters)
     
     async def get_internship(self, internship_id:int, session: AsyncSession):
-        statement = select(Internship).where(Internship.id == internship_id)
+        statement = self._select_model().where(Internship.id == internship_id)
 
         result = await session.exec(statement)
 
@@ -26,30 +28,8 @@ class InternshipService:
             return None
 
     async def create_internship(self, internship_data: internship.InternshipBase ,session: AsyncSession):
-        internship_data_dict = internship_data.model_dump()
-
-        internship_data_dict['source_url'] = str(internship_data_dict['source_url'])
-        if internship_data_dict.get('image_url'):
-            internship_data_dict['image_url'] = str(internship_data_dict['image_url'])
-
-        if internship_data_dict.get('published_at'):
-            internship_data_dict['published_at'] = internship_data_dict['published_at'].replace(tzinfo=None)
-        if internship_data_dict.get('deadline'):
-            internship_data_dict['deadline'] = internship_data_dict['deadline'].replace(tzinfo=None)
-
-
-        new_internship = Internship(
-            **internship_data_dict
-        )
-
-        # new_internship.published_at = datetime.strptime(internship_data_dict['published_at'], "%Y-%m-%d")
-        # new_internship.deadline = datetime.strptime(internship_data_dict['deadline'], "%Y-%m-%d")
-
-        session.add(new_internship)
-
-        await session.commit()
-        
-        return new_internship
+        # Дедупликация по (title, source_url): вставка, обновление при изменённом контенте или no-op
+        return await self.upsert_one(internship_data, session)
 
     async def update_internship(self, internship_id:int, update_data:internship.InternshipUpdate ,session: AsyncSession):
         internship_to_update = await self.get_internship(internship_id, session)
@@ -62,6 +42,8 @@ class InternshipService:
         for k,v in update_data_dict.items():
             setattr(internship_to_update, k, v)
 
+        internship_to_update.updated_at = datetime.utcnow()
+
         await session.commit()
 
         return internship_to_update
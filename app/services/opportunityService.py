@@ -0,0 +1,604 @@
+from __future__ import annotations
+import base64
+import hashlib
+import json
+from typing import Any, AsyncIterator, ClassVar, Dict, Iterable, List, Optional, Tuple, Type
+from datetime import datetime, date
+
+from pydantic import BaseModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel import SQLModel, select, desc, asc
+from sqlalchemy import bindparam, case, cast, func, or_, and_, literal_column, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import defer
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.dates import to_datetime
+from app.models.table_version import TableVersion
+from app.ml.minhash import THRESHOLD, decode, fingerprint, similarity
+
+# Общий движок фильтрации/сортировки/пагинации для grant, scholarship и internship.
+
+MAX_PAGE_SIZE = 100
+
+# Строк в одном INSERT ... VALUES: ~15 колонок * 500 < лимита asyncpg в 32767 параметров
+BULK_BATCH_SIZE = 500
+
+# Строк за один FETCH серверного курсора при выгрузке (/export)
+EXPORT_BATCH_SIZE = 1000
+
+
+def _norm_text(value: Any) -> str:
+    return " ".join(str(value).split()).casefold() if value is not None else ""
+
+
+def compute_content_hash(row: Dict[str, Any]) -> str:
+    """
+    Отпечаток содержимого: sha256 нормализованных title, description, deadline, provider, country.
+    Пробелы/регистр не влияют, так что косметические правки на сайте не считаются изменением.
+    """
+    deadline = row.get("deadline")
+    parts = (
+        _norm_text(row.get("title")),
+        _norm_text(row.get("description")),
+        deadline.date().isoformat() if isinstance(deadline, datetime) else _norm_text(deadline),
+        _norm_text(row.get("provider")),
+        _norm_text(row.get("country")),
+    )
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def empty_upsert_stats() -> Dict[str, Any]:
+    return {"inserted": [], "updated": [], "unchanged": 0}
+
+
+def merge_upsert_stats(total: Dict[str, Any], part: Dict[str, Any]) -> Dict[str, Any]:
+    """Складывает результаты нескольких bulk_upsert (например, по страницам краула)."""
+    total["inserted"].extend(part["inserted"])
+    total["updated"].extend(part["updated"])
+    total["unchanged"] += part["unchanged"]
+    return total
+
+
+# Конфигурация FTS должна совпадать с той, что в search_vector моделей
+_TS_CONFIG = literal_column("'english'::regconfig")
+
+
+def _ts_query(q: str):
+    # websearch_to_tsquery понимает "кавычки", OR и -исключения и не падает на мусорном вводе
+    return func.websearch_to_tsquery(_TS_CONFIG, q)
+
+
+# Курсор (keyset-пагинация)
+
+def _encode_cursor(sort_by: str, order: str, value: Any, last_id: Any) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort_by, "o": order, "v": value, "id": last_id}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort_by: str, order: str) -> Tuple[Any, Any]:
+    """
+    Возвращает (значение колонки сортировки, id) последнего элемента предыдущей страницы.
+    ValueError — если курсор битый или выдан для другой сортировки.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        value, last_id = payload["v"], payload["id"]
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if payload.get("s") != sort_by or payload.get("o") != order:
+        raise ValueError("Cursor does not match sort_by/order")
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError as e:
+            raise ValueError("Invalid cursor") from e
+    return value, last_id
+
+
+def _seek_condition(sort_expr, id_col, value: Any, last_id: Any, descending: bool, nullable: bool = True):
+    """
+    WHERE для «всё, что после (value, last_id)» при ORDER BY sort_expr NULLS LAST, id.
+    """
+    after = (lambda a, b: a < b) if descending else (lambda a, b: a > b)
+    if value is None:
+        # уже в хвосте из NULL-ов — двигаемся только по id
+        return and_(sort_expr.is_(None), after(id_col, last_id))
+    cond = or_(after(sort_expr, value), and_(sort_expr == value, after(id_col, last_id)))
+    if nullable:
+        cond = or_(cond, sort_expr.is_(None))
+    return cond
+
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) поверх любого select — для оценки числа строк планировщиком."""
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+async def _estimate_count(session: AsyncSession, stmt) -> int:
+    """
+    Оценка количества строк из статистики планировщика (pg_statistic/reltuples) —
+    без чтения самих строк. Точность как у EXPLAIN, для X-Total-Count этого достаточно.
+    """
+    plan = (await session.exec(_Explain(stmt))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return max(int(plan[0]["Plan"]["Plan Rows"]), 0)
+
+
+class OpportunityService:
+    """
+    Базовый сервис для «возможностей» (грант/стипендия/стажировка).
+    Наследники задают model; фильтры по полям, которых у модели нет (level, search_vector), пропускаются.
+    """
+    model: ClassVar[Type[SQLModel]]
+
+    # колонки, которые upsert никогда не перезаписывает
+    _upsert_immutable: ClassVar[Tuple[str, ...]] = ("id", "created_at")
+
+    sort_fields: ClassVar[Tuple[str, ...]] = ("created_at", "published_at", "deadline")
+
+    # колонки, которые клиенту не нужны и в select(model) не загружаются
+    _deferred: ClassVar[Tuple[str, ...]] = ("search_vector", "minhash", "minhash_bands")
+
+    def _select_model(self):
+        stmt = select(self.model)
+        for name in self._deferred:
+            column = getattr(self.model, name, None)
+            if column is not None:
+                stmt = stmt.options(defer(column))
+        return stmt
+
+    def build_query(
+        self,
+        q: Optional[str] = None,
+        provider: Optional[str] = None,
+        country: Optional[str] = None,
+        level: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_to: Optional[str] = None,
+    ):
+        """
+        Возвращает (stmt, rank): отфильтрованный select без сортировки/пагинации
+        и выражение ранга полнотекстового поиска (None, если q не задан или FTS недоступен).
+        """
+        model = self.model
+        search_vector = getattr(model, "search_vector", None)
+
+        # Базовый запрос (tsvector и сигнатуры клиенту не нужны — не тащим их из БД);
+        # почти-дубликаты скрыты — их представляет каноническая запись
+        stmt = self._select_model().where(model.duplicate_of.is_(None))
+
+        rank = None
+        if q and q.strip():
+            if search_vector is not None:
+                # Полнотекстовый поиск по title/description (GIN-индекс по search_vector)
+                ts_query = _ts_query(q.strip())
+                stmt = stmt.where(search_vector.op("@@")(ts_query))
+                # ts_rank_cd учитывает веса A/B, так что совпадения в title выше
+                rank = func.ts_rank_cd(search_vector, ts_query)
+            else:
+                like = f"%{q.strip()}%"
+                stmt = stmt.where(or_(model.title.ilike(like), model.description.ilike(like)))
+
+        # Фильтры по полям
+        if provider:
+            stmt = stmt.where(model.provider.ilike(f"%{provider}%"))
+        if country:
+            stmt = stmt.where(model.country.ilike(f"%{country}%"))
+        if level and hasattr(model, "level"):
+            stmt = stmt.where(model.level.ilike(f"%{level}%"))
+
+        df = to_datetime(deadline_from)
+        dt = to_datetime(deadline_to)
+        if df and dt:
+            stmt = stmt.where(and_(model.deadline >= df, model.deadline <= dt))
+        elif df:
+            stmt = stmt.where(model.deadline >= df)
+        elif dt:
+            stmt = stmt.where(model.deadline <= dt)
+
+        return stmt, rank
+
+    async def list_opportunities(
+        self,
+        session: AsyncSession,
+        page: int = 1,
+        page_size: int = 20,
+        q: Optional[str] = None,
+        provider: Optional[str] = None,
+        country: Optional[str] = None,
+        level: Optional[str] = None,
+        deadline_from: Optional[str] = None,
+        deadline_to: Optional[str] = None,
+        sort_by: str = "created_at",
+        order: str = "desc",
+        cursor: Optional[str] = None,
+        include_total: str = "exact",
+    ) -> Tuple[List[Any], Optional[int], Optional[str]]:
+        """
+        Возвращает (items, total, next_cursor).
+        - cursor: если передан, страница ищется по (sort column, id) без OFFSET, page игнорируется;
+        - include_total: "exact" — count(*), "estimate" — оценка планировщика, "false" — не считаем.
+        """
+        model = self.model
+        page = max(page, 1)
+        page_size = min(max(page_size, 1), MAX_PAGE_SIZE)
+
+        stmt, rank = self.build_query(
+            q=q,
+            provider=provider,
+            country=country,
+            level=level,
+            deadline_from=deadline_from,
+            deadline_to=deadline_to,
+        )
+
+        # total до пагинации
+        total: Optional[int] = None
+        if include_total == "exact":
+            count_stmt = select(func.count()).select_from(stmt.subquery())
+            total = (await session.exec(count_stmt)).one()
+        elif include_total == "estimate":
+            total = await _estimate_count(session, stmt)
+
+        # Сортировка (relevance имеет смысл только при наличии q); id — тай-брейкер для курсора
+        order = order.lower()
+        if sort_by == "relevance" and rank is not None:
+            sort_expr, descending, nullable = rank, True, False
+            order = "desc"
+            stmt = stmt.add_columns(rank.label("rank"))
+        else:
+            if sort_by not in self.sort_fields:
+                sort_by = "created_at"
+            sort_expr, descending, nullable = getattr(model, sort_by), order == "desc", True
+
+        if descending:
+            stmt = stmt.order_by(desc(sort_expr).nulls_last(), desc(model.id))
+        else:
+            stmt = stmt.order_by(asc(sort_expr).nulls_last(), asc(model.id))
+
+        # Пагинация: keyset по курсору либо классический OFFSET
+        if cursor:
+            value, last_id = _decode_cursor(cursor, sort_by, order)
+            stmt = stmt.where(_seek_condition(sort_expr, model.id, value, last_id, descending, nullable))
+        else:
+            stmt = stmt.offset((page - 1) * page_size)
+        # +1 строка, чтобы понять, есть ли следующая страница
+        stmt = stmt.limit(page_size + 1)
+
+        rows = (await session.exec(stmt)).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        if sort_expr is rank:
+            items = [row[0] for row in rows]
+            last_value = rows[-1][1] if rows else None
+        else:
+            items = list(rows)
+            last_value = getattr(items[-1], sort_by) if items else None
+
+        next_cursor = _encode_cursor(sort_by, order, last_value, items[-1].id) if has_more else None
+        return items, total, next_cursor
+
+    async def list_validators(self, session: AsyncSession) -> Tuple[Optional[datetime], int]:
+        """
+        (modified_at, version) таблицы из table_versions — одна строка по PK для ETag/Last-Modified,
+        чтобы ответить 304 до выборки страницы, сколько бы строк ни подходило под фильтры.
+        Версию поднимают триггеры на любой INSERT/UPDATE/DELETE, так что удаления её тоже двигают.
+        """
+        stmt = select(TableVersion.modified_at, TableVersion.version).where(
+            TableVersion.name == self.model.__tablename__
+        )
+        row = (await session.exec(stmt)).first()
+        return (row[0], row[1]) if row else (None, 0)
+
+    # Выгрузка (/export)
+
+    def build_export_query(self, **filters):
+        """Отфильтрованный select в порядке id — стабильный порядок без сортировки всего набора в памяти."""
+        stmt, _rank = self.build_query(**filters)
+        return stmt.order_by(asc(self.model.id))
+
+    async def stream_opportunities(
+        self,
+        session: AsyncSession,
+        stmt,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[List[Any]]:
+        """
+        Отдаёт строки пачками по batch_size через серверный курсор (yield_per):
+        в памяти одновременно только одна пачка, сколько бы строк ни было в выгрузке.
+        """
+        result = await session.stream_scalars(stmt.execution_options(yield_per=batch_size))
+        async for partition in result.partitions():
+            yield partition
+            # объекты уже сериализованы — не держим их в identity map сессии
+            session.expunge_all()
+
+    async def iter_source_urls(
+        self,
+        session: AsyncSession,
+        prefix: Optional[str] = None,
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ) -> AsyncIterator[str]:
+        """source_url всех записей (опционально — только с данным префиксом, т.е. одного источника) через серверный курсор."""
+        stmt = select(self.model.source_url)
+        if prefix:
+            stmt = stmt.where(self.model.source_url.startswith(prefix, autoescape=True))
+        result = await session.stream_scalars(stmt.execution_options(yield_per=batch_size))
+        async for url in result:
+            yield url
+
+    # Массовая запись (ETL)
+
+    @staticmethod
+    def _prepare_row(item: BaseModel) -> Dict[str, Any]:
+        """DTO (GrantCreate/ScholarshipCreate/InternshipCreate) -> dict колонок для INSERT."""
+        data = item.model_dump()
+
+        # приведение типов/таймзоны
+        data["title"] = (data.get("title") or "").strip()
+        data["source_url"] = str(data["source_url"]).strip()
+        if data.get("image_url"):
+            data["image_url"] = str(data["image_url"])
+        if data.get("published_at"):
+            data["published_at"] = to_datetime(data["published_at"])
+        if data.get("deadline"):
+            data["deadline"] = to_datetime(data["deadline"])
+        return data
+
+    async def bulk_upsert(
+        self,
+        items: Iterable[BaseModel],
+        session: AsyncSession,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        Пишет пачку DTO одним INSERT ... ON CONFLICT (title, source_url) DO UPDATE ... RETURNING
+        на каждые batch_size строк (одна транзакция на пачку).
+
+        Решение по каждой строке принимает сам Postgres по content_hash:
+          - новой записи нет  -> INSERT;
+          - хеш отличается    -> UPDATE (и только тогда новый updated_at);
+          - хеш совпадает     -> строка не трогается (нет записи в WAL, нет мёртвых версий).
+        Почти-дубликаты из других источников (MinHash/LSH, см. app/ml/minhash.py) пишутся
+        со ссылкой duplicate_of на каноническую запись.
+        Возвращает {"inserted": [id...], "updated": [id...], "unchanged": int}.
+        """
+        model = self.model
+        stats = empty_upsert_stats()
+
+        # Дубли внутри одной пачки Postgres не примет ("cannot affect row a second time") — последний выигрывает
+        rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for item in items:
+            row = self._prepare_row(item)
+            row["content_hash"] = compute_content_hash(row)
+            row["minhash"], row["minhash_bands"] = fingerprint(row)
+            rows.pop((row["title"], row["source_url"]), None)
+            rows[(row["title"], row["source_url"])] = row
+        if not rows:
+            return stats
+
+        now = datetime.now()
+        values = list(rows.values())
+        for start in range(0, len(values), batch_size):
+            chunk = values[start:start + batch_size]
+            for row in chunk:
+                row.setdefault("created_at", now)
+                row["updated_at"] = now
+            pending = await self._link_near_duplicates(session, chunk)
+
+            stmt = pg_insert(model).values(chunk)
+            update_cols = {
+                col: stmt.excluded[col]
+                for col in chunk[0]
+                if col not in self._upsert_immutable and col not in ("title", "source_url")
+            }
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[model.title, model.source_url],
+                set_=update_cols,
+                where=model.content_hash.is_distinct_from(stmt.excluded.content_hash),
+            ).returning(
+                model.id,
+                # xmax = 0 только у только что вставленной версии строки
+                literal_column("xmax = 0").label("inserted"),
+            )
+
+            result = await session.exec(stmt)
+            returned = result.all()
+            if pending:
+                await self._link_pending(session, pending)
+            if returned:
+                await self._flatten_duplicate_chains(session, [row_id for row_id, _ in returned])
+            await session.commit()
+
+            for row_id, inserted in returned:
+                stats["inserted" if inserted else "updated"].append(row_id)
+            # строки, на которых сработал WHERE, в RETURNING не попадают
+            stats["unchanged"] += len(chunk) - len(returned)
+
+        return stats
+
+    async def _link_near_duplicates(
+        self,
+        session: AsyncSession,
+        rows: List[Dict[str, Any]],
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """
+        Проставляет row["duplicate_of"] строкам, у которых нашёлся почти-дубликат среди канонических записей.
+        Кандидаты из БД — одной выборкой на всю пачку по GIN-индексу minhash_bands; дальше корзины в памяти,
+        так что на строку ожидаемо O(1) сравнений сигнатур, а не проход по таблице.
+        Строки пачки сравниваются и между собой (раньше стоящая — каноническая). Если у канонической строки
+        ещё нет id (вставится этим же INSERT), пара (дубликат, канонический) возвращается для _link_pending.
+        """
+        model = self.model
+        for row in rows:
+            row["duplicate_of"] = None
+        signed = [row for row in rows if row.get("minhash_bands")]
+        if not signed:
+            return []
+
+        all_bands = sorted({band for row in signed for band in row["minhash_bands"]})
+        stmt = select(model.id, model.title, model.source_url, model.minhash, model.minhash_bands).where(
+            model.minhash_bands.overlap(all_bands),
+            model.duplicate_of.is_(None),
+        )
+        # корзина -> [(ключ, сигнатура, id или None, строка пачки или None)]
+        buckets: Dict[int, List[Tuple[Any, ...]]] = {}
+        for row_id, title, source_url, blob, bands in (await session.exec(stmt)).all():
+            candidate = ((title, source_url), decode(blob), row_id, None)
+            for band in bands:
+                buckets.setdefault(band, []).append(candidate)
+
+        pending: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        for row in signed:
+            key = (row["title"], row["source_url"])
+            sig = decode(row["minhash"])
+            best, best_score, seen = None, 0.0, set()
+            for band in row["minhash_bands"]:
+                for candidate in buckets.get(band, ()):
+                    # сама строка (пере-краул) и уже проверенные кандидаты из других корзин
+                    if candidate[0] == key or id(candidate) in seen:
+                        continue
+                    seen.add(id(candidate))
+                    score = similarity(sig, candidate[1])
+                    if score >= THRESHOLD and score > best_score:
+                        best, best_score = candidate, score
+            if best is None:
+                # каноническая — с ней сравниваются следующие строки пачки
+                own = (key, sig, row.get("id"), row)
+                for band in row["minhash_bands"]:
+                    buckets.setdefault(band, []).append(own)
+            elif best[2] is not None:
+                row["duplicate_of"] = best[2]
+            else:
+                pending.append((row, best[3]))
+        return pending
+
+    async def _link_pending(
+        self,
+        session: AsyncSession,
+        pending: List[Tuple[Dict[str, Any], Dict[str, Any]]],
+    ) -> None:
+        """duplicate_of для пар внутри пачки — после INSERT, когда id обеих строк известны; один UPDATE."""
+        model = self.model
+        keys = {(row["title"], row["source_url"]) for pair in pending for row in pair}
+        stmt = select(model.title, model.source_url, model.id).where(tuple_(model.title, model.source_url).in_(keys))
+        ids = {(title, source_url): row_id for title, source_url, row_id in (await session.exec(stmt)).all()}
+
+        links = {}
+        for duplicate, canonical in pending:
+            dup_id = ids.get((duplicate["title"], duplicate["source_url"]))
+            canonical_id = ids.get((canonical["title"], canonical["source_url"]))
+            if dup_id is not None and canonical_id is not None:
+                links[dup_id] = canonical_id
+        if links:
+            table = model.__table__
+            await session.execute(
+                update(table)
+                .where(table.c.id.in_(list(links)))
+                .values(duplicate_of=cast(case(links, value=table.c.id), table.c.duplicate_of.type))
+            )
+
+    async def _flatten_duplicate_chains(self, session: AsyncSession, ids: List[int]) -> None:
+        """
+        Строки из ids, ставшие почти-дубликатами (пере-краул изменил текст бывшей канонической записи),
+        передают свои дубликаты корню: duplicate_of всегда указывает на строку с duplicate_of IS NULL.
+        """
+        table = self.model.__table__
+        parent = table.alias("parent")
+        await session.execute(
+            update(table)
+            .where(
+                table.c.duplicate_of == parent.c.id,
+                parent.c.id.in_(ids),
+                parent.c.duplicate_of.is_not(None),
+            )
+            .values(duplicate_of=parent.c.duplicate_of)
+        )
+
+    async def backfill_near_duplicates(
+        self,
+        session: AsyncSession,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> Dict[str, int]:
+        """
+        Сигнатуры и duplicate_of для строк без minhash (появившихся до MinHash) в порядке id. Строка ссылается
+        на самую похожую каноническую запись — ею может оказаться и более поздняя, подписанная уже при загрузке;
+        среди строк без minhash каноническая — с меньшим id. Пачка — одна транзакция; прерванный прогон можно перезапустить.
+        Строки со слишком коротким текстом сигнатуры не получают и при повторном запуске просматриваются снова.
+        """
+        model = self.model
+        table = model.__table__
+        stats = {"processed": 0, "signed": 0, "duplicates": 0}
+        write = (
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(
+                minhash=bindparam("b_minhash", type_=table.c.minhash.type),
+                minhash_bands=bindparam("b_minhash_bands", type_=table.c.minhash_bands.type),
+                duplicate_of=bindparam("b_duplicate_of", type_=table.c.duplicate_of.type),
+            )
+        )
+
+        last_id = 0
+        while True:
+            stmt = (
+                select(model.id, model.title, model.source_url, model.description)
+                .where(model.minhash.is_(None), model.id > last_id)
+                .order_by(model.id)
+                .limit(batch_size)
+            )
+            batch = (await session.exec(stmt)).all()
+            if not batch:
+                break
+            last_id = batch[-1][0]
+
+            rows = []
+            for row_id, title, source_url, description in batch:
+                row = {"id": row_id, "title": title, "source_url": source_url, "description": description}
+                row["minhash"], row["minhash_bands"] = fingerprint(row)
+                if row["minhash"] is not None:
+                    rows.append(row)
+            stats["processed"] += len(batch)
+            if not rows:
+                continue
+
+            # id у всех строк известны — пар «до INSERT» не остаётся
+            await self._link_near_duplicates(session, rows)
+            await session.execute(write, [
+                {
+                    "b_id": row["id"],
+                    "b_minhash": row["minhash"],
+                    "b_minhash_bands": row["minhash_bands"],
+                    "b_duplicate_of": row["duplicate_of"],
+                }
+                for row in rows
+            ])
+            await session.commit()
+            stats["signed"] += len(rows)
+            stats["duplicates"] += sum(row["duplicate_of"] is not None for row in rows)
+
+        return stats
+
+    async def upsert_one(self, item: BaseModel, session: AsyncSession):
+        """Одиночная запись по той же логике insert/update/skip; возвращает актуальную строку."""
+        await self.bulk_upsert([item], session)
+        row = self._prepare_row(item)
+        stmt = self._select_model().where(
+            and_(self.model.title == row["title"], self.model.source_url == row["source_url"])
+        )
+        return (await session.exec(stmt)).first()
@@ -1,15 +1,39 @@
-from typing import List
-from uuid import UUID
-from typing import Any, List
-
+import hashlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, bindparam, delete, desc, func, or_, text
+import sqlalchemy.dialects.postgresql as pg
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 from sqlmodel import select
 
-from app.models.recommendation import Recommendation
+from app.models.recommendation import ItemType, Recommendation
 from app.models.grant import Grant
 from app.models.internship import Internship
 from app.models.scholarship import Scholarship
 from app.schemes.recommendation import RecommendationCreate
+from app.services.opportunityService import (
+    BULK_BATCH_SIZE,
+    MAX_PAGE_SIZE,
+    _decode_cursor,
+    _encode_cursor,
+    _seek_condition,
+)
+
+# Advisory-блокировки на (пользователь, source_model) берутся по возрастанию ключа — одинаковый порядок
+# у всех писателей исключает взаимоблокировку; Postgres (9.6+) вычисляет volatile-функции списка выборки после ORDER BY
+_LOCK_USER_SETS = text(
+    "SELECT pg_advisory_xact_lock(k) FROM unnest(:keys) AS t(k) ORDER BY k"
+).bindparams(bindparam("keys", type_=pg.ARRAY(pg.BIGINT)))
+
+
+def _user_set_lock_key(user_id: UUID, source_model: str) -> int:
+    digest = hashlib.blake2b(f"recommendations:{user_id}:{source_model}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
 
 type_map = {
     "grant": Grant,
@@ -17,63 +41,193 @@ type_map = {
     "scholarship": Scholarship
 }
 
-
-class RecommendationService:
-    async def get_recommendations_for_user(self, user_id: UUID, session: AsyncSession) -> List[dict]:
-        statement = select(Recommendation).where(Recommendation.user_id == user_id)
-        result = await session.execute(statement)
-        recommendations = result.scalars().all()
-
-        grouped_ids: dict[str,List[int]] = {"grant":[],"internship":[],"scholarship":[]}
-        for rec in recommendations:
-            if rec.item_type in grouped_ids:
-                grouped_ids[rec.item_type].append(rec.item_id)
-
-        loaded_items: dict[str, dict[int, Any]] = {}
-
-        for item_type, ids in grouped_ids.items():
-            model = type_map.get(item_type)
-            if model and ids:
-                statement = select(model).where(model.id.in_(ids))
-                res = await session.execute(statement)
-                items = res.scalars().all()
-                loaded_items[item_type] = {item.id: item for item in items}
-
-        items = []
-        for rec in recommendations:
-            item = loaded_items.get(rec.item_type, {}).get(rec.item_id)
-            if item:
-                items.append({
-                    "type": rec.item_type,
-                    "item_id": rec.item_id,
-                    "score": rec.score,
-                    "source_model": rec.source_model,
-                    "data": item
-                })
-
-        return items
+# Проекции ленты: summary — для списка (без description), full — со всеми полями карточки
+VIEW_FIELDS = {
+    "summary": ("title", "provider", "deadline", "country", "source_url", "image_url"),
+    "full": (
+        "title", "provider", "deadline", "country", "source_url", "image_url",
+        "description", "published_at", "region", "language",
+    ),
+}
 
 
+class RecommendationService:
+    async def get_recommendations_for_user(
+        self,
+        user_id: UUID,
+        session: AsyncSession,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        types: Optional[Sequence[ItemType]] = None,
+        view: str = "summary",
+    ) -> Tuple[List[dict], Optional[str]]:
+        """
+        Лента рекомендаций пользователя по убыванию score — одним запросом:
+        recommendations LEFT JOIN grant/scholarship/internship по (item_type, item_id),
+        поля карточки — через coalesce. Индекс (user_id, score DESC, id DESC) отдаёт строки
+        уже в нужном порядке, так что LIMIT читает только страницу.
+        Рекомендация на почти-дубликат показывается карточкой его канонической записи (item_id — её id).
+        Возвращает (items, next_cursor); рекомендации на удалённые объекты пропускаются.
+        ValueError — если курсор битый.
+        """
+        limit = min(max(limit, 1), MAX_PAGE_SIZE)
+        fields = VIEW_FIELDS.get(view, VIEW_FIELDS["summary"])
+        item_types = [ItemType(t).value for t in types] if types else list(type_map)
+        models = [type_map[t] for t in item_types]
+
+        stmt = select(
+            Recommendation.id,
+            Recommendation.item_type,
+            func.coalesce(*(m.id for m in models)).label("item_id"),
+            Recommendation.score,
+            Recommendation.source_model,
+            *(func.coalesce(*(getattr(m, f) for m in models)).label(f) for f in fields),
+        ).select_from(Recommendation)
+        for item_type, model in zip(item_types, models):
+            # сначала сама запись, через её duplicate_of — каноническая (цепочек нет, см. OpportunityService)
+            linked = aliased(model)
+            stmt = stmt.outerjoin(
+                linked,
+                and_(Recommendation.item_type == item_type, linked.id == Recommendation.item_id),
+            ).outerjoin(
+                model,
+                and_(model.id == func.coalesce(linked.duplicate_of, linked.id), model.duplicate_of.is_(None)),
+            )
+
+        stmt = stmt.where(
+            Recommendation.user_id == user_id,
+            or_(*(m.id.is_not(None) for m in models)),
+        )
+        if types:
+            stmt = stmt.where(Recommendation.item_type.in_(item_types))
+
+        if cursor:
+            score, last_id = _decode_cursor(cursor, "score", "desc")
+            try:
+                last_id = UUID(str(last_id))
+            except ValueError as e:
+                raise ValueError("Invalid cursor") from e
+            stmt = stmt.where(
+                _seek_condition(Recommendation.score, Recommendation.id, score, last_id, descending=True, nullable=False)
+            )
+        stmt = stmt.order_by(desc(Recommendation.score), desc(Recommendation.id)).limit(limit + 1)
+
+        rows = (await session.execute(stmt)).mappings().all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        items: List[Dict[str, Any]] = [
+            {
+                "id": row["id"],
+                "type": row["item_type"],
+                "item_id": row["item_id"],
+                "score": row["score"],
+                "source_model": row["source_model"],
+                "data": {f: row[f] for f in fields},
+            }
+            for row in rows
+        ]
+        next_cursor = _encode_cursor("score", "desc", rows[-1]["score"], rows[-1]["id"]) if has_more else None
+        return items, next_cursor
+
+
+    @staticmethod
+    def _prepare_rows(
+        data: Iterable[RecommendationCreate | Dict[str, Any]],
+        source_model: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """DTO/dict -> строки для INSERT: id и метки времени проставляем сами, без server round trip."""
+        now = datetime.now()
+        rows = []
+        for rec in data:
+            row = rec.model_dump() if isinstance(rec, RecommendationCreate) else dict(rec)
+            rows.append({
+                "id": uuid4(),
+                "user_id": row["user_id"],
+                "item_id": row["item_id"],
+                "item_type": ItemType(row["item_type"]),
+                "score": row.get("score") or 0.0,
+                "source_model": source_model or row.get("source_model") or "baseline",
+                "created_at": now,
+                "updated_at": now,
+            })
+        return rows
 
     async def create_recommendations(
         self,
         data: List[RecommendationCreate],
-        session: AsyncSession
-    ) -> List[Recommendation]:
-        objs = [Recommendation(**rec.model_dump()) for rec in data]
-        session.add_all(objs)
+        session: AsyncSession,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """Многострочный INSERT ... RETURNING пачками по batch_size, одна транзакция; без refresh на каждую строку."""
+        rows = self._prepare_rows(data)
+        created: List[Dict[str, Any]] = []
+        for start in range(0, len(rows), batch_size):
+            stmt = pg_insert(Recommendation).values(rows[start:start + batch_size]).returning(
+                *Recommendation.__table__.c
+            )
+            created.extend(dict(row) for row in (await session.execute(stmt)).mappings())
         await session.commit()
-        for obj in objs:
-            await session.refresh(obj)
-        return objs
+        return created
 
+    async def replace_user_sets(
+        self,
+        session: AsyncSession,
+        source_model: str,
+        data: Iterable[RecommendationCreate | Dict[str, Any]],
+        user_ids: Optional[Iterable[UUID]] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+    ) -> Dict[str, Any]:
+        """
+        Атомарная замена наборов рекомендаций source_model: в одной транзакции
+        DELETE всех строк (user_id из набора, source_model) и многострочные INSERT ... RETURNING id.
+        Читатели видят либо старый набор пользователя, либо новый — пустого промежутка нет.
+        Параллельные замены наборов одного пользователя сериализуются advisory-блокировкой на
+        (user_id, source_model) до DELETE: под READ COMMITTED два DELETE+INSERT иначе оставили бы оба набора.
+        user_ids — чьи наборы заменяются (по умолчанию — пользователи из data);
+        пользователь из user_ids без строк в data остаётся с пустым набором, а строка пользователя
+        вне user_ids — ValueError: его старый набор не удалился бы, и наборы смешались бы.
+        source_model у всех строк принудительно равен переданному.
+        Возвращает {"deleted": int, "inserted": [id...]}.
+        """
+        rows = self._prepare_rows(data, source_model=source_model)
+        row_users = {UUID(str(row["user_id"])) for row in rows}
+        if user_ids is None:
+            users = row_users
+        else:
+            users = {UUID(str(user_id)) for user_id in user_ids}
+            outside = row_users - users
+            if outside:
+                raise ValueError(
+                    f"Recommendations for users outside user_ids: {', '.join(sorted(map(str, outside)))}"
+                )
+        if not users:
+            return {"deleted": 0, "inserted": []}
+
+        inserted: List[UUID] = []
+        try:
+            keys = sorted({_user_set_lock_key(user_id, source_model) for user_id in users})
+            await session.execute(_LOCK_USER_SETS, {"keys": keys})
+            deleted = await session.execute(
+                delete(Recommendation).where(
+                    Recommendation.user_id.in_(users), Recommendation.source_model == source_model
+                )
+            )
+            for start in range(0, len(rows), batch_size):
+                stmt = pg_insert(Recommendation).values(rows[start:start + batch_size]).returning(Recommendation.id)
+                inserted.extend((await session.execute(stmt)).scalars())
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+        return {"deleted": deleted.rowcount, "inserted": inserted}
 
     async def delete_recommendation(self, rec_id: UUID, session: AsyncSession) -> None:
-        result = await session.exec(select(Recommendation).where(Recommendation.id == rec_id))
-        rec = result.one_or_none()
-
-        if not rec:
+        """Один DELETE ... RETURNING вместо SELECT + DELETE."""
+        result = await session.execute(
+            delete(Recommendation).where(Recommendation.id == rec_id).returning(Recommendation.id)
+        )
+        if result.scalar_one_or_none() is None:
+            await session.rollback()
             raise Exception("Recommendation not found")
-
-        await session.delete(rec)
         await session.commit()
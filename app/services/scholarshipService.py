@@ -1,39 +1,28 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import select, desc
 from app.schemes import scholarship
 from app.models.scholarship import Scholarship
+from app.services.opportunityService import OpportunityService
 from datetime import datetime
 
-class ScholarshipService:
-    async def get_all_scholarships(self, session: AsyncSession):
-        statement = select(Scholarship).order_by(desc(Scholarship.created_at))
-        result = await session.exec(statement)
-        return result.all()
+class ScholarshipService(OpportunityService):
+    model = Scholarship
+
+    async def get_all_scholarships(self, session: AsyncSession, page: int = 1, page_size: int = 20, **filters):
+        """
+        Страница стипендий: (items, total, next_cursor).
+        filters — те же, что у OpportunityService.list_opportunities (q, provider, country, level, deadline_*, ...).
+        """
+        return await self.list_opportunities(session, page=page, page_size=page_size, **filters)
     
     async def get_scholarship(self, scholarship_id: int, session: AsyncSession):
-        statement = select(Scholarship).where(Scholarship.id == scholarship_id)
+        statement = self._select_model().where(Scholarship.id == scholarship_id)
         result = await session.exec(statement)
         scholarship_obj = result.first()
         return scholarship_obj
 
     async def create_scholarship(self, scholarship_data: scholarship.ScholarshipBase, session: AsyncSession):
-        scholarship_data_dict = scholarship_data.model_dump()
-
-        scholarship_data_dict['source_url'] = str(scholarship_data_dict['source_url'])
-        if scholarship_data_dict.get('image_url'):
-            scholarship_data_dict['image_url'] = str(scholarship_data_dict['image_url'])
-
-        if scholarship_data_dict.get('published_at'):
-            scholarship_data_dict['published_at'] = scholarship_data_dict['published_at'].replace(tzinfo=None)
-        if scholarship_data_dict.get('deadline'):
-            scholarship_data_dict['deadline'] = scholarship_data_dict['deadline'].replace(tzinfo=None)
-
-        # deadline_text просто прокидываем как есть (может быть None/str)
-        new_scholarship = Scholarship(**scholarship_data_dict)
-
-        session.add(new_scholarship)
-        await session.commit()
-        return new_scholarship
+        # Дедупликация по (title, source_url): вставка, обновление при изменённом контенте или no-op
+        return await self.upsert_one(scholarship_data, session)
 
     async def update_scholarship(self, scholarship_id: int, update_data: scholarship.ScholarshipUpdate, session: AsyncSession):
         scholarship_to_update = await self.get_scholarship(scholarship_id, session)
@@ -45,6 +34,8 @@ class ScholarshipService:
         for key, value in update_data_dict.items():
             setattr(scholarship_to_update, key, value)
 
+        scholarship_to_update.updated_at = datetime.utcnow()
+
         await session.commit()
         return scholarship_to_update
 
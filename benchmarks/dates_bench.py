@@ -0,0 +1,71 @@
+"""
+Микробенчмарк нормализации дат (app/core/dates.py).
+
+    python -m benchmarks.dates_bench --n 200000 --distinct 300
+
+Строки генерируются в форматах, которые встречаются в листингах/карточках, с повторами
+(--distinct уникальных на --n строк — как сроки на реальных страницах).
+Меряется: холодный кеш, тёплый кеш, пакетный parse_dates и старый перебор strptime как базовая линия.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from app.core import dates
+
+FORMATS = ("%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%m/%d/%Y", "Deadline: %B %d, %Y", "%b %d")
+UNDATED = ("Varies", "Rolling", "Open until filled", "—")
+
+
+def make_corpus(n: int, distinct: int, seed: int = 0) -> List[str]:
+    rnd = random.Random(seed)
+    pool = []
+    for _ in range(distinct):
+        if rnd.random() < 0.1:
+            pool.append(rnd.choice(UNDATED))
+            continue
+        d = datetime(rnd.randint(2024, 2027), rnd.randint(1, 12), rnd.randint(1, 28))
+        pool.append(d.strftime(rnd.choice(FORMATS)))
+    return [rnd.choice(pool) for _ in range(n)]
+
+
+def _strptime_loop(s: str) -> Optional[datetime]:
+    # прежний разбор в simpler_grants: исключение на каждом промахе формата
+    for fmt in ("%b %d, %Y", "%B %d, %Y", "%m/%d/%Y"):
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            pass
+    return None
+
+
+def bench(label: str, fn: Callable[[], object], n: int) -> None:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed * 1000:9.1f} ms  {elapsed / n * 1e9:8.0f} ns/str")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=300)
+    args = parser.parse_args(argv)
+
+    corpus = make_corpus(args.n, args.distinct)
+    now = datetime.now()
+
+    bench("strptime loop (baseline)", lambda: [_strptime_loop(s) for s in corpus], args.n)
+    dates._tokenize.cache_clear()
+    bench("parse_date, cold cache", lambda: [dates.parse_date(s, now) for s in corpus[: args.distinct * 4]], args.distinct * 4)
+    bench("parse_date, warm cache", lambda: [dates.parse_date(s, now) for s in corpus], args.n)
+    bench("parse_dates (batch)", lambda: dates.parse_dates(corpus, now), args.n)
+    print(dates.cache_info())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+"""
+Офлайн-бенчмарк ETL: запись HTML-корпуса и воспроизведение импортёров поверх него.
+
+БД задаётся только явно (--database-url) и только локальная: харнесс пишет в неё и чистит таблицы.
+
+Запись (один раз, живые сайты, с боевыми лимитами FETCH_POLICY):
+    python -m benchmarks.etl_replay record --source simpler_grants --pages 3 --database-url postgresql+asyncpg://localhost/bench
+    python -m benchmarks.etl_replay record --source intl_scholarships --pages 2 --per-page 100 --database-url ...
+
+Воспроизведение (без сети, через httpx.MockTransport, с искусственной задержкой ответа и без token bucket сайта):
+    python -m benchmarks.etl_replay replay --source simpler_grants --pages 3 --latency-ms 80 --jitter-ms 40 --database-url ...
+    python -m benchmarks.etl_replay replay --source intl_scholarships --pages 2 --per-page 100 --runs 3 --database-url ...
+
+Отчёт: страниц/сек (листинг + карточки), мс парсинга на карточку, строк/сек записано, пиковый RSS.
+Дисковый кеш ответов уводится во временный каталог, свой у каждого замеряемого прогона (и у каждого --runs),
+иначе повторный прогон мерил бы кеш, а не разбор; --warm-cache прогоняет импорт дважды в одном каталоге
+и меряет второй (кешированный) проход.
+--db-state: empty (по умолчанию) — перед замером таблица источника очищается, меряется путь INSERT;
+populated — строки уже есть (перед первым замером — наполняющий прогон со своим, выбрасываемым кешем),
+меряется путь «без изменений».
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.parsers.fetch_scheduler import HostPolicy
+from app.parsers.progress import EtlProgress
+
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(__file__), "corpus")
+
+SOURCES = ("simpler_grants", "intl_scholarships")
+
+# Таблица, в которую пишет импортёр источника (для --db-state)
+SOURCE_TABLES = {"simpler_grants": "grant", "intl_scholarships": "scholarship"}
+
+LOCAL_DB_HOSTS = {None, "", "localhost", "127.0.0.1", "::1"}
+
+
+# Корпус
+
+class Corpus:
+    """
+    Каталог с записанными ответами: index.json (url -> status, content-type, файл тела) и тела *.html.
+    Ключ — URL ровно в том виде, в каком его запрашивает импортёр.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        self.index: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    def put(self, url: str, status_code: int, content_type: Optional[str], body: bytes) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        name = hashlib.sha1(url.encode()).hexdigest() + ".html"
+        with open(os.path.join(self.directory, name), "wb") as f:
+            f.write(body)
+        self.index[url] = {"status": status_code, "content_type": content_type, "file": name}
+
+    def get(self, url: str) -> Optional[tuple[int, Optional[str], bytes]]:
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+            return entry["status"], entry["content_type"], f.read()
+
+    def save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Пропускает запросы в сеть и складывает (уже распакованные) ответы в корпус."""
+
+    def __init__(self, corpus: Corpus) -> None:
+        self.corpus = corpus
+        self._inner = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        response = await self._inner.handle_async_request(request)
+        body = await response.aread()
+        content_type = response.headers.get("content-type")
+        if response.status_code < 300:
+            self.corpus.put(str(request.url), response.status_code, content_type, body)
+        # тело уже распаковано — content-encoding/length исходного ответа больше не верны
+        return httpx.Response(response.status_code, headers={"content-type": content_type or "text/html"}, content=body)
+
+    async def aclose(self) -> None:
+        await self._inner.aclose()
+
+
+def replay_transport(corpus: Corpus, latency_ms: float, jitter_ms: float) -> httpx.MockTransport:
+    """MockTransport поверх корпуса: задержка latency ± jitter на каждый ответ, 404 на незаписанные URL."""
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        delay = max(latency_ms + random.uniform(-jitter_ms, jitter_ms), 0.0) / 1000
+        if delay:
+            await asyncio.sleep(delay)
+        hit = corpus.get(str(request.url))
+        if hit is None:
+            return httpx.Response(404, text="not in corpus")
+        status_code, content_type, body = hit
+        return httpx.Response(status_code, headers={"content-type": content_type or "text/html"}, content=body)
+
+    return httpx.MockTransport(handler)
+
+
+# Прогон импортёров
+
+def _unlimited_policy(policy: HostPolicy) -> HostPolicy:
+    # та же параллельность, но без token bucket сайта: иначе замер упирается в rate, а не в конвейер
+    return HostPolicy(max_concurrency=policy.max_concurrency, rate=1e9, burst=1_000_000, max_retries=0)
+
+
+def _importer(source: str, args: argparse.Namespace, unlimited: bool = False) -> Callable[..., Awaitable[Any]]:
+    if source == "simpler_grants":
+        from app.parsers.grant.simpler_grants import FETCH_POLICY, fetch_grants_from_simpler
+
+        async def run(session, **kwargs):
+            return await fetch_grants_from_simpler(
+                session=session, pages=args.pages, start_page=args.start_page, fetch_policy=policy, **kwargs
+            )
+    else:
+        from app.parsers.scholarship.internationalscholarships import (
+            FETCH_POLICY,
+            fetch_scholarships_from_internationalscholarships,
+        )
+
+        async def run(session, **kwargs):
+            return await fetch_scholarships_from_internationalscholarships(
+                session=session,
+                details=args.details,
+                max_pages=args.pages,
+                per_page=args.per_page,
+                max_items=args.pages * args.per_page,
+                start_page=args.start_page,
+                skip_past_years=False,
+                fetch_policy=policy,
+                **kwargs,
+            )
+    policy = _unlimited_policy(FETCH_POLICY) if unlimited else None
+    return run
+
+
+@dataclass
+class RunReport:
+    elapsed_sec: float
+    counters: Dict[str, int]
+    parse_ms_per_page: Optional[float]
+    persisted: int
+
+    @property
+    def pages_per_sec(self) -> float:
+        pages = self.counters["pages"] + self.counters["fetched"]
+        return pages / self.elapsed_sec if self.elapsed_sec else 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.persisted / self.elapsed_sec if self.elapsed_sec else 0.0
+
+
+async def _run_once(run, session_factory, transport: httpx.AsyncBaseTransport) -> RunReport:
+    progress = EtlProgress()
+    started = time.perf_counter()
+    async with session_factory() as session:
+        await run(session, progress=progress, transport=transport)
+    elapsed = time.perf_counter() - started
+
+    parse_ms = None
+    persisted = 0
+    if progress.pipeline is not None:
+        parse = progress.pipeline.stages.get("parse")
+        if parse is not None and parse.processed + parse.dropped:
+            parse_ms = parse.busy_sec * 1000 / (parse.processed + parse.dropped)
+        persisted = progress.pipeline.persisted
+    return RunReport(elapsed_sec=elapsed, counters=progress.as_dict(), parse_ms_per_page=parse_ms, persisted=persisted)
+
+
+def _peak_rss_mb() -> tuple[float, float]:
+    # ru_maxrss на Linux в КБ; children — процессы пула парсинга
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    return own, children
+
+
+def _db_path(counters: Dict[str, int]) -> str:
+    """Какой путь upsert реально мерили — по счётчикам прогона."""
+    paths = [name for name in ("inserted", "updated", "unchanged") if counters.get(name)]
+    return "+".join(paths) or "-"
+
+
+def _print_report(label: str, report: RunReport) -> None:
+    own, children = _peak_rss_mb()
+    parse = f"{report.parse_ms_per_page:.1f}" if report.parse_ms_per_page is not None else "-"
+    print(
+        f"{label}: {report.elapsed_sec:.2f}s | pages/s {report.pages_per_sec:.1f} | parse ms/page {parse} | "
+        f"rows/s {report.rows_per_sec:.1f} ({_db_path(report.counters)}) | "
+        f"peak RSS {own:.0f} MB (pool {children:.0f} MB) | {report.counters}"
+    )
+
+
+def _check_local(database_url: str) -> None:
+    # харнесс пишет в БД и очищает таблицы — только локальный Postgres (или unix-сокет)
+    url = make_url(database_url)
+    if url.host not in LOCAL_DB_HOSTS:
+        sys.exit(f"refusing non-local database host {url.host!r}: point --database-url at a local Postgres")
+
+
+def _session_factory(database_url: str):
+    engine = create_async_engine(database_url, pool_pre_ping=True)
+    return engine, sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def _reset_table(engine, source: str) -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text(f'TRUNCATE TABLE "{SOURCE_TABLES[source]}" RESTART IDENTITY'))
+
+
+@contextmanager
+def _cache_dir() -> Iterator[str]:
+    """Пустой временный каталог под CRAWLER_CACHE_DIR на время блока (ResponseCache читает его при создании)."""
+    previous = settings.CRAWLER_CACHE_DIR
+    with tempfile.TemporaryDirectory(prefix="etl-bench-cache-") as cache_dir:
+        settings.CRAWLER_CACHE_DIR = cache_dir
+        try:
+            yield cache_dir
+        finally:
+            settings.CRAWLER_CACHE_DIR = previous
+
+
+async def record(args: argparse.Namespace) -> None:
+    corpus = Corpus(os.path.join(args.corpus, args.source))
+    engine, factory = _session_factory(args.database_url)
+    transport = RecordingTransport(corpus)
+    try:
+        with _cache_dir():
+            report = await _run_once(_importer(args.source, args), factory, transport)
+    finally:
+        corpus.save()
+        await transport.aclose()
+        await engine.dispose()
+    print(f"recorded {len(corpus)} responses into {corpus.directory}")
+    _print_report("record", report)
+
+
+async def replay(args: argparse.Namespace) -> None:
+    corpus = Corpus(os.path.join(args.corpus, args.source))
+    if not len(corpus):
+        sys.exit(f"corpus {corpus.directory} is empty — run `record` first")
+
+    engine, factory = _session_factory(args.database_url)
+    run = _importer(args.source, args, unlimited=True)
+    try:
+        if args.db_state == "populated":
+            # наполнение таблицы — не меряется; кеш этого прохода выбрасывается, замеры его не видят
+            with _cache_dir():
+                await _run_once(run, factory, replay_transport(corpus, args.latency_ms, args.jitter_ms))
+        for i in range(1, args.runs + 1):
+            transport = replay_transport(corpus, args.latency_ms, args.jitter_ms)
+            # у каждого прогона свой пустой кеш: иначе со второго прогона меряется кешированный путь
+            with _cache_dir():
+                if args.warm_cache:
+                    # прогрев кеша ответов — не меряется
+                    await _run_once(run, factory, transport)
+                if args.db_state == "empty":
+                    await _reset_table(engine, args.source)
+                label = f"run {i} [db {args.db_state}, cache {'warm' if args.warm_cache else 'cold'}]"
+                _print_report(label, await _run_once(run, factory, transport))
+    finally:
+        await engine.dispose()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=("record", "replay"))
+    parser.add_argument("--source", choices=SOURCES, required=True)
+    parser.add_argument("--pages", type=int, default=1)
+    parser.add_argument("--start-page", type=int, default=1)
+    parser.add_argument("--per-page", type=int, default=40, help="intl_scholarships: строк на странице листинга")
+    parser.add_argument("--details", type=int, default=128, help="intl_scholarships: AwardSearch[details]")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--database-url", required=True, help="локальный Postgres; таблица источника очищается")
+    parser.add_argument("--db-state", choices=("empty", "populated"), default="empty",
+                        help="empty — мерить INSERT (таблица очищается перед замером), populated — путь без изменений")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--warm-cache", action="store_true", help="мерить повторный проход с тёплым кешем ответов")
+    args = parser.parse_args(argv)
+    _check_local(args.database_url)
+
+    asyncio.run(record(args) if args.mode == "record" else replay(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from fastapi.responses import HTMLResponse, JSONResponse
 from app.services.internshipService import InternshipService
 from app.services.scholarshipService import ScholarshipService
 from app.auth.dependencies import AccessTokenBearer
+from typing import Optional
 import httpx
 
 
@@ -29,10 +30,11 @@ async def base(
 @router.get("/grants", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
 async def get_all_grants(
     request: Request,
+    cursor: Optional[str] = None,
     session: AsyncSession = Depends(get_session)
 ):
-    grants = await grant_service.get_all_grants(session)
-    return templates.TemplateResponse("grants.html", {"request": request, "grants": grants})
+    grants, _total, next_cursor = await grant_service.get_all_grants(session, cursor=cursor, include_total="false")
+    return templates.TemplateResponse("grants.html", {"request": request, "grants": grants, "next_cursor": next_cursor})
 
 @router.get("/grants/{grant_id}", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
 async def get_grant(
@@ -50,9 +52,9 @@ async def get_grant(
 # Internships
 
 @router.get("/internships/", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
-async def get_all_internships(request: Request, session: AsyncSession = Depends(get_session)):
-    internships = await internship_service.get_all_internships(session)
-    return templates.TemplateResponse("internships.html", {"request": request, "internships": internships})
+async def get_all_internships(request: Request, cursor: Optional[str] = None, session: AsyncSession = Depends(get_session)):
+    internships, _total, next_cursor = await internship_service.get_all_internships(session, cursor=cursor, include_total="false")
+    return templates.TemplateResponse("internships.html", {"request": request, "internships": internships, "next_cursor": next_cursor})
 
 @router.get("/internships/{internship_id}", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
 async def get_internship(request: Request, internship_id: int, session: AsyncSession = Depends(get_session)):
@@ -66,9 +68,9 @@ async def get_internship(request: Request, internship_id: int, session: AsyncSes
 # Scholarships
 
 @router.get("/scholarships/", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
-async def get_all_scholarships(request: Request, session: AsyncSession = Depends(get_session)):
-    scholarships = await scholarship_service.get_all_scholarships(session)
-    return templates.TemplateResponse("scholarships.html", {"request": request, "scholarships": scholarships})
+async def get_all_scholarships(request: Request, cursor: Optional[str] = None, session: AsyncSession = Depends(get_session)):
+    scholarships, _total, next_cursor = await scholarship_service.get_all_scholarships(session, cursor=cursor, include_total="false")
+    return templates.TemplateResponse("scholarships.html", {"request": request, "scholarships": scholarships, "next_cursor": next_cursor})
 
 @router.get("/scholarships/{scholarship_id}", response_class=HTMLResponse, status_code=status.HTTP_200_OK)
 async def get_scholarship(request: Request, scholarship_id: int, session: AsyncSession = Depends(get_session)):
@@ -100,6 +102,8 @@ async def recommendations_data(request: Request):
     async with httpx.AsyncClient() as client:
         resp = await client.get(
             "http://127.0.0.1:8000/api/v1/recommendations/",
+            # карточка показывает description — он есть только в view=full
+            params={"view": "full"},
             headers={"Authorization": auth_header}
         )
     return JSONResponse(status_code=resp.status_code, content=resp.json())
\ No newline at end of file
@@ -10,6 +10,7 @@ from app.auth.models import User
 from app.models.grant import Grant
 from app.models.internship import Internship
 from app.models.scholarship import Scholarship
+from app.models.table_version import TableVersion
 from sqlmodel import SQLModel
 from app.core.config import settings
 
@@ -0,0 +1,42 @@
+"""add full-text search vector to grant
+
+Revision ID: a3c81e5d2f47
+Revises: f2252695ac00
+Create Date: 2025-09-08 10:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c81e5d2f47'
+down_revision: Union[str, Sequence[str], None] = 'f2252695ac00'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # STORED generated column: Postgres сам пересчитывает его на INSERT/UPDATE
+    op.add_column(
+        'grant',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_SQL, persisted=True), nullable=True),
+    )
+    op.create_index('ix_grant_search_vector', 'grant', ['search_vector'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_grant_search_vector', table_name='grant', postgresql_using='gin')
+    op.drop_column('grant', 'search_vector')
@@ -0,0 +1,39 @@
+"""add (deadline ASC NULLS LAST, id ASC) sort index
+
+Revision ID: a6e4c2d81f93
+Revises: c93a5e0f7b21
+Create Date: 2025-10-14 11:03:52.618440
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6e4c2d81f93'
+down_revision: Union[str, Sequence[str], None] = 'c93a5e0f7b21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('grant', 'scholarship', 'internship')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # «скоро дедлайн» (sort_by=deadline&order=asc) сортирует ASC NULLS LAST, id ASC;
+    # обратный проход по ix_*_deadline_id даёт NULLS FIRST и под этот ORDER BY не подходит
+    for table in TABLES:
+        op.create_index(
+            f'ix_{table}_deadline_asc_id', table,
+            [sa.text('deadline ASC NULLS LAST'), sa.text('id ASC')], unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_deadline_asc_id', table_name=table)
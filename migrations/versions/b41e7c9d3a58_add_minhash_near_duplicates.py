@@ -0,0 +1,46 @@
+"""add minhash signature, LSH bands and duplicate_of to opportunities
+
+Revision ID: b41e7c9d3a58
+Revises: f8b1d3a7c260
+Create Date: 2025-10-06 11:47:03.582914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e7c9d3a58'
+down_revision: Union[str, Sequence[str], None] = 'f8b1d3a7c260'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('grant', 'scholarship', 'internship')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL у существующих строк: сигнатуры и связи проставляет `python -m app.ml.minhash backfill`
+    for table in TABLES:
+        op.add_column(table, sa.Column('minhash', postgresql.BYTEA(), nullable=True))
+        op.add_column(table, sa.Column('minhash_bands', postgresql.ARRAY(sa.BIGINT()), nullable=True))
+        op.add_column(table, sa.Column('duplicate_of', sa.INTEGER(), nullable=True))
+        op.create_foreign_key(
+            f'fk_{table}_duplicate_of', table, table, ['duplicate_of'], ['id'], ondelete='SET NULL',
+        )
+        op.create_index(f'ix_{table}_minhash_bands', table, ['minhash_bands'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_minhash_bands', table_name=table, postgresql_using='gin')
+        op.drop_constraint(f'fk_{table}_duplicate_of', table, type_='foreignkey')
+        op.drop_column(table, 'duplicate_of')
+        op.drop_column(table, 'minhash_bands')
+        op.drop_column(table, 'minhash')
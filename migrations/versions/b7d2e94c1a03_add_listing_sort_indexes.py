@@ -0,0 +1,48 @@
+"""add listing sort indexes
+
+Revision ID: b7d2e94c1a03
+Revises: a3c81e5d2f47
+Create Date: 2025-09-10 16:40:02.774019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e94c1a03'
+down_revision: Union[str, Sequence[str], None] = 'a3c81e5d2f47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('grant', 'scholarship', 'internship')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        op.create_index(
+            f'ix_{table}_created_at_id', table,
+            [sa.text('created_at DESC NULLS LAST'), sa.text('id DESC')], unique=False,
+        )
+        # направление и NULLS как в ORDER BY листинга (order=desc по умолчанию)
+        op.create_index(
+            f'ix_{table}_deadline_id', table,
+            [sa.text('deadline DESC NULLS LAST'), sa.text('id DESC')], unique=False,
+        )
+        op.create_index(
+            f'ix_{table}_published_at_id', table,
+            [sa.text('published_at DESC NULLS LAST'), sa.text('id DESC')], unique=False,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_published_at_id', table_name=table)
+        op.drop_index(f'ix_{table}_deadline_id', table_name=table)
+        op.drop_index(f'ix_{table}_created_at_id', table_name=table)
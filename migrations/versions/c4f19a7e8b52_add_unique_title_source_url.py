@@ -0,0 +1,47 @@
+"""add unique (title, source_url) to opportunities
+
+Revision ID: c4f19a7e8b52
+Revises: b7d2e94c1a03
+Create Date: 2025-09-15 12:03:51.402387
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f19a7e8b52'
+down_revision: Union[str, Sequence[str], None] = 'b7d2e94c1a03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('grant', 'scholarship', 'internship')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        # уже накопленные дубли (стипендии вставлялись без проверки) — оставляем самую раннюю запись;
+        # рекомендации на удаляемые дубли сначала переводим на неё, иначе они повиснут
+        op.execute(
+            f'UPDATE recommendations r SET item_id = k.keep_id '
+            f'FROM (SELECT a.id AS dup_id, min(b.id) AS keep_id FROM "{table}" a '
+            f'JOIN "{table}" b ON a.title = b.title AND a.source_url = b.source_url AND b.id < a.id '
+            f'GROUP BY a.id) k '
+            f"WHERE r.item_type = '{table}' AND r.item_id = k.dup_id"
+        )
+        op.execute(
+            f'DELETE FROM "{table}" a USING "{table}" b '
+            f'WHERE a.title = b.title AND a.source_url = b.source_url AND a.id > b.id'
+        )
+        op.create_unique_constraint(f'uq_{table}_title_source_url', table, ['title', 'source_url'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_constraint(f'uq_{table}_title_source_url', table, type_='unique')
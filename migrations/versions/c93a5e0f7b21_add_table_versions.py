@@ -0,0 +1,89 @@
+"""add table_versions change counters for list validators
+
+Revision ID: c93a5e0f7b21
+Revises: b41e7c9d3a58
+Create Date: 2025-10-08 10:21:37.904115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c93a5e0f7b21'
+down_revision: Union[str, Sequence[str], None] = 'b41e7c9d3a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('grant', 'scholarship', 'internship')
+
+# Statement-level: одна запись в table_versions на оператор, а не на строку. Transition table нужна,
+# чтобы ON CONFLICT DO UPDATE ... WHERE, не изменивший ни одной строки (пере-краул без правок), версию не трогал.
+# greatest(): modified_at не откатывается назад, если раньше начатая транзакция закоммитилась позже.
+BUMP_SQL = """
+    INSERT INTO table_versions (name, version, modified_at)
+    VALUES (TG_TABLE_NAME, 1, clock_timestamp() AT TIME ZONE 'UTC')
+    ON CONFLICT (name) DO UPDATE
+    SET version = table_versions.version + 1,
+        modified_at = greatest(table_versions.modified_at, EXCLUDED.modified_at);
+"""
+
+EVENTS = (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD'))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'table_versions',
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('version', postgresql.BIGINT(), server_default='0', nullable=False),
+        sa.Column('modified_at', postgresql.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.execute(f"""
+        CREATE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM changed_rows) THEN
+                {BUMP_SQL}
+            END IF;
+            RETURN NULL;
+        END $$
+    """)
+    op.execute(f"""
+        CREATE FUNCTION bump_table_version_truncate() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            {BUMP_SQL}
+            RETURN NULL;
+        END $$
+    """)
+    for table in TABLES:
+        op.execute(
+            f"INSERT INTO table_versions (name, version, modified_at) "
+            f"VALUES ('{table}', 1, clock_timestamp() AT TIME ZONE 'UTC')"
+        )
+        # у триггера с transition table может быть только одно событие — по триггеру на событие
+        for event, side in EVENTS:
+            op.execute(
+                f'CREATE TRIGGER "{table}_version_{event}" AFTER {event.upper()} ON "{table}" '
+                f'REFERENCING {side} TABLE AS changed_rows '
+                f'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()'
+            )
+        op.execute(
+            f'CREATE TRIGGER "{table}_version_truncate" AFTER TRUNCATE ON "{table}" '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_truncate()'
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        for event in ('insert', 'update', 'delete', 'truncate'):
+            op.execute(f'DROP TRIGGER IF EXISTS "{table}_version_{event}" ON "{table}"')
+    op.execute('DROP FUNCTION IF EXISTS bump_table_version_truncate()')
+    op.execute('DROP FUNCTION IF EXISTS bump_table_version()')
+    op.drop_table('table_versions')
@@ -0,0 +1,31 @@
+"""add users.token_version_bumped_at
+
+Revision ID: d3b8f1a6c475
+Revises: a6e4c2d81f93
+Create Date: 2025-10-16 09:47:21.530118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3b8f1a6c475'
+down_revision: Union[str, Sequence[str], None] = 'a6e4c2d81f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version_bumped_at', sa.TIMESTAMP(), nullable=True))
+    op.create_index(op.f('ix_users_token_version_bumped_at'), 'users', ['token_version_bumped_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_token_version_bumped_at'), table_name='users')
+    op.drop_column('users', 'token_version_bumped_at')
@@ -0,0 +1,35 @@
+"""add content_hash to opportunities
+
+Revision ID: d9e3b6a41c28
+Revises: c4f19a7e8b52
+Create Date: 2025-09-17 18:25:09.136544
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9e3b6a41c28'
+down_revision: Union[str, Sequence[str], None] = 'c4f19a7e8b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('grant', 'scholarship', 'internship')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL у существующих строк: первый же пере-краул проставит хеш (NULL IS DISTINCT FROM <hash>)
+    for table in TABLES:
+        op.add_column(table, sa.Column('content_hash', sa.VARCHAR(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        op.drop_column(table, 'content_hash')
@@ -0,0 +1,31 @@
+"""add users.token_version and index on users.email
+
+Revision ID: e5a72c0d9f14
+Revises: d9e3b6a41c28
+Create Date: 2025-09-22 11:47:30.602915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a72c0d9f14'
+down_revision: Union[str, Sequence[str], None] = 'd9e3b6a41c28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.INTEGER(), server_default='0', nullable=False))
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_users_email'), table_name='users')
+    op.drop_column('users', 'token_version')
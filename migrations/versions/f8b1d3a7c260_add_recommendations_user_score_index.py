@@ -0,0 +1,32 @@
+"""add recommendations (user_id, score DESC, id DESC) index
+
+Revision ID: f8b1d3a7c260
+Revises: e5a72c0d9f14
+Create Date: 2025-10-02 14:12:45.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8b1d3a7c260'
+down_revision: Union[str, Sequence[str], None] = 'e5a72c0d9f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_recommendations_user_id_score_id', 'recommendations',
+        ['user_id', sa.text('score DESC'), sa.text('id DESC')], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_recommendations_user_id_score_id', table_name='recommendations')